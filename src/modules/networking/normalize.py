@@ -0,0 +1,155 @@
+import ipaddress
+from functools import lru_cache
+from string import hexdigits
+import numpy as np
+
+MAC_HEX_DIGITS = 12
+_MAC_SEPARATORS = str.maketrans("", "", " \t:.-")
+# Code point -> nibble value, or one of the markers below.
+_SKIP, _INVALID = 254, 255
+_HEX_NIBBLES = np.full(256, _INVALID, dtype=np.uint8)
+for _digit, _char in enumerate("0123456789abcdef"):
+    _HEX_NIBBLES[ord(_char)] = _digit
+    _HEX_NIBBLES[ord(_char.upper())] = _digit
+# Separators and the NUL padding of fixed-width numpy strings.
+for _char in " \t:.-\0":
+    _HEX_NIBBLES[ord(_char)] = _SKIP
+
+
+def mac_to_int(physical_address):
+    """
+    Convert a MAC address to its 48-bit integer value.
+
+    Colon (AA:BB:CC:DD:EE:FF), double colon, dash (AA-BB-CC-DD-EE-FF), Cisco dot
+    (aabb.ccdd.eeff) and bare hex formats are accepted, in any case.
+
+    Args:
+        physical_address (str): The MAC address.
+
+    Returns:
+        int: The MAC address as an integer, or None if it is not a valid MAC address.
+    """
+    if not isinstance(physical_address, str):
+        return None
+    digits = physical_address.translate(_MAC_SEPARATORS)
+    if len(digits) != MAC_HEX_DIGITS or not all(c in hexdigits for c in digits):
+        return None
+    return int(digits, 16)
+
+
+def int_to_mac(value):
+    """
+    Format a 48-bit integer as an upper-case, colon-separated MAC address.
+    """
+    digits = f"{value:012X}"
+    return ":".join(digits[i : i + 2] for i in range(0, MAC_HEX_DIGITS, 2))
+
+
+def mac_norm(physical_address):
+    """
+    Normalize a MAC address in any format mac_to_int accepts to AA:BB:CC:DD:EE:FF.
+
+    Returns:
+        str: The canonical MAC address, or None if it is not a valid MAC address.
+    """
+    value = mac_to_int(physical_address)
+    return None if value is None else int_to_mac(value)
+
+
+def ip_to_int(ip_address):
+    """
+    Convert an IPv4 address, optionally with a prefix length ("10.0.0.1/32"), to an integer.
+
+    Returns:
+        int: The address as an integer, or None if it is not a valid IPv4 address.
+    """
+    if not isinstance(ip_address, str):
+        return None
+    try:
+        return int(ipaddress.IPv4Address(ip_address.strip().split("/")[0]))
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=1024)
+def _network(cidr):
+    return ipaddress.ip_network(cidr.strip(), strict=False)
+
+
+def ip_in_cidr(ip_address, cidr):
+    """
+    Check whether an IPv4 or IPv6 address belongs to a network in CIDR notation.
+
+    Returns:
+        bool: True if the address is inside the network, None if either is invalid.
+    """
+    if not isinstance(ip_address, str) or not isinstance(cidr, str):
+        return None
+    try:
+        return ipaddress.ip_address(ip_address.strip().split("/")[0]) in _network(cidr)
+    except ValueError:
+        return None
+
+
+def ipv4_network_range(cidr):
+    """
+    Return the first and last address of an IPv4 network as integers, so subnet
+    membership becomes "ipv4_int BETWEEN first AND last".
+
+    Args:
+        cidr (str): The network, e.g. "10.0.0.0/24".
+
+    Returns:
+        tuple: The (first, last) addresses as integers.
+    """
+    network = ipaddress.IPv4Network(cidr.strip(), strict=False)
+    return int(network.network_address), int(network.broadcast_address)
+
+
+def add_int_keys(record):
+    """
+    Add the integer join keys of an inventory record.
+
+    'mac_int' is derived from 'physical_address' and 'ipv4_int' from 'ipv4'; either
+    is None when the source value is missing or malformed.
+
+    Args:
+        record (dict): A row for a source table or master_inventory.
+
+    Returns:
+        dict: The same record, with 'mac_int' and 'ipv4_int' set.
+    """
+    record["mac_int"] = mac_to_int(record.get("physical_address"))
+    record["ipv4_int"] = ip_to_int(record.get("ipv4"))
+    return record
+
+
+def macs_to_ints(physical_addresses):
+    """
+    Convert many MAC addresses to 48-bit integers in one vectorized operation.
+
+    Args:
+        physical_addresses (iterable): MAC addresses in any format mac_to_int accepts.
+
+    Returns:
+        tuple: A uint64 array of MAC integers and a boolean array marking which
+            entries were valid MAC addresses (invalid entries are 0).
+    """
+    addresses = np.array(
+        [value if isinstance(value, str) else "" for value in physical_addresses],
+        dtype=str,
+    )
+    if addresses.size == 0:
+        return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=bool)
+    # Work on the UCS-4 code points of every character at once.
+    codes = addresses.view(np.uint32).reshape(len(addresses), -1)
+    nibbles = _HEX_NIBBLES[np.minimum(codes, _INVALID)]
+    is_digit = nibbles < 16
+    position = np.cumsum(is_digit, axis=1) - 1
+    valid = (position[:, -1] == MAC_HEX_DIGITS - 1) & ~(nibbles == _INVALID).any(axis=1)
+    counted = is_digit & valid[:, None]
+    shift = np.where(counted, (MAC_HEX_DIGITS - 1 - position) * 4, 0)
+    values = np.where(
+        counted, nibbles.astype(np.uint64) << shift.astype(np.uint64), 0
+    ).sum(axis=1, dtype=np.uint64)
+    return values, valid
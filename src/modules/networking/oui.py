@@ -0,0 +1,342 @@
+import csv
+import hashlib
+import json
+import os
+import xml.etree.ElementTree as ET
+import numpy as np
+from src.modules.networking.normalize import macs_to_ints, mac_to_int
+
+MAC_BITS = 48
+# IEEE MA-S (36-bit), MA-M (28-bit) and MA-L (24-bit) assignments, longest first.
+PREFIX_BITS = [36, 28, 24]
+CACHE_MAGIC = b"ONIOUI01"
+CACHE_ALIGNMENT = 8
+CISCO_NAMESPACE = {"ns": "http://www.cisco.com/server/spt"}
+# Generated files live with the databases, not in the source tree.
+DEFAULT_CACHE_DIR = "resources/db"
+
+
+def parse_prefix(mac_prefix):
+    """
+    Parse an OUI prefix such as "00:1B:C5" or "00:1B:C5:0" into its value and length.
+
+    Args:
+        mac_prefix (str): The prefix, in any separator format.
+
+    Returns:
+        tuple: The prefix value and its length in bits, or None if it is not a
+            24, 28 or 36-bit prefix.
+    """
+    digits = "".join(char for char in mac_prefix if char not in " :.-")
+    bits = len(digits) * 4
+    if bits not in PREFIX_BITS:
+        return None
+    try:
+        return int(digits, 16), bits
+    except ValueError:
+        return None
+
+
+def load_vendor_xml(xml_path):
+    """
+    Read a Cisco vendorMacs.xml file into a {mac_prefix: vendor_name} mapping.
+    """
+    mac_vendors = {}
+    root = ET.parse(xml_path).getroot()
+    for vendor in root.findall("ns:VendorMapping", CISCO_NAMESPACE):
+        mac_prefix = vendor.get("mac_prefix").strip().upper()
+        mac_vendors[mac_prefix] = vendor.get("vendor_name").strip()
+    return mac_vendors
+
+
+def load_vendor_csv(csv_path):
+    """
+    Read an IEEE registry export (oui.csv, mam.csv, oui36.csv) into a
+    {mac_prefix: vendor_name} mapping.
+
+    The maclookup.app export ("Mac Prefix", "Vendor Name" columns) is read as well.
+    """
+    mac_vendors = {}
+    with open(csv_path, newline="", encoding="utf-8") as csv_file:
+        for row in csv.DictReader(csv_file):
+            mac_prefix = row.get("Assignment") or row.get("Mac Prefix")
+            vendor_name = row.get("Organization Name") or row.get("Vendor Name")
+            if mac_prefix and vendor_name:
+                mac_vendors[mac_prefix.strip().upper()] = vendor_name.strip()
+    return mac_vendors
+
+
+def load_vendor_sources(sources):
+    """
+    Merge vendor files into one mapping; later sources override earlier ones.
+    """
+    mac_vendors = {}
+    for source in sources:
+        if source.lower().endswith(".xml"):
+            mac_vendors.update(load_vendor_xml(source))
+        else:
+            mac_vendors.update(load_vendor_csv(source))
+    return mac_vendors
+
+
+def source_fingerprint(source, cached=None):
+    """
+    Describe a source file by its mtime, size and sha256.
+
+    The hash is only computed when the mtime or size differ from the cached entry.
+    """
+    stat = os.stat(source)
+    fingerprint = {
+        "path": os.path.abspath(source),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+    }
+    if cached and all(cached.get(key) == fingerprint[key] for key in fingerprint):
+        fingerprint["sha256"] = cached.get("sha256")
+        return fingerprint
+    digest = hashlib.sha256()
+    with open(source, "rb") as source_file:
+        for block in iter(lambda: source_file.read(1 << 20), b""):
+            digest.update(block)
+    fingerprint["sha256"] = digest.hexdigest()
+    return fingerprint
+
+
+def load_oui_index(sources, cache_path=None):
+    """
+    Load the vendor index for the given source files from its binary cache.
+
+    The cache is rebuilt only when a source was added or removed, or when its content
+    hash changed; a source that was merely touched only refreshes the cache header.
+
+    Args:
+        sources (list): vendorMacs.xml and/or IEEE csv paths; missing files are skipped.
+        cache_path (str): The cache file, by default named after the first source in
+            DEFAULT_CACHE_DIR.
+
+    Returns:
+        OuiIndex: The index, memory-mapped from the cache.
+    """
+    sources = [source for source in sources if os.path.exists(source)]
+    if not sources:
+        raise FileNotFoundError("No MAC vendor source file found.")
+    cache_path = cache_path or os.path.join(
+        DEFAULT_CACHE_DIR, os.path.splitext(os.path.basename(sources[0]))[0] + ".oui"
+    )
+
+    cached_sources = []
+    if os.path.exists(cache_path):
+        try:
+            cached_sources = OuiIndex.read_header(cache_path)["sources"]
+        except (OSError, ValueError):
+            cached_sources = []
+    cached = {entry["path"]: entry for entry in cached_sources}
+    fingerprints = [
+        source_fingerprint(source, cached.get(os.path.abspath(source)))
+        for source in sources
+    ]
+
+    if cached_sources and [
+        (entry["path"], entry.get("sha256")) for entry in cached_sources
+    ] == [(entry["path"], entry["sha256"]) for entry in fingerprints]:
+        if cached_sources == fingerprints:
+            return OuiIndex.load(cache_path)
+        # Touched but unchanged: refresh the header so the next run skips hashing.
+        OuiIndex.load(cache_path, mmap=False).save(cache_path, sources=fingerprints)
+        return OuiIndex.load(cache_path)
+
+    index = OuiIndex.from_mapping(load_vendor_sources(sources))
+    index.save(cache_path, sources=fingerprints)
+    return OuiIndex.load(cache_path)
+
+
+class OuiIndex:
+    """
+    Vendor lookup by longest-prefix match over 24, 28 and 36-bit MAC prefixes.
+
+    Each prefix length is stored as a sorted array of prefix values with a parallel
+    array of vendor ids, so lookups are binary searches and a whole array of MAC
+    integers is resolved with one np.searchsorted per prefix length.
+    """
+
+    def __init__(self, prefixes, vendors):
+        """
+        Args:
+            prefixes (dict): For each prefix length, a (sorted uint64 prefix values,
+                int32 vendor ids) tuple.
+            vendors (list): Vendor names indexed by vendor id.
+        """
+        self.prefixes = prefixes
+        self.vendors = np.asarray(vendors, dtype=object)
+
+    @classmethod
+    def from_mapping(cls, mac_vendors):
+        """
+        Build the index from a {mac_prefix: vendor_name} mapping.
+
+        Prefixes that are not 24, 28 or 36 bits long are ignored.
+        """
+        vendor_ids = {}
+        entries = {bits: {} for bits in PREFIX_BITS}
+        for mac_prefix, vendor_name in mac_vendors.items():
+            parsed = parse_prefix(mac_prefix)
+            if parsed is None:
+                continue
+            value, bits = parsed
+            entries[bits][value] = vendor_ids.setdefault(vendor_name, len(vendor_ids))
+
+        prefixes = {}
+        for bits, values in entries.items():
+            keys = np.fromiter(values.keys(), dtype=np.uint64, count=len(values))
+            ids = np.fromiter(values.values(), dtype=np.int32, count=len(values))
+            order = np.argsort(keys)
+            prefixes[bits] = (keys[order], ids[order])
+        return cls(prefixes, list(vendor_ids))
+
+    def save(self, cache_path, sources=None):
+        """
+        Write the index to a binary cache file.
+
+        The file holds a magic string, a JSON header and 8-byte aligned raw arrays, so
+        load() can memory-map the arrays instead of parsing anything. The file is
+        written next to its destination and moved into place.
+
+        Args:
+            cache_path (str): The cache file.
+            sources (list): Fingerprints of the source files, stored in the header.
+        """
+        vendor_blob = "\0".join(self.vendors.tolist()).encode("utf-8")
+        arrays = {"vendors": np.frombuffer(vendor_blob, dtype=np.uint8)}
+        for bits, (keys, ids) in self.prefixes.items():
+            arrays[f"keys_{bits}"] = np.ascontiguousarray(keys, dtype=np.uint64)
+            arrays[f"ids_{bits}"] = np.ascontiguousarray(ids, dtype=np.int32)
+
+        layout, offset = {}, 0
+        for name, array in arrays.items():
+            layout[name] = {
+                "offset": offset,
+                "dtype": array.dtype.str,
+                "count": len(array),
+            }
+            offset += -(-array.nbytes // CACHE_ALIGNMENT) * CACHE_ALIGNMENT
+        header = json.dumps({"sources": sources or [], "arrays": layout}).encode()
+        header += b" " * (-(len(CACHE_MAGIC) + 8 + len(header)) % CACHE_ALIGNMENT)
+
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        temp_path = f"{cache_path}.tmp"
+        with open(temp_path, "wb") as cache_file:
+            cache_file.write(CACHE_MAGIC)
+            cache_file.write(len(header).to_bytes(8, "little"))
+            cache_file.write(header)
+            for array in arrays.values():
+                cache_file.write(array.tobytes())
+                cache_file.write(b"\0" * (-array.nbytes % CACHE_ALIGNMENT))
+        os.replace(temp_path, cache_path)
+
+    @staticmethod
+    def read_header(cache_path):
+        with open(cache_path, "rb") as cache_file:
+            if cache_file.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                raise ValueError(f"{cache_path} is not an OUI index cache.")
+            header_length = int.from_bytes(cache_file.read(8), "little")
+            header = json.loads(cache_file.read(header_length))
+        header["data_offset"] = len(CACHE_MAGIC) + 8 + header_length
+        return header
+
+    @classmethod
+    def load(cls, cache_path, mmap=True):
+        """
+        Memory-map an index written by save(), or read it into memory.
+        """
+        header = cls.read_header(cache_path)
+        arrays = {}
+        for name, entry in header["arrays"].items():
+            if not entry["count"]:
+                arrays[name] = np.zeros(0, dtype=entry["dtype"])
+                continue
+            if mmap:
+                arrays[name] = np.memmap(
+                    cache_path,
+                    dtype=entry["dtype"],
+                    mode="r",
+                    offset=header["data_offset"] + entry["offset"],
+                    shape=(entry["count"],),
+                )
+            else:
+                arrays[name] = np.fromfile(
+                    cache_path,
+                    dtype=entry["dtype"],
+                    count=entry["count"],
+                    offset=header["data_offset"] + entry["offset"],
+                )
+        vendors = arrays.pop("vendors").tobytes().decode("utf-8")
+        prefixes = {
+            bits: (arrays[f"keys_{bits}"], arrays[f"ids_{bits}"])
+            for bits in PREFIX_BITS
+            if f"keys_{bits}" in arrays
+        }
+        return cls(prefixes, vendors.split("\0") if vendors else [])
+
+    def __len__(self):
+        return sum(len(keys) for keys, _ in self.prefixes.values())
+
+    def lookup_ids(self, mac_ints):
+        """
+        Resolve an array of 48-bit MAC integers to vendor ids.
+
+        Args:
+            mac_ints (ndarray): MAC addresses as unsigned integers.
+
+        Returns:
+            ndarray: The vendor id of the longest matching prefix, or -1.
+        """
+        mac_ints = np.asarray(mac_ints, dtype=np.uint64)
+        vendor_ids = np.full(mac_ints.shape, -1, dtype=np.int32)
+        unresolved = np.ones(mac_ints.shape, dtype=bool)
+        for bits in PREFIX_BITS:
+            keys, ids = self.prefixes.get(bits, (None, None))
+            if keys is None or not len(keys):
+                continue
+            prefix = mac_ints >> np.uint64(MAC_BITS - bits)
+            position = np.minimum(np.searchsorted(keys, prefix), len(keys) - 1)
+            found = unresolved & (keys[position] == prefix)
+            vendor_ids[found] = ids[position[found]]
+            unresolved &= ~found
+        return vendor_ids
+
+    def lookup_many(self, mac_ints, valid=None, default=None):
+        """
+        Resolve an array of 48-bit MAC integers to vendor names in one call.
+
+        Args:
+            mac_ints (ndarray): MAC addresses as unsigned integers.
+            valid (ndarray): Optional mask of entries that hold a real MAC address.
+            default: The value for addresses without a matching prefix.
+
+        Returns:
+            ndarray: Vendor names (object dtype).
+        """
+        vendor_ids = self.lookup_ids(mac_ints)
+        if valid is not None:
+            vendor_ids[~np.asarray(valid, dtype=bool)] = -1
+        names = np.full(vendor_ids.shape, default, dtype=object)
+        found = vendor_ids >= 0
+        names[found] = self.vendors[vendor_ids[found]]
+        return names
+
+    def lookup_addresses(self, physical_addresses, default=None):
+        """
+        Resolve MAC address strings in any supported format to vendor names.
+        """
+        mac_ints, valid = macs_to_ints(physical_addresses)
+        return self.lookup_many(mac_ints, valid=valid, default=default)
+
+    def lookup(self, physical_address, default=None):
+        """
+        Resolve a single MAC address string or integer to its vendor name.
+        """
+        if not isinstance(physical_address, (int, np.integer)):
+            physical_address = mac_to_int(physical_address)
+            if physical_address is None:
+                return default
+        return self.lookup_many(np.array([physical_address]), default=default)[0]
@@ -0,0 +1,329 @@
+import asyncio
+import ipaddress
+import os
+import random
+import dns.asyncresolver
+import dns.exception
+import dns.name
+import dns.query
+import dns.rdatatype
+import dns.resolver
+import dns.reversename
+import dns.xfr
+import dns.zone
+
+DEFAULT_CONCURRENCY = 32
+DEFAULT_TIMEOUT = 2.0
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF = 0.5
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_TRANSFER_TIMEOUT = 30.0
+# Bits of address per label of a reverse name: octets for IPv4, nibbles for IPv6.
+REVERSE_LABEL_BITS = {
+    4: (dns.reversename.ipv4_reverse_domain, 8),
+    6: (dns.reversename.ipv6_reverse_domain, 4),
+}
+
+
+def negative_ttl(error):
+    """
+    Get how long a negative answer may be cached (RFC 2308): the lower of the TTL of the
+    SOA record in the authority section and its minimum field.
+
+    Args:
+        error (dns.resolver.NXDOMAIN | dns.resolver.NoAnswer): The negative answer.
+
+    Returns:
+        int: The negative TTL in seconds, or None if the response carries no SOA.
+    """
+    try:
+        if isinstance(error, dns.resolver.NXDOMAIN):
+            responses = list(error.responses().values())
+        else:
+            responses = [error.response()]
+    except (KeyError, AttributeError):
+        return None
+    for response in responses:
+        for rrset in response.authority:
+            if rrset.rdtype == dns.rdatatype.SOA and len(rrset):
+                return min(rrset.ttl, rrset[0].minimum)
+    return None
+
+
+def reverse_zone_prefix(zone_name, version=4):
+    """
+    Get the prefix length of the addresses a reverse zone covers.
+
+    Args:
+        zone_name (dns.name.Name): The zone, e.g. "1.10.in-addr.arpa.".
+        version (int): The IP version of the zone.
+
+    Returns:
+        int: The prefix length (16 for "1.10.in-addr.arpa."), or None if the zone is
+            not an octet or nibble aligned reverse zone, such as an RFC 2317 classless
+            delegation.
+    """
+    reverse_domain, bits = REVERSE_LABEL_BITS[version]
+    if not zone_name.is_subdomain(reverse_domain):
+        return None
+    labels = zone_name.relativize(reverse_domain).labels
+    if not all(
+        label.isdigit() or (version == 6 and len(label) == 1) for label in labels
+    ):
+        return None
+    return len(labels) * bits
+
+
+def find_reverse_zones(network, resolver):
+    """
+    Find the reverse zones that hold the PTR records of a network.
+
+    The zone of the network address is looked up with SOA queries. When that zone is
+    smaller than the network, the network is split along the zone size and each part is
+    looked up on its own.
+
+    Args:
+        network (str | ipaddress.IPv4Network): The network in CIDR notation.
+        resolver (dns.resolver.Resolver): The resolver used for the SOA lookups.
+
+    Returns:
+        list: (zone name, part of the network inside that zone) tuples.
+
+    Raises:
+        dns.exception.DNSException: If a zone cannot be found.
+    """
+    network = ipaddress.ip_network(network)
+    zone_name = dns.resolver.zone_for_name(
+        dns.reversename.from_address(str(network.network_address)), resolver=resolver
+    )
+    zone_prefix = reverse_zone_prefix(zone_name, network.version)
+    if zone_prefix is None or zone_prefix <= network.prefixlen:
+        return [(zone_name, network)]
+    zones = []
+    for subnet in network.subnets(new_prefix=zone_prefix):
+        zones.extend(find_reverse_zones(subnet, resolver))
+    return zones
+
+
+def transfer_zone(zone, nameserver, timeout=DEFAULT_TRANSFER_TIMEOUT, incremental=True):
+    """
+    Bring a zone up to date with a zone transfer.
+
+    An empty zone is pulled with AXFR. A zone that already holds an SOA record is
+    updated with IXFR from its serial, which the server answers with only the changes
+    (or a full transfer if it cannot). The zone is left unchanged if the transfer fails.
+
+    Args:
+        zone (dns.zone.Zone): The zone to update.
+        nameserver (str): The address of the server to transfer from.
+        timeout (float): Seconds the whole transfer may take.
+        incremental (bool): Use IXFR when the zone has a serial.
+
+    Returns:
+        int: The serial the zone had before the transfer, or None for an AXFR.
+
+    Raises:
+        dns.xfr.TransferError: If the server refused the transfer.
+        dns.exception.DNSException, OSError: If the transfer failed.
+    """
+    query, serial = dns.xfr.make_query(zone, serial=0 if incremental else None)
+    dns.query.inbound_xfr(nameserver, zone, query=query, lifetime=timeout)
+    return serial
+
+
+def load_zone(zone_name, zone_file=None):
+    """
+    Load a zone saved by save_zone(), or create an empty one to AXFR into.
+    """
+    if zone_file and os.path.exists(zone_file):
+        try:
+            return dns.zone.from_file(zone_file, origin=zone_name, relativize=False)
+        except (dns.exception.DNSException, OSError):
+            pass
+    return dns.zone.Zone(zone_name, relativize=False)
+
+
+def save_zone(zone, zone_file):
+    """
+    Write a zone to a master file, so the next run can request only the changes.
+    """
+    os.makedirs(os.path.dirname(zone_file) or ".", exist_ok=True)
+    temp_file = f"{zone_file}.tmp"
+    zone.to_file(temp_file, relativize=False)
+    os.replace(temp_file, zone_file)
+
+
+def zone_ptr_records(zone):
+    """
+    Yield the PTR records of a reverse zone.
+
+    Yields:
+        tuple: The address, the upper-case host name without its trailing period, and
+            the record TTL.
+    """
+    for name, ttl, rdata in zone.iterate_rdatas(dns.rdatatype.PTR):
+        try:
+            address = dns.reversename.to_address(name.derelativize(zone.origin))
+        except (dns.exception.SyntaxError, ValueError):
+            # e.g. the CNAMEs of an RFC 2317 classless delegation
+            continue
+        yield address, rdata.target.to_text().rstrip(".").upper(), ttl
+
+
+class ReverseResolver:
+    """
+    Resolve PTR records for many addresses concurrently with dnspython's asyncio resolver.
+
+    Each nameserver has its own limit of queries in flight. A query that times out or
+    fails is retried with exponential backoff, on another nameserver; NXDOMAIN and
+    empty answers are final.
+    """
+
+    def __init__(
+        self,
+        nameservers,
+        concurrency=DEFAULT_CONCURRENCY,
+        timeout=DEFAULT_TIMEOUT,
+        retries=DEFAULT_RETRIES,
+        backoff=DEFAULT_BACKOFF,
+        batch_size=DEFAULT_BATCH_SIZE,
+    ):
+        """
+        Args:
+            nameservers (list): Nameserver addresses.
+            concurrency (int | dict): Queries in flight per nameserver, or a
+                {nameserver: limit} mapping; nameservers missing from it get the default.
+            timeout (float): Seconds a single query may take.
+            retries (int): Additional attempts after a timeout or server failure.
+            backoff (float): Seconds before the first retry, doubled on every retry.
+            batch_size (int): Results handed to the batch callback at a time.
+        """
+        if not nameservers:
+            raise ValueError("At least one nameserver is required.")
+        self.nameservers = list(nameservers)
+        if isinstance(concurrency, dict):
+            self.concurrency = [
+                int(concurrency.get(server, DEFAULT_CONCURRENCY))
+                for server in self.nameservers
+            ]
+        else:
+            self.concurrency = [int(concurrency)] * len(self.nameservers)
+        if min(self.concurrency) < 1:
+            raise ValueError("concurrency must be at least 1.")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.batch_size = max(int(batch_size), 1)
+
+    def make_resolver(self, nameserver):
+        resolver = dns.asyncresolver.Resolver(configure=False)
+        resolver.nameservers = [nameserver]
+        resolver.timeout = self.timeout
+        resolver.lifetime = self.timeout
+        return resolver
+
+    def resolve(self, addresses, on_batch):
+        """
+        Resolve the PTR records of many addresses.
+
+        Results are passed to on_batch as they arrive, batch_size at a time, on the
+        calling thread, so the callback may write through the caller's database
+        connection and transaction.
+
+        Args:
+            addresses (iterable): IPv4 or IPv6 addresses as strings; consumed lazily.
+            on_batch (callable): Called with a list of result dictionaries holding
+                'address', 'hostnames', 'ttl', 'status' ("resolved", "nxdomain" or
+                "failed") and 'error'. The 'ttl' of an NXDOMAIN result is its
+                negative TTL.
+
+        Returns:
+            dict: The number of addresses per status.
+        """
+        return asyncio.run(self.resolve_async(addresses, on_batch))
+
+    async def resolve_async(self, addresses, on_batch):
+        resolvers = [self.make_resolver(server) for server in self.nameservers]
+        limits = [asyncio.Semaphore(limit) for limit in self.concurrency]
+        free = list(self.concurrency)
+        workers = sum(self.concurrency)
+        # A bounded queue keeps a /16 from being materialized as 65k pending tasks.
+        queue = asyncio.Queue(maxsize=workers * 2)
+        summary = {"resolved": 0, "nxdomain": 0, "failed": 0}
+        batch = []
+
+        async def produce():
+            for address in addresses:
+                await queue.put(address)
+            for _ in range(workers):
+                await queue.put(None)
+
+        async def work():
+            while True:
+                address = await queue.get()
+                if address is None:
+                    return
+                result = await self.query(resolvers, limits, free, address)
+                summary[result["status"]] += 1
+                batch.append(result)
+                if len(batch) >= self.batch_size:
+                    results = batch[:]
+                    batch.clear()
+                    on_batch(results)
+
+        await asyncio.gather(produce(), *(work() for _ in range(workers)))
+        if batch:
+            on_batch(batch[:])
+        return summary
+
+    @staticmethod
+    def pick_server(free, previous=None):
+        """
+        Pick the nameserver with the most free query slots, preferring another one than
+        the previous attempt used.
+        """
+        candidates = [server for server in range(len(free)) if server != previous]
+        return max(candidates or [previous], key=lambda server: free[server])
+
+    async def query(self, resolvers, limits, free, address):
+        """
+        Resolve one address on the least busy nameserver, retrying on another one.
+        """
+        reverse_name = dns.reversename.from_address(address)
+        result = {
+            "address": address,
+            "hostnames": [],
+            "ttl": None,
+            "status": "failed",
+            "error": None,
+        }
+        server = None
+        for attempt in range(self.retries + 1):
+            if attempt:
+                # Exponential backoff with jitter, so retries do not arrive in bursts.
+                delay = self.backoff * 2 ** (attempt - 1)
+                await asyncio.sleep(delay * random.uniform(1, 1.5))
+            server = self.pick_server(free, server)
+            free[server] -= 1
+            try:
+                async with limits[server]:
+                    answer = await resolvers[server].resolve(
+                        reverse_name, "PTR", lifetime=self.timeout
+                    )
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+                result["status"] = "nxdomain"
+                result["ttl"] = negative_ttl(e)
+                return result
+            except (dns.exception.DNSException, OSError) as e:
+                result["error"] = str(e) or type(e).__name__
+                continue
+            finally:
+                free[server] += 1
+            result["status"] = "resolved"
+            result["ttl"] = answer.rrset.ttl
+            # Remove the trailing period and convert to uppercase
+            result["hostnames"] = [
+                rdata.to_text().rstrip(".").upper() for rdata in answer.rrset
+            ]
+            return result
+        return result
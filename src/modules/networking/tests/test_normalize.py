@@ -0,0 +1,37 @@
+import pytest
+from src.modules.networking.normalize import (
+    add_int_keys,
+    ipv4_network_range,
+    mac_to_int,
+    macs_to_ints,
+)
+
+
+@pytest.mark.parametrize(
+    "physical_address",
+    ["00:00:0c:12:34:56", "00-00-0C-12-34-56", "0000.0c12.3456", "00000C123456"],
+)
+def test_mac_to_int_formats(physical_address):
+    assert mac_to_int(physical_address) == 0x00000C123456
+
+
+@pytest.mark.parametrize(
+    "physical_address", ["", None, "00:00:0C", "ZZ:00:0C:12:34:56", "0x000C123456"]
+)
+def test_mac_to_int_invalid(physical_address):
+    assert mac_to_int(physical_address) is None
+
+
+def test_add_int_keys():
+    record = add_int_keys({"ipv4": "10.0.0.1/32", "physical_address": "bogus"})
+    assert (record["ipv4_int"], record["mac_int"]) == (0x0A000001, None)
+    first, last = ipv4_network_range("10.0.0.0/24")
+    assert first <= record["ipv4_int"] <= last
+    assert last - first == 255
+
+
+def test_macs_to_ints_matches_mac_to_int():
+    addresses = ["00:00:0c:12:34:56", "0000.0c12.3456", "bogus", None, "FF" * 7]
+    values, valid = macs_to_ints(addresses)
+    assert list(valid) == [True, True, False, False, False]
+    assert list(values[:2]) == [0x00000C123456] * 2
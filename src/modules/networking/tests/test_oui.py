@@ -0,0 +1,91 @@
+import os
+import numpy as np
+from src.modules.networking import oui
+from src.modules.networking.oui import OuiIndex, load_oui_index, parse_prefix
+
+MAC_VENDORS = {
+    "00:1B:C5": "IEEE Registration Authority",
+    "00:1B:C5:0": "MA-M Vendor",
+    "00:1B:C5:00:1": "MA-S Vendor",
+    "00:00:0C": "Cisco Systems, Inc",
+    "00:00:0": "Too short",
+}
+
+
+def test_parse_prefix():
+    assert parse_prefix("00:1B:C5:0") == (0x001BC50, 28)
+    assert parse_prefix("00:00:0") is None
+
+
+def test_longest_prefix_match():
+    index = OuiIndex.from_mapping(MAC_VENDORS)
+    assert len(index) == 4
+    assert index.lookup("00:1B:C5:00:10:01") == "MA-S Vendor"
+    assert index.lookup("00:1B:C5:00:20:01") == "MA-M Vendor"
+    assert index.lookup("00:1B:C5:F0:00:01") == "IEEE Registration Authority"
+    assert index.lookup("0000.0c12.3456") == "Cisco Systems, Inc"
+    assert index.lookup("00:00:0D:12:34:56", default="Unknown Vendor") == (
+        "Unknown Vendor"
+    )
+
+
+def test_bulk_lookup():
+    index = OuiIndex.from_mapping(MAC_VENDORS)
+    mac_ints = np.array([0x001BC5001001, 0x00000C123456, 0xFFFFFFFFFFFF], np.uint64)
+    assert list(index.lookup_many(mac_ints)) == [
+        "MA-S Vendor",
+        "Cisco Systems, Inc",
+        None,
+    ]
+    assert list(index.lookup_addresses(["00-00-0C-12-34-56", "", None])) == [
+        "Cisco Systems, Inc",
+        None,
+        None,
+    ]
+
+
+VENDOR_XML = """<?xml version="1.0" encoding="UTF-8"?>
+<MacAddressVendorMappings xmlns="http://www.cisco.com/server/spt">
+  <VendorMapping mac_prefix="00:00:0C" vendor_name="Cisco Systems, Inc"/>
+  <VendorMapping mac_prefix="00:1B:C5:0" vendor_name="{vendor}"/>
+</MacAddressVendorMappings>
+"""
+
+
+def test_cache_round_trip(tmp_path):
+    index = OuiIndex.from_mapping(MAC_VENDORS)
+    index.save(str(tmp_path / "vendors.oui"))
+    loaded = OuiIndex.load(str(tmp_path / "vendors.oui"))
+    assert isinstance(loaded.prefixes[24][0], np.memmap)
+    mac_ints = np.array([0x001BC5001001, 0x001BC5002001, 0x00000C123456], np.uint64)
+    assert list(loaded.lookup_many(mac_ints)) == list(index.lookup_many(mac_ints))
+
+
+def test_load_oui_index_rebuilds_only_on_change(tmp_path, mocker):
+    xml_path = tmp_path / "vendorMacs.xml"
+    ieee_path = tmp_path / "oui36.csv"
+    xml_path.write_text(VENDOR_XML.format(vendor="MA-M Vendor"))
+    ieee_path.write_text(
+        "Registry,Assignment,Organization Name,Organization Address\n"
+        "MA-S,001BC5001,MA-S Vendor,Somewhere\n"
+    )
+    sources = [str(xml_path), str(ieee_path), str(tmp_path / "missing.csv")]
+    build = mocker.spy(oui, "load_vendor_sources")
+    mocker.patch.object(oui, "DEFAULT_CACHE_DIR", str(tmp_path / "db"))
+
+    index = load_oui_index(sources)
+    assert os.path.exists(tmp_path / "db" / "vendorMacs.oui")
+    assert not os.path.exists(tmp_path / "vendorMacs.oui")
+    assert index.lookup("00:1B:C5:00:10:01") == "MA-S Vendor"
+    assert index.lookup("00:1B:C5:00:20:01") == "MA-M Vendor"
+    assert build.call_count == 1
+
+    load_oui_index(sources)
+    os.utime(xml_path, ns=(0, 0))
+    load_oui_index(sources)
+    assert build.call_count == 1
+
+    xml_path.write_text(VENDOR_XML.format(vendor="Renamed Vendor"))
+    index = load_oui_index(sources)
+    assert build.call_count == 2
+    assert index.lookup("00:1B:C5:00:20:01") == "Renamed Vendor"
@@ -0,0 +1,194 @@
+import asyncio
+from types import SimpleNamespace
+import dns.exception
+import dns.message
+import dns.name
+import dns.rdatatype
+import dns.resolver
+import dns.reversename
+import dns.rrset
+import dns.zone
+import pytest
+from src.modules.networking.reverse_dns import (
+    ReverseResolver,
+    find_reverse_zones,
+    load_zone,
+    negative_ttl,
+    reverse_zone_prefix,
+    save_zone,
+    transfer_zone,
+    zone_ptr_records,
+)
+
+
+class FakeResolver:
+    def __init__(self, nameserver, answers, stats):
+        self.nameserver = nameserver
+        self.answers = answers
+        self.stats = stats
+
+    async def resolve(self, reverse_name, rdtype, lifetime=None):
+        stats = self.stats
+        stats["in_flight"][self.nameserver] += 1
+        stats["peak"][self.nameserver] = max(
+            stats["peak"][self.nameserver], stats["in_flight"][self.nameserver]
+        )
+        stats["queries"].append((self.nameserver, reverse_name.to_text()))
+        try:
+            await asyncio.sleep(0.001)
+            answer = self.answers(self.nameserver, reverse_name.to_text())
+            if isinstance(answer, Exception):
+                raise answer
+            return SimpleNamespace(
+                rrset=dns.rrset.from_text(reverse_name, 300, "IN", "PTR", answer)
+            )
+        finally:
+            stats["in_flight"][self.nameserver] -= 1
+
+
+def make_resolver(answers, nameservers=("10.0.0.53", "10.0.1.53"), **kwargs):
+    stats = {
+        "in_flight": {server: 0 for server in nameservers},
+        "peak": {server: 0 for server in nameservers},
+        "queries": [],
+    }
+    resolver = ReverseResolver(list(nameservers), backoff=0, **kwargs)
+    resolver.make_resolver = lambda server: FakeResolver(server, answers, stats)
+    return resolver, stats
+
+
+def test_bounded_concurrency_and_batches():
+    resolver, stats = make_resolver(
+        lambda server, name: "host.example.com.",
+        concurrency={"10.0.0.53": 3, "10.0.1.53": 5},
+        batch_size=40,
+    )
+    batches = []
+    addresses = [f"192.168.{i // 256}.{i % 256}" for i in range(200)]
+    summary = resolver.resolve(iter(addresses), batches.append)
+
+    assert summary == {"resolved": 200, "nxdomain": 0, "failed": 0}
+    assert [len(batch) for batch in batches] == [40] * 5
+    assert stats["peak"] == {"10.0.0.53": 3, "10.0.1.53": 5}
+    result = batches[0][0]
+    assert result["hostnames"] == ["HOST.EXAMPLE.COM"]
+    assert result["ttl"] == 300
+
+
+def test_nxdomain_is_final_and_timeouts_fail_over():
+    def answers(server, name):
+        if name.startswith("1."):
+            return dns.resolver.NXDOMAIN()
+        if server == "10.0.0.53":
+            return dns.exception.Timeout()
+        return "printer.example.com."
+
+    resolver, stats = make_resolver(answers, retries=1)
+    results = []
+    summary = resolver.resolve(["10.0.0.2", "10.0.0.1"], results.extend)
+
+    assert summary == {"resolved": 1, "nxdomain": 1, "failed": 0}
+    queries = {}
+    for server, name in stats["queries"]:
+        queries.setdefault(name.split(".")[0], []).append(server)
+    assert queries == {"1": ["10.0.1.53"], "2": ["10.0.0.53", "10.0.1.53"]}
+
+
+def test_retries_exhausted():
+    resolver, stats = make_resolver(
+        lambda server, name: dns.exception.Timeout(), retries=2
+    )
+    results = []
+    summary = resolver.resolve(["10.0.0.1"], results.extend)
+    assert summary["failed"] == 1
+    assert len(stats["queries"]) == 3
+    assert results[0]["status"] == "failed" and results[0]["error"]
+
+
+def test_requires_nameserver():
+    with pytest.raises(ValueError):
+        ReverseResolver([])
+
+
+ZONE_TEXT = """$ORIGIN 1.10.in-addr.arpa.
+$TTL 3600
+@ IN SOA dc1.ad.contoso.com. hostmaster.ad.contoso.com. 5 900 600 86400 3600
+@ IN NS dc1.ad.contoso.com.
+5.0 IN PTR host5.ad.contoso.com.
+6.2 300 IN PTR printer.ad.contoso.com.
+"""
+
+
+def test_reverse_zone_prefix():
+    assert reverse_zone_prefix(dns.name.from_text("1.10.in-addr.arpa.")) == 16
+    assert reverse_zone_prefix(dns.name.from_text("3.1.10.in-addr.arpa.")) == 24
+    assert reverse_zone_prefix(dns.name.from_text("0/26.3.1.10.in-addr.arpa.")) is None
+    assert reverse_zone_prefix(dns.name.from_text("8.b.d.0.1.0.0.2.ip6.arpa."), 6) == 32
+
+
+def test_find_reverse_zones(mocker):
+    # 10.1.0.x is served by the /16 zone, every other 10.1.x.0/24 by a zone of its own.
+    def zone_for_name(name, resolver=None):
+        octets = name.to_text().split(".")
+        if octets[1] == "0":
+            return dns.name.from_text("1.10.in-addr.arpa.")
+        return dns.name.from_text(f"{octets[1]}.1.10.in-addr.arpa.")
+
+    mocker.patch("dns.resolver.zone_for_name", side_effect=zone_for_name)
+    zones = find_reverse_zones("10.1.0.0/22", resolver=None)
+    assert [(zone.to_text(), str(network)) for zone, network in zones] == [
+        ("1.10.in-addr.arpa.", "10.1.0.0/22")
+    ]
+    zones = find_reverse_zones("10.1.4.0/23", resolver=None)
+    assert [(zone.to_text(), str(network)) for zone, network in zones] == [
+        ("4.1.10.in-addr.arpa.", "10.1.4.0/24"),
+        ("5.1.10.in-addr.arpa.", "10.1.5.0/24"),
+    ]
+
+
+def test_transfer_zone_uses_ixfr_after_first_run(tmp_path, mocker):
+    origin = dns.name.from_text("1.10.in-addr.arpa.")
+    queries = []
+
+    def inbound_xfr(nameserver, zone, query=None, lifetime=None):
+        queries.append(query)
+        source = dns.zone.from_text(ZONE_TEXT, origin=origin, relativize=False)
+        with zone.writer(replacement=True) as txn:
+            for name, rdataset in source.iterate_rdatasets():
+                txn.add(name, rdataset)
+            if query.question[0].rdtype == dns.rdatatype.IXFR:
+                txn.delete(dns.name.from_text("5.0", origin))
+
+    mocker.patch("dns.query.inbound_xfr", side_effect=inbound_xfr)
+    zone_file = str(tmp_path / "zones" / "1.10.in-addr.arpa.zone")
+
+    zone = load_zone(origin, zone_file)
+    assert transfer_zone(zone, "10.0.0.53") is None
+    assert queries[-1].question[0].rdtype == dns.rdatatype.AXFR
+    assert list(zone_ptr_records(zone)) == [
+        ("10.1.0.5", "HOST5.AD.CONTOSO.COM", 3600),
+        ("10.1.2.6", "PRINTER.AD.CONTOSO.COM", 300),
+    ]
+    save_zone(zone, zone_file)
+
+    zone = load_zone(origin, zone_file)
+    assert transfer_zone(zone, "10.0.0.53") == 5
+    assert queries[-1].question[0].rdtype == dns.rdatatype.IXFR
+    assert [record[0] for record in zone_ptr_records(zone)] == ["10.1.2.6"]
+
+
+def test_negative_ttl():
+    name = dns.reversename.from_address("10.1.0.9")
+    response = dns.message.make_response(dns.message.make_query(name, "PTR"))
+    response.authority.append(
+        dns.rrset.from_text(
+            "1.10.in-addr.arpa.",
+            3600,
+            "IN",
+            "SOA",
+            "dc1.ad.contoso.com. hostmaster.ad.contoso.com. 5 900 600 86400 900",
+        )
+    )
+    error = dns.resolver.NXDOMAIN(qnames=[name], responses={name: response})
+    assert negative_ttl(error) == 900
+    assert negative_ttl(dns.resolver.NXDOMAIN(qnames=[name], responses={})) is None
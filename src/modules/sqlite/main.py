@@ -1,14 +1,322 @@
-import pandas as pd
 import sqlite3
 import os
+import hashlib
+import json
 import logging
+import re
+import time
+import threading
 import yaml
+from collections import namedtuple
+from contextlib import contextmanager
+from src.modules.networking.normalize import (
+    ip_in_cidr,
+    ip_to_int,
+    mac_norm,
+    mac_to_int,
+)
 from src.modules.yaml.YamlReader import YamlReader
 
 
 class SQLiteManager:
-    def __init__(self, database_path: str):
+    JOURNAL_MODES = ["DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"]
+    SYNCHRONOUS_MODES = ["OFF", "NORMAL", "FULL", "EXTRA"]
+    SCHEMA_META_TABLE = "schema_meta"
+    SCHEMA_FINGERPRINT_KEY = "__schema__"
+
+    def __init__(self, database_path: str, settings: dict = None):
+        """
+        Initialize the SQLiteManager.
+
+        Args:
+            database_path (str): Path to the SQLite database file.
+            settings (dict): Optional 'database.settings' section of the database YAML.
+                Supported keys are 'journaling_mode', 'synchronous', 'timeout' (ms),
+                'cache_size' and 'mmap_size'.
+        """
         self.database_path = database_path
+        self.settings = settings or {}
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self.oui_index = None
+
+    @classmethod
+    def from_yaml(cls, yaml_path: str) -> "SQLiteManager":
+        """
+        Create a SQLiteManager from the 'database.settings' section of a database YAML file.
+
+        Args:
+            yaml_path (str): Path to the YAML file containing the database settings.
+
+        Returns:
+            SQLiteManager: A manager configured with the file path and pragmas from the YAML.
+        """
+        settings = YamlReader(yaml_path).get_section("database.settings") or {}
+        return cls(database_path=settings.get("file"), settings=settings)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_connection(self) -> sqlite3.Connection:
+        """
+        Return the connection for the calling thread, opening and configuring it on first use.
+
+        Each thread gets its own connection, which is kept open for the life of the
+        manager (or until close() is called).
+
+        Returns:
+            sqlite3.Connection: The configured connection for the current thread.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            timeout_ms = self.settings.get("timeout", 5000)
+            conn = sqlite3.connect(
+                self.database_path,
+                timeout=timeout_ms / 1000,
+                check_same_thread=False,
+            )
+            self.apply_pragmas(conn)
+            self.register_functions(conn)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def apply_pragmas(self, conn: sqlite3.Connection) -> None:
+        """
+        Apply the pragmas from the database settings to a connection.
+
+        Args:
+            conn (sqlite3.Connection): The connection to configure.
+
+        Raises:
+            ValueError: If 'journaling_mode' or 'synchronous' is not a valid SQLite mode.
+        """
+        journal_mode = str(self.settings.get("journaling_mode", "WAL")).upper()
+        if journal_mode not in self.JOURNAL_MODES:
+            raise ValueError(f"Invalid journaling_mode: {journal_mode}")
+
+        synchronous = str(self.settings.get("synchronous", "NORMAL")).upper()
+        if synchronous not in self.SYNCHRONOUS_MODES:
+            raise ValueError(f"Invalid synchronous mode: {synchronous}")
+
+        busy_timeout = int(self.settings.get("timeout", 5000))
+        cache_size = int(self.settings.get("cache_size", -20000))
+        mmap_size = int(self.settings.get("mmap_size", 0))
+
+        conn.execute(f"PRAGMA journal_mode = {journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {synchronous}")
+        conn.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+        conn.execute(f"PRAGMA cache_size = {cache_size}")
+        conn.execute(f"PRAGMA mmap_size = {mmap_size}")
+
+    def register_functions(self, conn: sqlite3.Connection) -> None:
+        """
+        Register ONI's normalization functions as SQL functions.
+
+        - mac_norm(mac): the MAC address as AA:BB:CC:DD:EE:FF, or NULL
+        - mac_to_int(mac): the MAC address as a 48-bit integer, or NULL
+        - ip_to_int(ip): the IPv4 address (a /prefix is ignored) as an integer, or NULL
+        - ip_in_cidr(ip, cidr): 1 if the address is inside the network, 0 if not
+        - oui_vendor(mac): the vendor from the index set with set_oui_index(), or NULL
+
+        All but oui_vendor() are deterministic and can back expression indexes;
+        oui_vendor() depends on the index set at runtime, so SQLite must not cache it.
+
+        Args:
+            conn (sqlite3.Connection): The connection to register the functions on.
+        """
+        conn.create_function("mac_norm", 1, mac_norm, deterministic=True)
+        conn.create_function("mac_to_int", 1, mac_to_int, deterministic=True)
+        conn.create_function("ip_to_int", 1, ip_to_int, deterministic=True)
+        conn.create_function("ip_in_cidr", 2, ip_in_cidr, deterministic=True)
+        conn.create_function("oui_vendor", 1, self.oui_vendor)
+
+    def set_oui_index(self, oui_index) -> None:
+        """
+        Set the vendor index used by the oui_vendor() SQL function.
+
+        Args:
+            oui_index (OuiIndex): The index from src.modules.networking.oui.
+        """
+        self.oui_index = oui_index
+
+    def oui_vendor(self, physical_address):
+        if self.oui_index is None:
+            return None
+        return self.oui_index.lookup(physical_address)
+
+    def close(self) -> None:
+        """
+        Close every connection opened by this manager.
+        """
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logging.error(f"Failed to close database connection: {str(e)}")
+        self._local = threading.local()
+
+    def set_cancel_event(self, event: threading.Event = None) -> None:
+        """
+        Cancel the calling thread's database work once an event is set.
+
+        Long statements are interrupted by a progress handler, and nothing is committed
+        after the event is set: pending changes are rolled back and
+        sqlite3.OperationalError is raised instead.
+
+        Args:
+            event (threading.Event): The cancellation event, or None to clear it.
+        """
+        self._local.cancel_event = event
+        conn = self.get_connection()
+        if event is None:
+            conn.set_progress_handler(None, 0)
+        else:
+            conn.set_progress_handler(event.is_set, 1000)
+
+    def is_cancelled(self) -> bool:
+        event = getattr(self._local, "cancel_event", None)
+        return event is not None and event.is_set()
+
+    def release_connection(self) -> None:
+        """
+        Close the calling thread's connection, for worker threads that are about to exit.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        with self._connections_lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error as e:
+            logging.error(f"Failed to close database connection: {str(e)}")
+        self._local.conn = None
+        self._local.cancel_event = None
+
+    @contextmanager
+    def transaction(self, commit_every: int = None):
+        """
+        Run a block of work in a single transaction on the current thread's connection.
+
+        The outermost call issues BEGIN IMMEDIATE and commits on success or rolls back on
+        error. Taking the write lock up front means writers on other threads or processes
+        wait for it (up to the busy timeout) instead of failing with SQLITE_BUSY when a
+        read transaction is upgraded. Nested calls create a SAVEPOINT, so a failing stage
+        only undoes its own writes.
+        SQLiteManager write methods called inside the block do not commit on their own.
+        Once the thread's cancel event is set, no new transaction is started.
+
+        Args:
+            commit_every (int): Optional number of written rows after which the outermost
+                transaction is committed and a new one started. This bounds the size of very
+                large loads at the cost of the block no longer being atomic as a whole.
+
+        Yields:
+            sqlite3.Connection: The connection the transaction is running on.
+        """
+        conn = self.get_connection()
+        depth = getattr(self._local, "depth", 0)
+        savepoint = None
+        if depth == 0:
+            if self.is_cancelled():
+                raise sqlite3.OperationalError("interrupted")
+            if conn.in_transaction:
+                conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.commit_every = commit_every
+            self._local.pending_rows = 0
+        else:
+            savepoint = f"oni_savepoint_{depth}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+
+        self._local.depth = depth + 1
+        try:
+            yield conn
+        except BaseException:
+            if savepoint:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            else:
+                conn.rollback()
+            raise
+        else:
+            if savepoint:
+                conn.execute(f"RELEASE {savepoint}")
+            elif self.is_cancelled():
+                conn.rollback()
+                raise sqlite3.OperationalError("interrupted")
+            else:
+                conn.commit()
+        finally:
+            self._local.depth = depth
+
+        if depth == 1:
+            self.record_rows(0)
+
+    def unit_of_work(self, commit_every: int = None):
+        """
+        Alias of transaction() for wrapping a collector's write phase or an inventory pass.
+
+        The write lock is held for the whole block, so collectors should gather their
+        data first and only write inside it. 'commit_every' defaults to the
+        'commit_every' database setting.
+        """
+        if commit_every is None:
+            commit_every = self.settings.get("commit_every")
+        return self.transaction(commit_every=commit_every)
+
+    def in_transaction(self) -> bool:
+        """
+        Return True if the current thread is inside a transaction() block.
+        """
+        return getattr(self._local, "depth", 0) > 0
+
+    def record_rows(self, rows: int) -> None:
+        """
+        Count rows written in the current transaction and commit once 'commit_every' is reached.
+
+        Only the outermost transaction is committed early; rows written inside a savepoint
+        are checked once the savepoint is released.
+
+        Args:
+            rows (int): The number of rows just written.
+        """
+        if not self.in_transaction():
+            return
+        self._local.pending_rows += max(rows, 0)
+        commit_every = self._local.commit_every
+        if (
+            commit_every
+            and self._local.depth == 1
+            and self._local.pending_rows >= commit_every
+        ):
+            conn = self.get_connection()
+            if self.is_cancelled():
+                raise sqlite3.OperationalError("interrupted")
+            conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+            self._local.pending_rows = 0
+
+    def _commit(self, conn: sqlite3.Connection, rows: int = 0) -> None:
+        """
+        Commit the connection unless a transaction() block is managing it.
+        """
+        if self.in_transaction():
+            self.record_rows(rows)
+        elif self.is_cancelled():
+            conn.rollback()
+            raise sqlite3.OperationalError("interrupted")
+        else:
+            conn.commit()
 
     def build_batch_insert_command(
         self, table_name: str, data_list: list, conflict_resolution: str = "ignore"
@@ -50,6 +358,184 @@ class SQLiteManager:
 
         return sql_command, values
 
+    def build_upsert_command(
+        self,
+        table_name: str,
+        columns: list,
+        key_columns: list,
+        update_columns: list = None,
+        on_conflict_policy: str = "update",
+    ) -> str:
+        """
+        Build an SQL command to insert rows into a SQLite table, resolving conflicts on the key columns.
+
+        Args:
+            table_name (str): The name of the table.
+            columns (list): The columns to insert, in placeholder order.
+            key_columns (list): The columns of the UNIQUE constraint used as the conflict target.
+            update_columns (list): Columns to overwrite when a row already exists.
+                Defaults to every non-key column.
+            on_conflict_policy (str): Conflict resolution strategy, either "update" or "ignore".
+
+        Returns:
+            str: The SQL command.
+
+        Raises:
+            ValueError: If key_columns is empty or on_conflict_policy is not "update" or "ignore".
+        """
+        if not key_columns:
+            raise ValueError("key_columns must not be empty.")
+
+        if on_conflict_policy not in ["update", "ignore"]:
+            raise ValueError("on_conflict_policy must be either 'update' or 'ignore'.")
+
+        if update_columns is None:
+            update_columns = [col for col in columns if col not in key_columns]
+
+        placeholders = ", ".join("?" for _ in columns)
+        sql_command = (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({', '.join(key_columns)}) "
+        )
+        if on_conflict_policy == "update" and update_columns:
+            assignments = ", ".join(f"{col} = excluded.{col}" for col in update_columns)
+            sql_command += f"DO UPDATE SET {assignments}"
+        else:
+            sql_command += "DO NOTHING"
+        return sql_command
+
+    def bulk_upsert(
+        self,
+        table_name: str,
+        records: list,
+        key_columns: list,
+        update_columns: list = None,
+        on_conflict_policy: str = "update",
+    ) -> dict:
+        """
+        Insert or update a batch of records with a single executemany inside one transaction.
+
+        The key columns must match a UNIQUE constraint on the table. Columns missing from
+        a record are inserted as NULL.
+
+        Args:
+            table_name (str): The name of the table.
+            records (list): A list of dictionaries keyed by column name.
+            key_columns (list): The columns of the UNIQUE constraint used as the conflict target.
+            update_columns (list): Columns to overwrite when a row already exists.
+                Defaults to every non-key column.
+            on_conflict_policy (str): Conflict resolution strategy, either "update" or "ignore".
+
+        Returns:
+            dict: The number of rows 'inserted' and 'updated'.
+
+        Raises:
+            sqlite3.Error: If the batch fails; the transaction is rolled back.
+        """
+        counts = {"inserted": 0, "updated": 0}
+        if not records:
+            return counts
+
+        columns = list(dict.fromkeys(col for record in records for col in record))
+        command = self.build_upsert_command(
+            table_name, columns, key_columns, update_columns, on_conflict_policy
+        )
+        values = [tuple(record.get(col) for col in columns) for record in records]
+
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                # New rows get rowids above the current maximum, which lets us split
+                # the total change count into inserts and updates.
+                cursor.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table_name}")
+                max_rowid = cursor.fetchone()[0]
+                changes_before = conn.total_changes
+
+                cursor.executemany(command, values)
+
+                changes = conn.total_changes - changes_before
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM {table_name} WHERE rowid > ?", (max_rowid,)
+                )
+                counts["inserted"] = cursor.fetchone()[0]
+                counts["updated"] = changes - counts["inserted"]
+                self.record_rows(changes)
+        except sqlite3.Error as e:
+            logging.error(f"Failed to upsert into {table_name}: {str(e)}")
+            raise
+
+        return counts
+
+    def bulk_update_or_insert(
+        self,
+        table_name: str,
+        records: list,
+        key_columns: list,
+        update_columns: list,
+    ) -> dict:
+        """
+        Update the rows matching each record's key columns, and insert the records that
+        match no row, with two executemany statements inside one transaction.
+
+        Unlike bulk_upsert(), the key columns need no UNIQUE constraint: every row with
+        the same key values is updated. Records with a NULL key column never match a row
+        and are always inserted, so callers should only pass records with a key.
+
+        Args:
+            table_name (str): The name of the table.
+            records (list): A list of dictionaries keyed by column name.
+            key_columns (list): The columns a record is looked up by.
+            update_columns (list): Columns to overwrite on the matching rows.
+
+        Returns:
+            dict: The number of rows 'inserted' and 'updated'.
+
+        Raises:
+            ValueError: If key_columns or update_columns is empty.
+            sqlite3.Error: If the batch fails; the transaction is rolled back.
+        """
+        if not key_columns or not update_columns:
+            raise ValueError("key_columns and update_columns must not be empty.")
+        counts = {"inserted": 0, "updated": 0}
+        if not records:
+            return counts
+
+        columns = list(dict.fromkeys(col for record in records for col in record))
+        match = " AND ".join(f"{col} = ?" for col in key_columns)
+        assignments = ", ".join(f"{col} = ?" for col in update_columns)
+        update_command = f"UPDATE {table_name} SET {assignments} WHERE {match}"
+        insert_command = (
+            f"INSERT INTO {table_name} ({', '.join(columns)}) "
+            f"SELECT {', '.join('?' for _ in columns)} "
+            f"WHERE NOT EXISTS (SELECT 1 FROM {table_name} WHERE {match})"
+        )
+        keys = [tuple(record.get(col) for col in key_columns) for record in records]
+        update_values = [
+            tuple(record.get(col) for col in update_columns) + key
+            for record, key in zip(records, keys)
+        ]
+        insert_values = [
+            tuple(record.get(col) for col in columns) + key
+            for record, key in zip(records, keys)
+        ]
+
+        try:
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                changes_before = conn.total_changes
+                cursor.executemany(update_command, update_values)
+                counts["updated"] = conn.total_changes - changes_before
+                cursor.executemany(insert_command, insert_values)
+                counts["inserted"] = (
+                    conn.total_changes - changes_before - counts["updated"]
+                )
+                self.record_rows(counts["inserted"] + counts["updated"])
+        except sqlite3.Error as e:
+            logging.error(f"Failed to upsert into {table_name}: {str(e)}")
+            raise
+
+        return counts
+
     def build_insert_command(self, table_name: str, data: dict) -> str:
         """
         Build an SQL query to insert a dictionary of data into a SQLite table.
@@ -87,8 +573,7 @@ class SQLiteManager:
             return
 
         try:
-            conn = sqlite3.connect(self.database_path)
-            conn.close()
+            self.get_connection()
             logging.info(f"Created new database at {self.database_path}")
         except sqlite3.Error as e:
             logging.error(
@@ -116,9 +601,7 @@ class SQLiteManager:
         Raises:
             None
         """
-        # Connect to the database (or create it if it doesn't exist)
-        conn = sqlite3.connect(self.database_path)
-        # Create a cursor object to execute SQL statements
+        conn = self.get_connection()
         cursor = conn.cursor()
 
         # Create the table if it doesn't already exist
@@ -146,35 +629,235 @@ class SQLiteManager:
             )
         """
         cursor.execute(create_table_query)
+        self._commit(conn)
 
-        # Commit the changes and close the connection
-        conn.commit()
-        conn.close()
-
-    def create_tables_from_yaml(self, yaml_path: str):
+    def create_tables_from_yaml(self, yaml_path: str, force: bool = False):
         """
         Create tables in the SQLite database based on the YAML schema definitions.
 
+        A fingerprint of each resolved table definition is stored in the 'schema_meta'
+        table. When the whole schema is unchanged and every table exists, the DDL pass is
+        skipped; otherwise only new or changed tables are created or migrated, in one
+        transaction.
+
         Args:
             yaml_path (str): Path to the YAML file containing the schema definitions
+            force (bool): Create and migrate every table even if the fingerprints match.
         """
         yaml_reader = YamlReader(yaml_path)
         tables = yaml_reader.get_value("database.tables")
 
-        for table in tables:
-            table_name = table["name"]
-            schema = table["schema"]
+        schema_fingerprint = self.schema_fingerprint(tables)
+        stored_fingerprints = self.get_schema_fingerprints()
+        existing_tables = self.get_table_names()
+
+        if (
+            not force
+            and stored_fingerprints.get(self.SCHEMA_FINGERPRINT_KEY)
+            == schema_fingerprint
+            and all(table["name"] in existing_tables for table in tables)
+        ):
+            logging.info("Database schema unchanged, skipping table creation")
+            return
+
+        with self.transaction() as conn:
+            for table in tables:
+                table_name = table["name"]
+                schema = table["schema"]
+                table_fingerprint = self.schema_fingerprint(table)
+
+                if (
+                    not force
+                    and stored_fingerprints.get(table_name) == table_fingerprint
+                    and table_name in existing_tables
+                ):
+                    continue
+
+                schema_columns = schema["columns"]
+                unique_constraints = schema.get("unique_constraints", [])
+
+                column_definitions = [
+                    {"column": col["name"], "data_type": col["type"]}
+                    for col in schema_columns
+                ]
+
+                logging.info(f"Applying schema for table {table_name}")
+                self.create_table(table_name, column_definitions, unique_constraints)
+                self.update_table_schema(table_name, column_definitions)
+                self.sync_indexes(table_name, schema.get("indexes", []))
+                self.set_schema_fingerprint(conn, table_name, table_fingerprint)
+
+            self.set_schema_fingerprint(
+                conn, self.SCHEMA_FINGERPRINT_KEY, schema_fingerprint
+            )
 
-            schema_columns = schema["columns"]
-            unique_constraints = schema.get("unique_constraints", [])
+    @staticmethod
+    def schema_fingerprint(definition) -> str:
+        """
+        Return a stable SHA-256 hash of a resolved schema definition.
+
+        Args:
+            definition: The schema definition (any JSON-serialisable structure).
+
+        Returns:
+            str: The hex digest of the definition.
+        """
+        serialized = json.dumps(definition, sort_keys=True, default=str)
+        return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+    def get_schema_fingerprints(self) -> dict:
+        """
+        Return the stored schema fingerprints, creating the 'schema_meta' table if needed.
 
-            column_definitions = [
-                {"column": col["name"], "data_type": col["type"]}
-                for col in schema_columns
-            ]
+        Returns:
+            dict: A mapping of table name (or the whole-schema key) to its fingerprint.
+        """
+        conn = self.get_connection()
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.SCHEMA_META_TABLE} (
+                name TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                updated_at INTEGER
+            )
+            """
+        )
+        self._commit(conn)
+        cursor = conn.execute(f"SELECT name, fingerprint FROM {self.SCHEMA_META_TABLE}")
+        return dict(cursor.fetchall())
+
+    def set_schema_fingerprint(
+        self, conn: sqlite3.Connection, name: str, fingerprint: str
+    ) -> None:
+        """
+        Store the fingerprint for a table (or the whole schema) in 'schema_meta'.
+        """
+        conn.execute(
+            f"""
+            INSERT INTO {self.SCHEMA_META_TABLE} (name, fingerprint, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                fingerprint = excluded.fingerprint, updated_at = excluded.updated_at
+            """,
+            (name, fingerprint, int(time.time())),
+        )
+
+    def get_table_names(self) -> set:
+        """
+        Return the names of the tables in the database.
+        """
+        cursor = self.get_connection().execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+        return {row[0] for row in cursor.fetchall()}
+
+    def build_index_command(
+        self, table_name: str, index: dict, index_prefix: str = None
+    ) -> tuple:
+        """
+        Build the CREATE INDEX command for an index declared in the YAML schema.
 
-            self.create_table(table_name, column_definitions, unique_constraints)
-            self.update_table_schema(table_name, column_definitions)
+        Index names are prefixed with 'idx_<table>_' so the same schema anchor can be
+        shared by several tables, and so managed indexes can be told apart from others.
+
+        Args:
+            table_name (str): The name of the table.
+            index (dict): The index definition. 'columns' is a list of column names or
+                expressions (e.g. "upper(physical_address)"); 'name', 'unique' and a
+                partial index 'where' clause are optional.
+            index_prefix (str): Optional prefix of the index name instead of 'idx_<table>_'.
+
+        Returns:
+            tuple: The index name and the SQL command.
+
+        Raises:
+            ValueError: If the index does not declare any columns.
+        """
+        columns = index.get("columns") or []
+        if not columns:
+            raise ValueError(f"Index on {table_name} must declare at least one column.")
+
+        suffix = index.get("name") or "_".join(columns)
+        suffix = re.sub(r"\W+", "_", suffix.lower()).strip("_")
+        index_name = f"{index_prefix or f'idx_{table_name}_'}{suffix}"
+
+        unique = "UNIQUE " if index.get("unique") else ""
+        sql_command = (
+            f"CREATE {unique}INDEX {index_name} ON {table_name} ({', '.join(columns)})"
+        )
+        if index.get("where"):
+            sql_command += f" WHERE {index['where']}"
+        return index_name, sql_command
+
+    def get_indexes(self, table_name: str) -> dict:
+        """
+        Return the explicitly created indexes on a table, including TEMP tables.
+
+        Args:
+            table_name (str): The name of the table.
+
+        Returns:
+            dict: A mapping of index name to its CREATE INDEX statement.
+        """
+        cursor = self.get_connection().cursor()
+        cursor.execute(
+            """
+            SELECT name, sql FROM sqlite_master
+            WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+            UNION ALL
+            SELECT name, sql FROM sqlite_temp_master
+            WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+            """,
+            (table_name, table_name),
+        )
+        return dict(cursor.fetchall())
+
+    def sync_indexes(
+        self, table_name: str, indexes: list, index_prefix: str = None
+    ) -> dict:
+        """
+        Create, recreate and drop managed indexes so the table matches its YAML definition.
+
+        Indexes whose definition changed are dropped and recreated, and managed indexes
+        ('idx_<table>_*') that are no longer declared are dropped. Running it again with
+        the same definitions does nothing.
+
+        Args:
+            table_name (str): The name of the table.
+            indexes (list): The index definitions from the schema's 'indexes' list.
+            index_prefix (str): Optional prefix of the managed index names instead of
+                'idx_<table>_'.
+
+        Returns:
+            dict: The index names that were 'created' and 'dropped'.
+        """
+        changes = {"created": [], "dropped": []}
+        index_prefix = index_prefix or f"idx_{table_name}_"
+        desired = dict(
+            self.build_index_command(table_name, index, index_prefix)
+            for index in indexes
+        )
+        existing = {
+            name: sql
+            for name, sql in self.get_indexes(table_name).items()
+            if name.startswith(index_prefix)
+        }
+
+        with self.transaction() as conn:
+            for index_name, sql in existing.items():
+                if desired.get(index_name) != sql:
+                    conn.execute(f"DROP INDEX IF EXISTS {index_name}")
+                    changes["dropped"].append(index_name)
+
+            for index_name, sql in desired.items():
+                if existing.get(index_name) != sql:
+                    conn.execute(sql)
+                    changes["created"].append(index_name)
+
+        for index_name in changes["created"]:
+            logging.info(f"Created index {index_name}")
+        for index_name in changes["dropped"]:
+            logging.info(f"Dropped index {index_name}")
+        return changes
 
     def execute_batch_insert(self, command: str, values: list):
         """
@@ -190,24 +873,20 @@ class SQLiteManager:
         Raises:
             None
         """
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
         try:
-            cursor.executemany(command, values)
-            conn.commit()
+            with self.transaction() as conn:
+                cursor = conn.cursor()
+                cursor.executemany(command, values)
+                self.record_rows(cursor.rowcount)
         except sqlite3.Error as e:
             logging.error(f"Failed to execute batch insert: {str(e)}")
-        finally:
-            conn.close()
 
     def execute_sqlite_command(self, command: str, values: tuple, params=None) -> list:
         """
         Legacy method to execute a given SQL command with optional parameters and return the results.
         Should be replaced with execute_sqlite_query. (Dataframe)
         """
-        # Connect to the database (or create it if it doesn't exist)
-        conn = sqlite3.connect(self.database_path)
-        # Create a cursor object to execute SQL statements
+        conn = self.get_connection()
         cursor = conn.cursor()
         # Execute the command with optional parameters
         if params:
@@ -216,9 +895,8 @@ class SQLiteManager:
             cursor.execute(command, values)
         # Fetch the results if any
         results = cursor.fetchall()
-        # Commit the changes and close the connection
-        conn.commit()
-        conn.close()
+        # Commit the changes
+        self._commit(conn, rows=cursor.rowcount)
         # Return the results
         return results
 
@@ -233,13 +911,70 @@ class SQLiteManager:
         Returns:
             DataFrame: A pandas DataFrame containing the rows returned by the query.
         """
-        conn = sqlite3.connect(self.database_path)
-        df = pd.read_sql_query(query, conn, params=params)
-        conn.close()
-        return df
+        conn = self.get_connection()
+        import pandas as pd  # deferred: collectors that never build frames skip pandas
+
+        return pd.read_sql_query(query, conn, params=params)
+
+    def iter_query(
+        self,
+        query: str,
+        params: tuple = (),
+        chunk_size: int = 1000,
+        named: bool = False,
+    ):
+        """
+        Execute a given SQL query and lazily yield its rows, fetching chunk_size rows at a time.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (tuple): Optional parameters to include in the query.
+            chunk_size (int): The number of rows fetched from SQLite per round trip.
+            named (bool): Yield namedtuples with one attribute per column instead of plain tuples.
+
+        Yields:
+            tuple: One row of the result set.
+        """
+        cursor = self.get_connection().cursor()
+        try:
+            cursor.execute(query, params or ())
+            row_type = None
+            if named:
+                row_type = namedtuple(
+                    "Row", [column[0] for column in cursor.description], rename=True
+                )
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield row_type._make(row) if row_type else row
+        finally:
+            cursor.close()
+
+    def iter_query_frames(
+        self, query: str, params: tuple = (), chunk_size: int = 10000
+    ):
+        """
+        Execute a given SQL query and lazily yield the results as DataFrames of chunk_size rows.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (tuple): Optional parameters to include in the query.
+            chunk_size (int): The maximum number of rows in each DataFrame.
+
+        Yields:
+            DataFrame: A pandas DataFrame holding the next chunk of rows.
+        """
+        conn = self.get_connection()
+        import pandas as pd
+
+        yield from pd.read_sql_query(
+            query, conn, params=params or (), chunksize=chunk_size
+        )
 
     def update_table_schema(self, table_name: str, columns: list):
-        conn = sqlite3.connect(self.database_path)
+        conn = self.get_connection()
         cursor = conn.cursor()
 
         cursor.execute(f"PRAGMA table_info({table_name})")
@@ -257,8 +992,7 @@ class SQLiteManager:
                     f"Column {column_name} type mismatch: {existing_columns[column_name]} vs {data_type}"
                 )
 
-        conn.commit()
-        conn.close()
+        self._commit(conn)
 
 
 def main():
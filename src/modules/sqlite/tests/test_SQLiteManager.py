@@ -0,0 +1,286 @@
+import sqlite3
+import threading
+import pytest
+from src.modules.networking.oui import OuiIndex
+from src.modules.sqlite.main import SQLiteManager
+
+
+@pytest.fixture
+def db(tmp_path):
+    settings = {
+        "journaling_mode": "WAL",
+        "synchronous": "NORMAL",
+        "timeout": 2500,
+        "cache_size": -4000,
+        "mmap_size": 1048576,
+    }
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"), settings=settings)
+    yield manager
+    manager.close()
+
+
+def test_pragmas_applied(db):
+    conn = db.get_connection()
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+    assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 2500
+    assert conn.execute("PRAGMA cache_size").fetchone()[0] == -4000
+
+
+def test_connection_reused(db):
+    assert db.get_connection() is db.get_connection()
+
+
+def test_connection_per_thread(db):
+    connections = []
+    thread = threading.Thread(target=lambda: connections.append(db.get_connection()))
+    thread.start()
+    thread.join()
+    assert connections[0] is not db.get_connection()
+
+
+def test_invalid_journaling_mode(tmp_path):
+    db = SQLiteManager(
+        database_path=str(tmp_path / "oni.db"), settings={"journaling_mode": "BOGUS"}
+    )
+    with pytest.raises(ValueError):
+        db.get_connection()
+
+
+def test_close_reopens(db):
+    conn = db.get_connection()
+    db.close()
+    assert db.get_connection() is not conn
+
+
+def test_create_table_and_query(db):
+    db.create_table(
+        "source_test",
+        [{"column": "ipv4", "data_type": "TEXT"}],
+        unique_constraints=[{"columns": ["ipv4"]}],
+    )
+    command, values = db.build_batch_insert_command(
+        "source_test", [{"ipv4": "10.0.0.1"}, {"ipv4": "10.0.0.2"}]
+    )
+    db.execute_batch_insert(command, values)
+    df = db.execute_sqlite_query("SELECT ipv4 FROM source_test ORDER BY ipv4")
+    assert list(df["ipv4"]) == ["10.0.0.1", "10.0.0.2"]
+
+
+def test_bulk_upsert_counts(db):
+    db.create_table(
+        "source_test",
+        [
+            {"column": "ipv4", "data_type": "TEXT"},
+            {"column": "physical_address", "data_type": "TEXT"},
+            {"column": "first_seen", "data_type": "INTEGER"},
+            {"column": "last_seen", "data_type": "INTEGER"},
+        ],
+        unique_constraints=[{"columns": ["physical_address", "ipv4"]}],
+    )
+    records = [
+        {"ipv4": "10.0.0.1", "physical_address": "AA", "first_seen": 1, "last_seen": 1},
+        {"ipv4": "10.0.0.2", "physical_address": "BB", "first_seen": 1, "last_seen": 1},
+    ]
+    keys = ["physical_address", "ipv4"]
+    assert db.bulk_upsert("source_test", records, keys, ["last_seen"]) == {
+        "inserted": 2,
+        "updated": 0,
+    }
+
+    records = [
+        {"ipv4": "10.0.0.1", "physical_address": "AA", "first_seen": 5, "last_seen": 5},
+        {"ipv4": "10.0.0.3", "physical_address": "CC", "first_seen": 5, "last_seen": 5},
+    ]
+    assert db.bulk_upsert("source_test", records, keys, ["last_seen"]) == {
+        "inserted": 1,
+        "updated": 1,
+    }
+    row = db.execute_sqlite_command(
+        "SELECT first_seen, last_seen FROM source_test WHERE physical_address = ?",
+        ("AA",),
+    )
+    assert row == [(1, 5)]
+
+
+def test_bulk_update_or_insert(db):
+    db.create_table(
+        "source_test",
+        [
+            {"column": "ipv4", "data_type": "TEXT"},
+            {"column": "physical_address", "data_type": "TEXT"},
+            {"column": "last_seen", "data_type": "INTEGER"},
+        ],
+        unique_constraints=[{"columns": ["physical_address", "ipv4"]}],
+    )
+    records = [
+        {"ipv4": "10.0.0.1", "physical_address": "AA", "last_seen": 1},
+        {"ipv4": None, "physical_address": "BB", "last_seen": 1},
+    ]
+    keys = ["physical_address"]
+    assert db.bulk_update_or_insert("source_test", records, keys, ["last_seen"]) == {
+        "inserted": 2,
+        "updated": 0,
+    }
+
+    # AA moved to another IP address: its row is updated, not duplicated.
+    records = [
+        {"ipv4": "10.0.0.9", "physical_address": "AA", "last_seen": 5},
+        {"ipv4": None, "physical_address": "BB", "last_seen": 5},
+    ]
+    assert db.bulk_update_or_insert("source_test", records, keys, ["last_seen"]) == {
+        "inserted": 0,
+        "updated": 2,
+    }
+    assert db.execute_sqlite_command(
+        "SELECT ipv4, physical_address, last_seen FROM source_test ORDER BY physical_address",
+        (),
+    ) == [("10.0.0.1", "AA", 5), (None, "BB", 5)]
+
+
+def test_bulk_upsert_invalid_policy(db):
+    with pytest.raises(ValueError):
+        db.bulk_upsert("source_test", [{"ipv4": "x"}], ["ipv4"], None, "replace")
+
+
+def create_source_test(db):
+    db.create_table(
+        "source_test",
+        [{"column": "ipv4", "data_type": "TEXT"}],
+        unique_constraints=[{"columns": ["ipv4"]}],
+    )
+
+
+def count_rows(db):
+    return db.execute_sqlite_command("SELECT COUNT(*) FROM source_test", ())[0][0]
+
+
+def test_transaction_rollback(db):
+    create_source_test(db)
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.bulk_upsert("source_test", [{"ipv4": "10.0.0.1"}], ["ipv4"])
+            raise RuntimeError("collector failed")
+    assert count_rows(db) == 0
+
+
+def test_transaction_savepoint(db):
+    create_source_test(db)
+    with db.unit_of_work():
+        db.bulk_upsert("source_test", [{"ipv4": "10.0.0.1"}], ["ipv4"])
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                db.bulk_upsert("source_test", [{"ipv4": "10.0.0.2"}], ["ipv4"])
+                raise RuntimeError("stage failed")
+    assert count_rows(db) == 1
+
+
+def test_transaction_commit_every(db):
+    create_source_test(db)
+    with pytest.raises(RuntimeError):
+        with db.transaction(commit_every=2):
+            db.bulk_upsert(
+                "source_test", [{"ipv4": "10.0.0.1"}, {"ipv4": "10.0.0.2"}], ["ipv4"]
+            )
+            db.bulk_upsert("source_test", [{"ipv4": "10.0.0.3"}], ["ipv4"])
+            raise RuntimeError("load failed")
+    assert count_rows(db) == 2
+
+
+def test_sync_indexes_idempotent(db):
+    create_source_test(db)
+    indexes = [
+        {"columns": ["ipv4"]},
+        {"name": "ipv4_upper", "columns": ["upper(ipv4)"], "where": "ipv4 != ''"},
+    ]
+    changes = db.sync_indexes("source_test", indexes)
+    assert sorted(changes["created"]) == [
+        "idx_source_test_ipv4",
+        "idx_source_test_ipv4_upper",
+    ]
+    assert db.sync_indexes("source_test", indexes) == {"created": [], "dropped": []}
+
+    changes = db.sync_indexes("source_test", indexes[:1])
+    assert changes == {"created": [], "dropped": ["idx_source_test_ipv4_upper"]}
+    assert list(db.get_indexes("source_test")) == ["idx_source_test_ipv4"]
+
+
+def test_iter_query(db):
+    create_source_test(db)
+    records = [{"ipv4": f"10.0.0.{i}"} for i in range(5)]
+    db.bulk_upsert("source_test", records, ["ipv4"])
+
+    rows = db.iter_query("SELECT ipv4 FROM source_test ORDER BY id", chunk_size=2)
+    assert next(rows) == ("10.0.0.0",)
+    named = list(db.iter_query("SELECT id, ipv4 FROM source_test", named=True))
+    assert [row.ipv4 for row in named] == [r["ipv4"] for r in records]
+
+
+def test_iter_query_frames(db):
+    create_source_test(db)
+    records = [{"ipv4": f"10.0.0.{i}"} for i in range(5)]
+    db.bulk_upsert("source_test", records, ["ipv4"])
+
+    frames = list(db.iter_query_frames("SELECT ipv4 FROM source_test", chunk_size=2))
+    assert [len(frame) for frame in frames] == [2, 2, 1]
+
+
+SCHEMA_YAML = """
+database:
+  tables:
+    - name: source_a
+      schema:
+        columns:
+          - name: ipv4
+            type: TEXT
+    - name: source_b
+      schema:
+        columns:
+          - name: ipv4
+            type: TEXT
+"""
+
+
+def test_create_tables_from_yaml_fingerprint(db, tmp_path, mocker):
+    yaml_path = tmp_path / "schema.yaml"
+    yaml_path.write_text(SCHEMA_YAML)
+    db.create_tables_from_yaml(str(yaml_path))
+    assert {"source_a", "source_b", "schema_meta"} <= db.get_table_names()
+
+    create_table = mocker.spy(db, "create_table")
+    db.create_tables_from_yaml(str(yaml_path))
+    create_table.assert_not_called()
+
+    yaml_path.write_text(
+        SCHEMA_YAML + "          - name: hostname\n            type: TEXT\n"
+    )
+    db.create_tables_from_yaml(str(yaml_path))
+    assert [call.args[0] for call in create_table.call_args_list] == ["source_b"]
+    columns = db.execute_sqlite_command("PRAGMA table_info(source_b)", ())
+    assert [column[1] for column in columns] == ["id", "ipv4", "hostname"]
+
+
+def test_sql_functions(db):
+    conn = db.get_connection()
+    assert conn.execute(
+        "SELECT mac_norm('0000.0c12.3456'), mac_to_int('00-00-0C-12-34-56'), mac_norm('bogus')"
+    ).fetchone() == ("00:00:0C:12:34:56", 0x00000C123456, None)
+    assert conn.execute(
+        "SELECT ip_to_int('10.0.0.1/32'), ip_in_cidr('10.0.0.1', '10.0.0.0/24'), ip_in_cidr('10.0.1.1', '10.0.0.0/24')"
+    ).fetchone() == (0x0A000001, 1, 0)
+    assert conn.execute("SELECT oui_vendor('00:00:0C:12:34:56')").fetchone() == (None,)
+
+    db.set_oui_index(OuiIndex.from_mapping({"00:00:0C": "Cisco Systems, Inc"}))
+    assert conn.execute("SELECT oui_vendor('00:00:0C:12:34:56')").fetchone() == (
+        "Cisco Systems, Inc",
+    )
+
+    create_source_test(db)
+    conn.execute(
+        "CREATE INDEX idx_source_test_ipv4_int ON source_test (ip_to_int(ipv4))"
+    )
+    # The vendor index can change at runtime, so oui_vendor() cannot back an index.
+    with pytest.raises(sqlite3.OperationalError):
+        conn.execute(
+            "CREATE INDEX idx_source_test_vendor ON source_test (oui_vendor(ipv4))"
+        )
@@ -1,22 +1,42 @@
-from src.observius_network_inventory.collectors.dns_ad.main import DNSCollector
-from src.observius_network_inventory.collectors.opennms.import_opennms_devices import (
-    OpenNMSCollector,
-)
-from src.observius_network_inventory.collectors.snmp.main import snmp_collection
-from src.observius_network_inventory.collectors.unifi_controller_api.main import (
-    unifi_collection,
-)
-from src.observius_network_inventory.collectors.unifi_network_api.UnifiNetworkAPICollector import (
-    UniFiNetworkAPICollector,
+from src.observius_network_inventory.collector_manager.CollectorRun import (
+    CollectorRun,
 )
 from src.modules.yaml.YamlReader import YamlReader
 from src.modules.sqlite.main import SQLiteManager
 from src.modules.common.LoggerSetup import LoggerSetup
+from importlib import import_module, metadata
+import threading
 
 
 class CollectorManager:
     """A class to manage and run various network inventory collectors."""
 
+    # Collectors are imported and constructed only when they are about to run.
+    # "module:Class.method" targets are constructed with (db, logger) and the method is
+    # called; "module:function" targets are called with oni_db. A collector's config may
+    # point elsewhere with an "entry_point" key, and installed packages can add
+    # collectors through the "oni.collectors" entry point group.
+    COLLECTORS = {
+        "dns_ad": "src.observius_network_inventory.collectors.dns_ad.main:DNSCollector.dns_collection",
+        "snmp": "src.observius_network_inventory.collectors.snmp.main:snmp_collection",
+        "opennms": "src.observius_network_inventory.collectors.opennms.import_opennms_devices:OpenNMSCollector.collect_data",
+        "unifi_controller_api": "src.observius_network_inventory.collectors.unifi_controller_api.main:unifi_collection",
+        "unifi_network_api": "src.observius_network_inventory.collectors.unifi_network_api.UnifiNetworkAPICollector:UniFiNetworkAPICollector.collect_data",
+    }
+    ENTRY_POINT_GROUP = "oni.collectors"
+    PLACEHOLDERS = [
+        "arp",
+        "dhcp_logs",
+        "esxi",
+        "fs_network",
+        "hyperv",
+        "kvm",
+        "nmap",
+        "proxmox",
+        "vcenter",
+        "xcpng",
+    ]
+
     def __init__(self, db: SQLiteManager, logger: LoggerSetup):
         """Initialize the CollectorManager with the database manager and logger.
         :param db: An instance of SQLiteManager to manage database operations.
@@ -25,8 +45,11 @@ class CollectorManager:
         self.config_path = "resources/etc/oni/oni.yaml"
         self.oni_config = YamlReader(self.config_path)
         self.collectors = self.load_config()
+        self.settings = self.oni_config.get_section("oni.collector_manager") or {}
         self.logger = logger
         self.db = db
+        # Collectors constructed so far, reused by later runs of the same manager.
+        self.loaded_collectors = {}
 
     def load_config(self):
         """Load the collector configurations from the YAML file.
@@ -35,44 +58,91 @@ class CollectorManager:
         return self.oni_config.get_section("oni.collectors") or {}
 
     def run_collectors(self):
-        """Run all enabled collectors as specified in the configuration."""
-        for collector_name, config in self.collectors.items():
-            if config.get("enabled", False):
-                self.run_collector(collector_name)
+        """Run all enabled collectors as specified in the configuration.
+
+        With 'max_workers' above 1 the collectors run concurrently on daemon threads,
+        so the total run time is that of the slowest collector. Each run is cancelled
+        after its 'timeout' (seconds, per collector or from 'oni.collector_manager').
+        :return: A list of result summaries (collector, status, rows, duration, error).
+        """
+        slots = threading.BoundedSemaphore(self.max_workers)
+        runs = [
+            self.create_run(collector_name, slots)
+            for collector_name in self.enabled_collectors()
+        ]
+        for run in runs:
+            run.start()
+
+        results = []
+        for run in runs:
+            results.append(self.log_result(run.wait()))
+        return results
+
+    @property
+    def max_workers(self):
+        return max(int(self.settings.get("max_workers", 1)), 1)
+
+    def enabled_collectors(self):
+        """Get the names of the collectors enabled in the configuration."""
+        return [
+            collector_name
+            for collector_name, config in self.collectors.items()
+            if config.get("enabled", False)
+        ]
+
+    def create_run(self, collector_name, slots=None, keep_connection=False):
+        """Prepare a CollectorRun for a collector; call start() on it to run it.
+        :param collector_name: The name of the collector.
+        :param slots: Optional semaphore shared by runs that may not all execute at once.
+        :param keep_connection: Keep the database connection of the thread that runs
+            it open afterwards.
+        """
+        return CollectorRun(
+            name=collector_name,
+            collector_func=lambda: self.run_collector(collector_name),
+            db=self.db,
+            timeout=self.get_timeout(collector_name),
+            slots=slots,
+            keep_connection=keep_connection,
+        )
+
+    def log_result(self, result):
+        """Log the result summary of a collector run.
+        :return: The result summary.
+        """
+        if result["status"] == "ok":
+            self.logger.info(
+                f"Collector {result['collector']} finished: {result['rows']} rows in {result['duration']}s"
+            )
+        else:
+            self.logger.error(
+                f"Collector {result['collector']} {result['status']}: {result['error']}"
+            )
+        return result
+
+    def get_timeout(self, collector_name):
+        """Get the wall-clock timeout of a collector in seconds, or None for no limit.
+        :param collector_name: The name of the collector.
+        """
+        timeout = self.collectors.get(collector_name, {}).get(
+            "timeout", self.settings.get("timeout")
+        )
+        return timeout or None
 
     def run_collector(self, collector_name):
         """Run a specific collector based on its name.
+
+        No transaction is held around the whole pass: collectors query the network
+        first and store their results in a unit of work of their own, so the write lock
+        is never held across network I/O.
         :param collector_name: The name of the collector to run.
         """
-        collectors_map = {
-            "dns_ad": DNSCollector(db=self.db, logger=self.logger).dns_collection,
-            "snmp": lambda: snmp_collection(oni_db=self.db),
-            "opennms": OpenNMSCollector(db=self.db, logger=self.logger).collect_data,
-            "unifi_controller_api": lambda: unifi_collection(oni_db=self.db),
-            "unifi_network_api": UniFiNetworkAPICollector(
-                db=self.db, logger=self.logger
-            ).collect_data,
-        }
-
-        placeholders = [
-            "arp",
-            "dhcp_logs",
-            "esxi",
-            "fs_network",
-            "hyperv",
-            "kvm",
-            "nmap",
-            "proxmox",
-            "vcenter",
-            "xcpng",
-        ]
-
         try:
             self.logger.info(f"Running collector: {collector_name}")
-            collector_func = collectors_map.get(collector_name)
+            collector_func = self.load_collector(collector_name)
             if collector_func:
                 collector_func()
-            elif collector_name in placeholders:
+            elif collector_name in self.PLACEHOLDERS:
                 self.logger.info(f"Running collector: {collector_name}")
                 print(f"Collector {collector_name} is not implemented.")
                 pass
@@ -80,6 +150,44 @@ class CollectorManager:
                 self.logger.info(f"Collector {collector_name} is not implemented.")
         except Exception as e:
             self.logger.error(f"Error running collector {collector_name}: {e}")
+            raise
+
+    def get_entry_point(self, collector_name):
+        """Find the import string of a collector without importing anything.
+        :param collector_name: The name of the collector.
+        :return: A "module:attribute" string, or None if the collector is unknown.
+        """
+        config = self.collectors.get(collector_name) or {}
+        if config.get("entry_point"):
+            return config["entry_point"]
+        if collector_name in self.COLLECTORS:
+            return self.COLLECTORS[collector_name]
+        for entry_point in metadata.entry_points(group=self.ENTRY_POINT_GROUP):
+            if entry_point.name == collector_name:
+                return entry_point.value
+        return None
+
+    def load_collector(self, collector_name):
+        """Import and construct a collector, once per manager.
+        :param collector_name: The name of the collector.
+        :return: A callable that runs the collector, or None if it is unknown.
+        """
+        if collector_name in self.loaded_collectors:
+            return self.loaded_collectors[collector_name]
+        entry_point = self.get_entry_point(collector_name)
+        if not entry_point:
+            return None
+        module_name, _, target = entry_point.partition(":")
+        module = import_module(module_name)
+        class_name, _, method_name = target.rpartition(".")
+        if class_name:
+            collector = getattr(module, class_name)(db=self.db, logger=self.logger)
+            collector_func = getattr(collector, method_name)
+        else:
+            function = getattr(module, method_name)
+            collector_func = lambda: function(oni_db=self.db)
+        self.loaded_collectors[collector_name] = collector_func
+        return collector_func
 
 
 if __name__ == "__main__":
@@ -0,0 +1,158 @@
+import threading
+import time
+from src.modules.sqlite.main import SQLiteManager
+
+
+class CollectorRun:
+    """One collector pass on its own daemon thread, with a wall-clock timeout."""
+
+    def __init__(
+        self,
+        name: str,
+        collector_func,
+        db: SQLiteManager,
+        timeout: float = None,
+        slots: threading.Semaphore = None,
+        keep_connection: bool = False,
+    ):
+        """Prepare a collector run.
+        :param name: The name of the collector.
+        :param collector_func: A callable that runs the collector.
+        :param db: The SQLiteManager the collector writes through.
+        :param timeout: Seconds the collector may run before it is cancelled.
+        :param slots: Optional semaphore bounding how many runs execute at once.
+        :param keep_connection: Leave the thread's database connection open after the
+            run, for threads that run the collector again later.
+        """
+        self.name = name
+        self.collector_func = collector_func
+        self.db = db
+        self.timeout = timeout
+        self.slots = slots
+        self.keep_connection = keep_connection
+        self.cancelled = threading.Event()
+        self.done = threading.Event()
+        self.started_at = None
+        # The connection of the run's thread, so a timeout can interrupt its statement.
+        self.conn = None
+        self._slot_lock = threading.Lock()
+        self._holds_slot = False
+        self.result = {
+            "collector": name,
+            "status": "pending",
+            "rows": 0,
+            "duration": None,
+            "error": None,
+        }
+
+    def start(self):
+        """Start the run on a daemon thread, so a hung collector cannot block shutdown."""
+        thread = threading.Thread(
+            target=self.run, name=f"collector-{self.name}", daemon=True
+        )
+        thread.start()
+        return thread
+
+    def run(self):
+        """Run the collector and record its result summary."""
+        if self.slots:
+            self.slots.acquire()
+            with self._slot_lock:
+                self._holds_slot = True
+        try:
+            if self.cancelled.is_set():
+                self.result["status"] = "cancelled"
+                return
+            self.execute()
+        finally:
+            self.release_slot()
+            self.done.set()
+
+    def execute(self):
+        self.started_at = time.monotonic()
+        conn = self.conn = self.db.get_connection()
+        # Once cancelled, nothing more is committed on this thread's connection, so a
+        # timed-out collector rolls back instead of writing late results.
+        self.db.set_cancel_event(self.cancelled)
+        changes = conn.total_changes
+        try:
+            self.collector_func()
+            if self.cancelled.is_set():
+                self.result["status"] = "timeout"
+            else:
+                self.result["status"] = "ok"
+        except Exception as e:
+            self.result["status"] = "timeout" if self.cancelled.is_set() else "error"
+            self.result["error"] = str(e)
+        finally:
+            if self.result["status"] == "ok":
+                self.result["rows"] = conn.total_changes - changes
+            self.result["duration"] = round(time.monotonic() - self.started_at, 3)
+            self.conn = None
+            if self.keep_connection:
+                self.db.set_cancel_event(None)
+            else:
+                self.db.release_connection()
+
+    def release_slot(self):
+        with self._slot_lock:
+            if self._holds_slot:
+                self._holds_slot = False
+                self.slots.release()
+
+    def cancel(self):
+        """Cancel the run; a run that has not started yet never will."""
+        self.cancelled.set()
+
+    def check_timeout(self):
+        """Cancel the run if it has exceeded its timeout.
+        :return: True if the run timed out.
+        """
+        if self.result["status"] == "timeout":
+            self.release_idle_slot()
+            return True
+        if (
+            not self.timeout
+            or self.started_at is None
+            or self.done.is_set()
+            or time.monotonic() - self.started_at <= self.timeout
+        ):
+            return False
+        self.cancel()
+        self.interrupt()
+        self.release_idle_slot()
+        self.result["status"] = "timeout"
+        self.result["error"] = f"Timed out after {self.timeout} seconds"
+        self.result["duration"] = round(time.monotonic() - self.started_at, 3)
+        return True
+
+    def interrupt(self):
+        """Interrupt the statement the run's thread is executing, if any.
+
+        The failed statement unwinds the thread's own transaction() block, which rolls
+        back; the connection is not otherwise touched from this thread.
+        """
+        conn = self.conn
+        if conn is not None:
+            conn.interrupt()
+
+    def release_idle_slot(self):
+        """Hand the slot of a timed-out run to the next run once its thread holds no
+        transaction, so the next run does not queue behind its write lock.
+        """
+        conn = self.conn
+        if conn is None or not conn.in_transaction:
+            self.release_slot()
+
+    def finished(self):
+        """Return True once the run completed or timed out, without blocking."""
+        return self.done.is_set() or self.check_timeout()
+
+    def wait(self, poll_interval: float = 0.5):
+        """Wait until the run finishes or its timeout expires.
+        :return: The result summary.
+        """
+        while not self.done.wait(poll_interval):
+            if self.check_timeout():
+                break
+        return self.result
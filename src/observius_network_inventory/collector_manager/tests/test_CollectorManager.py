@@ -0,0 +1,81 @@
+import sys
+from unittest.mock import MagicMock
+import pytest
+from src.observius_network_inventory.collector_manager import CollectorManager as module
+from src.observius_network_inventory.collector_manager.CollectorManager import (
+    CollectorManager,
+)
+
+FAKE_COLLECTORS = """
+constructed = []
+
+
+class FakeCollector:
+    def __init__(self, db, logger):
+        constructed.append(db)
+
+    def collect_data(self):
+        return "class"
+
+
+def collect(oni_db):
+    constructed.append(oni_db)
+"""
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch, mocker):
+    (tmp_path / "fake_collectors.py").write_text(FAKE_COLLECTORS)
+    (tmp_path / "disabled_collector.py").write_text("raise ImportError('imported')\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    collectors = {
+        "fake_class": {
+            "enabled": True,
+            "entry_point": "fake_collectors:FakeCollector.collect_data",
+        },
+        "fake_function": {"enabled": True, "entry_point": "fake_collectors:collect"},
+        "disabled": {
+            "enabled": False,
+            "entry_point": "disabled_collector:collect",
+        },
+    }
+    oni_config = MagicMock()
+    oni_config.get_section.side_effect = lambda path: {
+        "oni.collectors": collectors,
+        "oni.collector_manager": {"max_workers": 2},
+    }.get(path)
+    mocker.patch.object(module, "YamlReader", return_value=oni_config)
+    db = MagicMock()
+    db.settings = {}
+    yield CollectorManager(db=db, logger=MagicMock())
+    for name in ["fake_collectors", "disabled_collector"]:
+        sys.modules.pop(name, None)
+
+
+def test_collectors_are_not_imported_until_run(manager):
+    assert "fake_collectors" not in sys.modules
+    assert manager.get_entry_point("dns_ad") == CollectorManager.COLLECTORS["dns_ad"]
+    assert manager.get_entry_point("bogus") is None
+
+
+def test_load_collector(manager):
+    assert manager.load_collector("fake_class")() == "class"
+    manager.load_collector("fake_function")()
+    assert sys.modules["fake_collectors"].constructed == [manager.db, manager.db]
+
+
+def test_run_collectors_skips_disabled(manager):
+    results = manager.run_collectors()
+    assert sorted(result["collector"] for result in results) == [
+        "fake_class",
+        "fake_function",
+    ]
+    assert all(result["status"] == "ok" for result in results)
+    assert "disabled_collector" not in sys.modules
+
+
+def test_run_collector_holds_no_transaction(manager):
+    # Collectors open their own unit of work for the write phase only.
+    manager.run_collector("fake_function")
+    manager.db.unit_of_work.assert_not_called()
+    manager.db.transaction.assert_not_called()
@@ -0,0 +1,120 @@
+import threading
+import time
+import pytest
+from src.modules.sqlite.main import SQLiteManager
+from src.observius_network_inventory.collector_manager.CollectorRun import (
+    CollectorRun,
+)
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"))
+    manager.create_table(
+        "source_test",
+        [{"column": "ipv4", "data_type": "TEXT"}],
+        unique_constraints=[{"columns": ["ipv4"]}],
+    )
+    yield manager
+    manager.close()
+
+
+def count_rows(db):
+    return db.execute_sqlite_command("SELECT COUNT(*) FROM source_test", ())[0][0]
+
+
+def collector(db, ipv4, delay=0.0):
+    def collect():
+        time.sleep(delay)
+        db.bulk_upsert("source_test", [{"ipv4": ipv4}], ["ipv4"])
+
+    return collect
+
+
+def test_runs_concurrently(db):
+    slots = threading.BoundedSemaphore(2)
+    runs = [
+        CollectorRun(f"c{i}", collector(db, f"10.0.0.{i}", delay=0.3), db, slots=slots)
+        for i in range(2)
+    ]
+    started = time.monotonic()
+    for run in runs:
+        run.start()
+    results = [run.wait(poll_interval=0.05) for run in runs]
+    assert time.monotonic() - started < 0.55
+    assert [result["status"] for result in results] == ["ok", "ok"]
+    assert [result["rows"] for result in results] == [1, 1]
+    assert count_rows(db) == 2
+
+
+def test_error_summary(db):
+    def fail():
+        raise RuntimeError("unreachable")
+
+    run = CollectorRun("broken", fail, db)
+    run.start()
+    result = run.wait(poll_interval=0.05)
+    assert result["status"] == "error"
+    assert result["error"] == "unreachable"
+
+
+def test_timeout_cancels_writes(db):
+    run = CollectorRun("slow", collector(db, "10.0.0.9", delay=0.5), db, timeout=0.1)
+    run.start()
+    result = run.wait(poll_interval=0.05)
+    assert result["status"] == "timeout"
+    run.done.wait(2)
+    assert count_rows(db) == 0
+
+
+def test_timeout_releases_the_slot_of_a_run_stuck_in_io(db):
+    # The first run is stuck in network I/O before its write phase.
+    blocked = threading.Event()
+
+    def stuck():
+        blocked.wait(5)
+        with db.unit_of_work():
+            db.bulk_upsert("source_test", [{"ipv4": "10.0.0.1"}], ["ipv4"])
+
+    slots = threading.BoundedSemaphore(1)
+    stuck_run = CollectorRun("stuck", stuck, db, timeout=0.2, slots=slots)
+    next_run = CollectorRun("next", collector(db, "10.0.0.2"), db, slots=slots)
+    stuck_run.start()
+    next_run.start()
+    assert stuck_run.wait(poll_interval=0.05)["status"] == "timeout"
+    started = time.monotonic()
+    assert next_run.wait(poll_interval=0.05)["status"] == "ok"
+    assert time.monotonic() - started < 1
+
+    # Once cancelled, the stuck run no longer starts its write phase.
+    blocked.set()
+    stuck_run.done.wait(2)
+    assert db.execute_sqlite_command("SELECT ipv4 FROM source_test", ()) == [
+        ("10.0.0.2",)
+    ]
+
+
+def test_timeout_keeps_the_slot_until_the_transaction_ends(db):
+    # The first run is stuck while holding the write lock.
+    blocked = threading.Event()
+
+    def stuck():
+        with db.unit_of_work():
+            db.bulk_upsert("source_test", [{"ipv4": "10.0.0.1"}], ["ipv4"])
+            blocked.wait(5)
+
+    slots = threading.BoundedSemaphore(1)
+    stuck_run = CollectorRun("stuck", stuck, db, timeout=0.2, slots=slots)
+    next_run = CollectorRun("next", collector(db, "10.0.0.2"), db, slots=slots)
+    stuck_run.start()
+    next_run.start()
+    assert stuck_run.wait(poll_interval=0.05)["status"] == "timeout"
+    assert stuck_run.finished()
+    # The stuck run's own transaction() rolls back; the next run waits for it.
+    assert next_run.started_at is None
+
+    blocked.set()
+    assert next_run.wait(poll_interval=0.05)["status"] == "ok"
+    assert db.execute_sqlite_command("SELECT ipv4 FROM source_test", ()) == [
+        ("10.0.0.2",)
+    ]
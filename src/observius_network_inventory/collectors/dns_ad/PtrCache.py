@@ -0,0 +1,106 @@
+import json
+import time
+from src.modules.sqlite.main import SQLiteManager
+from src.modules.networking.normalize import ip_to_int, ipv4_network_range
+
+
+class PtrCache:
+    """
+    PTR answers kept in the database between runs, so a sweep only queries the addresses
+    whose cached answer has expired (see SweepPlanner).
+
+    Answers are kept for their record TTL, NXDOMAIN answers for their negative TTL (the
+    SOA minimum). Failed queries are not cached.
+    """
+
+    TABLE = "dns_ptr_cache"
+
+    def __init__(
+        self,
+        db: SQLiteManager,
+        min_ttl: int = 0,
+        max_ttl: int = 86400,
+    ):
+        """
+        Initialize the cache and create its table if needed.
+
+        :param db: An instance of SQLiteManager to manage database operations.
+        :param min_ttl: Seconds an answer is kept at least, whatever its TTL.
+        :param max_ttl: Seconds an answer is kept at most.
+        """
+        self.db = db
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.create_table()
+
+    def create_table(self):
+        self.db.execute_sqlite_command(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.TABLE} (
+                address TEXT PRIMARY KEY,
+                ipv4_int INTEGER,
+                status TEXT,
+                hostnames TEXT,
+                ttl INTEGER,
+                resolved_at INTEGER,
+                expires_at INTEGER
+            )
+            """,
+            (),
+        )
+        self.db.execute_sqlite_command(
+            f"CREATE INDEX IF NOT EXISTS idx_{self.TABLE}_ipv4_int ON {self.TABLE} (ipv4_int)",
+            (),
+        )
+
+    def load_entries(self, cidrs: list) -> dict:
+        """
+        Get the cached answers for the addresses of the given networks.
+
+        :return: A dictionary mapping each address (as an integer) to its
+            (status, hostnames, resolved_at, expires_at) tuple.
+        """
+        entries = {}
+        for cidr in cidrs:
+            first, last = ipv4_network_range(cidr)
+            for value, status, hostnames, resolved_at, expires_at in self.db.iter_query(
+                f"""
+                SELECT ipv4_int, status, hostnames, resolved_at, expires_at
+                FROM {self.TABLE} WHERE ipv4_int BETWEEN ? AND ?
+                """,
+                (first, last),
+            ):
+                entries[value] = (
+                    status,
+                    json.loads(hostnames) if hostnames else [],
+                    resolved_at,
+                    expires_at,
+                )
+        return entries
+
+    def store(self, results: list, now: int = None):
+        """
+        Cache resolution results from ReverseResolver.
+
+        :param results: Result dictionaries with 'address', 'hostnames', 'ttl' and 'status'.
+        :param now: The current epoch time.
+        """
+        now = int(time.time()) if now is None else now
+        rows = []
+        for result in results:
+            if result["status"] not in ("resolved", "nxdomain"):
+                continue
+            ttl = result["ttl"] if result["ttl"] is not None else self.min_ttl
+            ttl = min(max(ttl, self.min_ttl), self.max_ttl)
+            rows.append(
+                {
+                    "address": result["address"],
+                    "ipv4_int": ip_to_int(result["address"]),
+                    "status": result["status"],
+                    "hostnames": json.dumps(result["hostnames"]),
+                    "ttl": result["ttl"],
+                    "resolved_at": now,
+                    "expires_at": now + ttl,
+                }
+            )
+        self.db.bulk_upsert(self.TABLE, rows, key_columns=["address"])
@@ -0,0 +1,251 @@
+import bisect
+import fnmatch
+import ipaddress
+import itertools
+import time
+from src.modules.sqlite.main import SQLiteManager
+from src.modules.networking.normalize import ipv4_network_range
+from src.observius_network_inventory.collectors.dns_ad.PtrCache import PtrCache
+
+
+class SweepPlanner:
+    """
+    Decide which addresses a dns_ad sweep queries, and in which order.
+
+    In "full" mode every host address of the configured networks is queried. In
+    "targeted" mode only the addresses other collectors have seen alive are queried,
+    plus a slice of the remaining addresses on every run (the background sweep), which
+    walks the whole address space over successive runs.
+
+    Addresses seen alive come first, most recently seen first. With a PtrCache, addresses
+    whose cached answer has not expired are answered from the cache instead.
+    """
+
+    MODES = ["full", "targeted"]
+    STATE_TABLE = "dns_sweep_state"
+    BACKGROUND_CURSOR = "background_cursor"
+    DEFAULT_LIVE_SOURCES = ["source_snmp", "source_opennms", "source_unifi_*"]
+
+    def __init__(
+        self,
+        db: SQLiteManager,
+        mode: str = "full",
+        cache: PtrCache = None,
+        live_sources: list = None,
+        live_window: int = 86400,
+        background_per_run: int = 1024,
+    ):
+        """
+        Initialize the planner.
+
+        :param db: An instance of SQLiteManager to manage database operations.
+        :param mode: "full" or "targeted".
+        :param cache: An optional PtrCache answering unexpired addresses.
+        :param live_sources: Source tables (glob patterns allowed) whose addresses count
+            as alive.
+        :param live_window: Seconds since an address was last seen for it to count as alive.
+        :param background_per_run: Addresses beyond the live ones queried per targeted run.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"mode must be one of {self.MODES}.")
+        self.db = db
+        self.mode = mode
+        self.cache = cache
+        self.live_sources = (
+            self.DEFAULT_LIVE_SOURCES if live_sources is None else live_sources
+        )
+        self.live_window = live_window
+        self.background_per_run = background_per_run
+
+    def get_source_tables(self):
+        """
+        Get the existing tables matching the live source patterns.
+        """
+        tables = sorted(self.db.get_table_names())
+        return [
+            table
+            for table in tables
+            if any(fnmatch.fnmatchcase(table, pattern) for pattern in self.live_sources)
+        ]
+
+    def live_addresses(self, since: int, ranges: list) -> dict:
+        """
+        Get the IPv4 addresses the live sources saw since a point in time.
+
+        Sources are filtered on their indexed ipv4_int column, one range scan per range.
+
+        :param since: Epoch seconds.
+        :param ranges: The (start, stop) address ranges to look in, as from host_ranges().
+        :return: A dictionary mapping each address (as an integer) to when it was last seen.
+        """
+        live = {}
+        for table in self.get_source_tables():
+            columns = {
+                column[1]
+                for column in self.db.execute_sqlite_command(
+                    f"PRAGMA table_info({table})", ()
+                )
+            }
+            if not {"ipv4_int", "last_seen"} <= columns:
+                continue
+            for start, stop in ranges:
+                for value, last_seen in self.db.iter_query(
+                    f"""
+                    SELECT ipv4_int, MAX(last_seen) FROM {table}
+                    WHERE ipv4_int BETWEEN ? AND ? AND last_seen >= ?
+                    GROUP BY ipv4_int
+                    """,
+                    (start, stop - 1, since),
+                ):
+                    live[value] = max(live.get(value, 0), last_seen)
+        return live
+
+    @staticmethod
+    def host_values(cidr: str) -> range:
+        """
+        Get the host addresses of an IPv4 network as a range of integers, like
+        ipaddress' hosts() without building an object per address.
+        """
+        first, last = ipv4_network_range(cidr)
+        if last - first < 2:
+            return range(first, last + 1)
+        return range(first + 1, last)
+
+    @classmethod
+    def host_ranges(cls, cidrs: list) -> list:
+        """
+        Get the host addresses of the networks as sorted, non-overlapping (start, stop)
+        ranges of integers, so overlapping networks are swept once.
+        """
+        ranges = []
+        for hosts in sorted(
+            (cls.host_values(cidr) for cidr in cidrs), key=lambda r: r.start
+        ):
+            if ranges and hosts.start <= ranges[-1][1]:
+                ranges[-1][1] = max(ranges[-1][1], hosts.stop)
+            else:
+                ranges.append([hosts.start, hosts.stop])
+        return [(start, stop) for start, stop in ranges]
+
+    @staticmethod
+    def in_ranges(value: int, ranges: list) -> bool:
+        index = bisect.bisect_right(ranges, (value, float("inf"))) - 1
+        return index >= 0 and value < ranges[index][1]
+
+    @staticmethod
+    def iter_ranges(ranges: list, after: int = None):
+        """
+        Yield the addresses of the ranges above 'after' in order, then wrap around to the
+        ones up to it.
+        """
+        after = -1 if after is None else after
+        for start, stop in ranges:
+            if stop - 1 > after:
+                yield from range(max(start, after + 1), stop)
+        for start, stop in ranges:
+            if start > after:
+                break
+            yield from range(start, min(stop, after + 1))
+
+    def plan(self, cidrs: list, now: int = None):
+        """
+        Build the work list of a sweep over the given networks.
+
+        Only the live addresses and the cache entries are looked at one by one; the
+        remaining addresses are walked from the ranges, all of them in "full" mode and
+        just the background slice in "targeted" mode.
+
+        :param cidrs: The IPv4 networks to sweep.
+        :param now: The current epoch time.
+        :return: The addresses to query, and the {"ipv4", "hostname"} records answered
+            from the cache.
+        """
+        now = int(time.time()) if now is None else now
+        ranges = self.host_ranges(cidrs)
+        live = self.live_addresses(now - self.live_window, ranges)
+        entries = self.cache.load_entries(cidrs) if self.cache else {}
+
+        cached = []
+        answered = set()
+        for value in sorted(entries):
+            status, hostnames, resolved_at, expires_at = entries[value]
+            if expires_at <= now or not self.in_ranges(value, ranges):
+                continue
+            # A cached NXDOMAIN does not hold for an address seen alive since.
+            if status == "nxdomain" and live.get(value, 0) > resolved_at:
+                continue
+            answered.add(value)
+            address = str(ipaddress.IPv4Address(value))
+            cached.extend(
+                {"ipv4": address, "hostname": hostname} for hostname in hostnames
+            )
+
+        alive = sorted(
+            (value for value in live if value not in answered),
+            key=lambda value: (-live[value], value),
+        )
+        skip = answered.union(alive)
+        if self.mode == "targeted":
+            rest = self.background_slice(ranges, skip)
+        else:
+            rest = [value for value in self.iter_ranges(ranges) if value not in skip]
+        return [str(ipaddress.IPv4Address(value)) for value in alive + rest], cached
+
+    def background_slice(self, ranges: list, skip: set) -> list:
+        """
+        Take the next background_per_run addresses after the previous run's cursor,
+        wrapping around, and move the cursor past them.
+
+        Only the addresses of the slice are walked, whatever the size of the networks.
+
+        :param ranges: The (start, stop) address ranges, as from host_ranges().
+        :param skip: The addresses (as integers) within the ranges that are planned
+            otherwise.
+        """
+        remaining = sum(stop - start for start, stop in ranges) - len(skip)
+        count = min(self.background_per_run, remaining)
+        if count <= 0:
+            return []
+        selected = list(
+            itertools.islice(
+                (
+                    value
+                    for value in self.iter_ranges(ranges, self.get_cursor())
+                    if value not in skip
+                ),
+                count,
+            )
+        )
+        self.set_cursor(selected[-1])
+        return selected
+
+    def create_state_table(self):
+        self.db.execute_sqlite_command(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.STATE_TABLE} (
+                name TEXT PRIMARY KEY,
+                value INTEGER,
+                updated_at INTEGER
+            )
+            """,
+            (),
+        )
+
+    def get_cursor(self):
+        self.create_state_table()
+        rows = self.db.execute_sqlite_command(
+            f"SELECT value FROM {self.STATE_TABLE} WHERE name = ?",
+            (self.BACKGROUND_CURSOR,),
+        )
+        return rows[0][0] if rows else None
+
+    def set_cursor(self, value: int):
+        self.db.execute_sqlite_command(
+            f"""
+            INSERT INTO {self.STATE_TABLE} (name, value, updated_at) VALUES (?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+                value = excluded.value,
+                updated_at = excluded.updated_at
+            """,
+            (self.BACKGROUND_CURSOR, value, int(time.time())),
+        )
@@ -1,8 +1,29 @@
 from src.modules.yaml.YamlReader import YamlReader
 from src.modules.sqlite.main import SQLiteManager
+from src.modules.networking.normalize import add_int_keys
 from src.modules.common.LoggerSetup import LoggerSetup
+from src.modules.networking.reverse_dns import (
+    DEFAULT_BACKOFF,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_CONCURRENCY,
+    DEFAULT_RETRIES,
+    DEFAULT_TIMEOUT,
+    DEFAULT_TRANSFER_TIMEOUT,
+    ReverseResolver,
+    find_reverse_zones,
+    load_zone,
+    save_zone,
+    transfer_zone,
+    zone_ptr_records,
+)
+from src.observius_network_inventory.collectors.dns_ad.PtrCache import PtrCache
+from src.observius_network_inventory.collectors.dns_ad.SweepPlanner import (
+    SweepPlanner,
+)
+import dns.exception
 import dns.resolver
 import ipaddress
+import os
 import time
 from src.modules.device.Device import Device, AssetRecord
 import logging
@@ -18,109 +39,287 @@ class DNSCollector:
             yaml_file="resources/etc/autodiscovery/subnets.yaml"
         )
         self.dns_ad_yaml = YamlReader(yaml_file="resources/etc/collectors/dns_ad.yaml")
-        self.dns_servers = [
-            host["ip_address"] for host in self.dns_ad_yaml.get_section("dns_ad_hosts")
-        ]
+        dns_ad_hosts = self.dns_ad_yaml.get_section("dns_ad_hosts")
+        self.dns_servers = [host["ip_address"] for host in dns_ad_hosts]
+        self.resolution = self.dns_ad_yaml.get_section("resolution") or {}
+        self.zone_transfer = self.dns_ad_yaml.get_section("zone_transfer") or {}
+        # Queries in flight per domain controller, overridable per host.
+        concurrency = self.resolution.get("concurrency", DEFAULT_CONCURRENCY)
+        self.dns_concurrency = {
+            host["ip_address"]: host.get("concurrency", concurrency)
+            for host in dns_ad_hosts
+        }
         self.db = db
         self.logger = logger
+        self.ptr_cache = self.create_ptr_cache()
+        self.sweep = self.dns_ad_yaml.get_section("sweep") or {}
+        self.sweep_planner = self.create_sweep_planner()
 
-    def query_dns_records(self) -> list:
-        dns_results_list = []
+    def create_ptr_cache(self):
+        cache = self.dns_ad_yaml.get_section("cache") or {}
+        if not cache.get("enabled", False):
+            return None
+        return PtrCache(
+            db=self.db,
+            min_ttl=cache.get("min_ttl", 0),
+            max_ttl=cache.get("max_ttl", 86400),
+        )
 
+    def create_sweep_planner(self):
+        # A plain host walk is enough unless addresses are targeted or cached.
+        mode = self.sweep.get("mode", "full")
+        if mode == "full" and not self.ptr_cache:
+            return None
+        return SweepPlanner(
+            db=self.db,
+            mode=mode,
+            cache=self.ptr_cache,
+            live_sources=self.sweep.get("live_sources"),
+            live_window=self.sweep.get("live_window", 86400),
+            background_per_run=self.sweep.get("background_per_run", 1024),
+        )
+
+    def create_resolver(self) -> ReverseResolver:
+        return ReverseResolver(
+            nameservers=self.dns_servers,
+            concurrency=self.dns_concurrency,
+            timeout=self.resolution.get("timeout", DEFAULT_TIMEOUT),
+            retries=self.resolution.get("retries", DEFAULT_RETRIES),
+            backoff=self.resolution.get("backoff", DEFAULT_BACKOFF),
+            batch_size=self.resolution.get("batch_size", DEFAULT_BATCH_SIZE),
+        )
+
+    def get_networks(self) -> list:
         # Check if IPv4 is enabled and process the networks
-        if self.subnets_yaml.get_value("subnets.ipv4.enabled"):
-            ipv4_networks = self.subnets_yaml.get_value("subnets.ipv4.networks")
-            for network in ipv4_networks:
-                dns_results_list.extend(self.collect_dns_records(network["cidr"]))
+        if not self.subnets_yaml.get_value("subnets.ipv4.enabled"):
+            return []
+        networks = self.subnets_yaml.get_value("subnets.ipv4.networks") or []
+        # The same subnet may be listed under several names; resolve it once.
+        return list(dict.fromkeys(network["cidr"] for network in networks))
+
+    def iter_addresses(self, cidrs: list):
+        for cidr in cidrs:
+            try:
+                network = ipaddress.ip_network(cidr)
+            except ValueError as e:
+                self.logger.error(f"Error processing cidr {cidr}: {e}")
+                continue
+            for ip in network.hosts():
+                yield str(ip)
+
+    def resolve_addresses(self, addresses, on_records) -> dict:
+        """
+        Resolve PTR records concurrently and pass the found records on in batches.
+
+        :param addresses: The addresses to resolve.
+        :param on_records: Called with each batch of {"ipv4", "hostname"} records.
+        :return: The number of addresses per resolution status.
+        """
 
+        def on_batch(results):
+            records = []
+            for result in results:
+                if result["status"] == "nxdomain":
+                    self.logger.debug(f"No PTR record found for {result['address']}")
+                elif result["status"] == "failed":
+                    self.logger.error(
+                        f"Error collecting DNS records for {result['address']}: {result['error']}"
+                    )
+                for hostname in result["hostnames"]:
+                    records.append(
+                        {"ipv4": result["address"].upper(), "hostname": hostname}
+                    )
+            # One short transaction per batch: the write lock is not held while the
+            # next batch is being resolved.
+            with self.db.unit_of_work():
+                if self.ptr_cache:
+                    self.ptr_cache.store(results)
+                if records:
+                    on_records(records)
+
+        return self.create_resolver().resolve(addresses, on_batch)
+
+    def query_dns_records(self) -> list:
+        dns_results_list = []
+        self.resolve_addresses(
+            self.iter_addresses(self.get_networks()), dns_results_list.extend
+        )
         return dns_results_list
 
     def collect_dns_records(self, cidr: str) -> list:
         dns_records = []
-        try:
-            resolver = dns.resolver.Resolver()
-            resolver.nameservers = self.dns_servers
-            network = ipaddress.ip_network(cidr)
-            for ip in network.hosts():
-                try:
-                    answers = resolver.resolve(ip.reverse_pointer, "PTR")
-                    for rdata in answers:
-                        hostname = (
-                            rdata.to_text().rstrip(".").upper()
-                        )  # Remove trailing period and convert to uppercase
-                        dns_records.append(
-                            {"ipv4": str(ip).upper(), "hostname": hostname}
-                        )
-                except dns.resolver.NXDOMAIN:
-                    self.logger.debug(f"No PTR record found for {ip}")
-                except Exception as e:
-                    self.logger.error(f"Error collecting DNS records for {ip}: {e}")
-        except Exception as e:
-            self.logger.error(f"Error processing cidr {cidr}: {e}")
+        self.resolve_addresses(self.iter_addresses([cidr]), dns_records.extend)
         return dns_records
 
-    def dns_collection(self):
-        dns_results = self.query_dns_records()
+    def store_dns_records(self, dns_results: list) -> dict:
+        records = []
         for result in dns_results:
             ipv4 = result.get("ipv4").upper()
             if ipv4:
                 # Ensure 'first_seen' and 'last_seen' keys are set
                 result.setdefault("first_seen", current_epoch_time())
                 result.setdefault("last_seen", current_epoch_time())
+                records.append(add_int_keys(result))
 
-                # Check if the IPv4 address already exists in the database
-                query = "SELECT COUNT(*) FROM source_dns_ad WHERE ipv4 = ?"
-                db_result = self.db.execute_sqlite_command(query, (ipv4,))
-                count = db_result[0][0]
-
-                if count > 0:
-                    # Update the last_seen time
-                    update_query = """
-                        UPDATE source_dns_ad
-                        SET last_seen = ?
-                        WHERE ipv4 = ?
-                    """
-                    self.db.execute_sqlite_command(
-                        update_query, (current_epoch_time(), ipv4)
-                    )
-                else:
-                    # Insert new record with first_seen and last_seen times
-                    dns_insert_query = self.db.build_insert_command(
-                        table_name="source_dns_ad", data=result
-                    )
-                    self.db.execute_sqlite_command(
-                        dns_insert_query[0], dns_insert_query[1]
-                    )
-
-                # Create a Device instance
-                device_data = {
-                    "ipv4": result["ipv4"],
-                    "mac": "",  # Placeholder, update with actual MAC if available
-                    "serial_number": None,
-                    "manufacturer": None,
-                    "dns_name": result["hostname"],
-                    "metadata": {},
-                    "location": "",
-                    "categories": [],
-                    "foreignSource": "",
-                    "assetRecord": AssetRecord(
-                        category="Unspecified",
-                        id="",
-                    ),
-                    "foreignId": "",
-                    "first_seen": result["first_seen"],
-                    "lastIngressFlow": None,
-                    "lastEgressFlow": None,
-                    "labelSource": "",
-                    "last_seen": result["last_seen"],
-                    "type": "",
-                    "id": "",
-                }
-                device = Device(**device_data)
-                logging.debug(device)
+                if logging.getLogger().isEnabledFor(logging.DEBUG):
+                    logging.debug(self.build_device(result))
             else:
                 self.logger.error("IPv4 address not found in result")
 
+        # A PTR record is known by its address; a renamed host is updated in place.
+        return self.db.bulk_update_or_insert(
+            table_name="source_dns_ad",
+            records=records,
+            key_columns=["ipv4"],
+            update_columns=["hostname", "last_seen"],
+        )
+
+    def build_device(self, result: dict) -> Device:
+        device_data = {
+            "ipv4": result["ipv4"],
+            "mac": "",  # Placeholder, update with actual MAC if available
+            "serial_number": None,
+            "manufacturer": None,
+            "dns_name": result["hostname"],
+            "metadata": {},
+            "location": "",
+            "categories": [],
+            "foreignSource": "",
+            "assetRecord": AssetRecord(
+                category="Unspecified",
+                id="",
+            ),
+            "foreignId": "",
+            "first_seen": result["first_seen"],
+            "lastIngressFlow": None,
+            "lastEgressFlow": None,
+            "labelSource": "",
+            "last_seen": result["last_seen"],
+            "type": "",
+            "id": "",
+        }
+        return Device(**device_data)
+
+    def collect_zone_transfers(self, cidrs: list, on_records) -> list:
+        """
+        Collect the PTR records of the networks by transferring their reverse zones.
+
+        :param cidrs: The networks to collect.
+        :param on_records: Called with each batch of {"ipv4", "hostname"} records.
+        :return: The networks whose zone could not be found or transferred, to be
+            swept address by address instead.
+        """
+        resolver = dns.resolver.Resolver(configure=False)
+        resolver.nameservers = self.dns_servers
+        resolver.lifetime = self.resolution.get("timeout", DEFAULT_TIMEOUT) * 2
+        resolver.cache = dns.resolver.Cache()
+
+        zones = {}
+        fallback = []
+        for cidr in cidrs:
+            try:
+                for zone_name, network in find_reverse_zones(cidr, resolver):
+                    zones.setdefault(zone_name, []).append(network)
+            except (dns.exception.DNSException, ValueError) as e:
+                self.logger.warning(f"No reverse zone found for {cidr}: {e}")
+                fallback.append(cidr)
+
+        batch_size = self.resolution.get("batch_size", DEFAULT_BATCH_SIZE)
+        for zone_name, networks in zones.items():
+            zone = self.transfer_reverse_zone(zone_name)
+            if zone is None:
+                fallback.extend(str(network) for network in networks)
+                continue
+            # A zone may cover more than the configured networks.
+            records = []
+            for address, hostname, _ in zone_ptr_records(zone):
+                ip = ipaddress.ip_address(address)
+                if any(ip in network for network in networks):
+                    records.append({"ipv4": address.upper(), "hostname": hostname})
+                if len(records) >= batch_size:
+                    on_records(records)
+                    records = []
+            if records:
+                on_records(records)
+
+        if fallback:
+            self.logger.warning(
+                f"Querying each address of {', '.join(fallback)} instead of a zone transfer"
+            )
+        return fallback
+
+    def transfer_reverse_zone(self, zone_name):
+        """
+        Transfer a reverse zone from the first domain controller that allows it.
+
+        With 'incremental' enabled the zone is kept in 'cache_dir' between runs and
+        later transfers are IXFRs from its serial.
+        :param zone_name: The zone, as a dns.name.Name.
+        :return: The zone, or None if every domain controller refused the transfer.
+        """
+        incremental = self.zone_transfer.get("incremental", True)
+        zone_file = os.path.join(
+            self.zone_transfer.get("cache_dir", "resources/db/dns_ad_zones"),
+            f"{zone_name.to_text(omit_final_dot=True)}.zone",
+        )
+        zone = load_zone(zone_name, zone_file if incremental else None)
+        for dns_server in self.dns_servers:
+            try:
+                serial = transfer_zone(
+                    zone,
+                    dns_server,
+                    timeout=self.zone_transfer.get("timeout", DEFAULT_TRANSFER_TIMEOUT),
+                    incremental=incremental,
+                )
+            except (dns.exception.DNSException, OSError, EOFError) as e:
+                self.logger.warning(
+                    f"Zone transfer of {zone_name} from {dns_server} failed: {e}"
+                )
+                continue
+            new_serial = zone.get_soa().serial
+            if serial is None:
+                self.logger.info(f"AXFR of {zone_name}: serial {new_serial}")
+            else:
+                self.logger.info(
+                    f"IXFR of {zone_name}: serial {serial} to {new_serial}"
+                )
+            if incremental:
+                save_zone(zone, zone_file)
+            return zone
+        return None
+
+    def dns_collection(self):
+        counts = {"inserted": 0, "updated": 0}
+
+        def on_records(records):
+            # Stored as results arrive instead of after the whole sweep.
+            for key, value in self.store_dns_records(records).items():
+                counts[key] += value
+
+        cidrs = self.get_networks()
+        if self.zone_transfer.get("enabled"):
+            cidrs = self.collect_zone_transfers(cidrs, on_records)
+
+        started = time.monotonic()
+        if self.sweep_planner:
+            # Live addresses first; unexpired answers come from the cache.
+            addresses, cached_records = self.sweep_planner.plan(cidrs)
+            self.logger.info(
+                f"DNS {self.sweep_planner.mode} sweep: {len(cached_records)} records from cache, querying {len(addresses)} addresses"
+            )
+            if cached_records:
+                on_records(cached_records)
+        else:
+            addresses = self.iter_addresses(cidrs)
+        summary = self.resolve_addresses(addresses, on_records)
+        self.logger.info(
+            f"DNS sweep resolved {summary['resolved']}, NXDOMAIN {summary['nxdomain']}, "
+            f"failed {summary['failed']} addresses in {time.monotonic() - started:.1f}s"
+        )
+        self.logger.info(
+            f"DNS collection stored {counts['inserted']} new and {counts['updated']} existing records"
+        )
+
 
 if __name__ == "__main__":
     oni_yaml_file = "resources/etc/oni/oni.yaml"
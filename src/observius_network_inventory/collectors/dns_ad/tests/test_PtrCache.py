@@ -0,0 +1,48 @@
+import pytest
+from src.modules.sqlite.main import SQLiteManager
+from src.observius_network_inventory.collectors.dns_ad.PtrCache import PtrCache
+
+NOW = 1_700_000_000
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"))
+    yield manager
+    manager.close()
+
+
+def result(address, status, ttl, hostnames=()):
+    return {
+        "address": address,
+        "hostnames": list(hostnames),
+        "ttl": ttl,
+        "status": status,
+        "error": None,
+    }
+
+
+def test_store_bounds_ttls(db):
+    cache = PtrCache(db, min_ttl=60, max_ttl=7200)
+    cache.store(
+        [
+            result("10.0.0.1", "resolved", 3600, ["HOST1.AD.CONTOSO.COM"]),
+            result("10.0.0.2", "nxdomain", 900),
+            result("10.0.0.3", "resolved", 10, ["HOST3.AD.CONTOSO.COM"]),
+            result("10.0.0.4", "failed", None),
+            result("10.0.0.5", "resolved", 86400, ["HOST5.AD.CONTOSO.COM"]),
+            result("10.0.1.1", "nxdomain", None),
+        ],
+        now=NOW,
+    )
+    entries = cache.load_entries(["10.0.0.0/24"])
+    assert {value & 0xFF: entry for value, entry in entries.items()} == {
+        1: ("resolved", ["HOST1.AD.CONTOSO.COM"], NOW, NOW + 3600),
+        2: ("nxdomain", [], NOW, NOW + 900),
+        3: ("resolved", ["HOST3.AD.CONTOSO.COM"], NOW, NOW + 60),
+        5: ("resolved", ["HOST5.AD.CONTOSO.COM"], NOW, NOW + 7200),
+    }
+    # Without an SOA in the negative answer it is kept for min_ttl.
+    assert list(cache.load_entries(["10.0.1.0/24"]).values()) == [
+        ("nxdomain", [], NOW, NOW + 60)
+    ]
@@ -0,0 +1,119 @@
+import pytest
+from src.modules.sqlite.main import SQLiteManager
+from src.modules.networking.normalize import ip_to_int
+from src.observius_network_inventory.collectors.dns_ad.PtrCache import PtrCache
+from src.observius_network_inventory.collectors.dns_ad.SweepPlanner import (
+    SweepPlanner,
+)
+
+NOW = 1_700_000_000
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"))
+    for table in ["source_snmp", "source_unifi_network_api", "source_dns_ad"]:
+        manager.create_table(
+            table,
+            [
+                {"column": "ipv4", "data_type": "TEXT"},
+                {"column": "ipv4_int", "data_type": "INTEGER"},
+                {"column": "last_seen", "data_type": "INTEGER"},
+            ],
+            unique_constraints=[{"columns": ["ipv4"]}],
+        )
+    yield manager
+    manager.close()
+
+
+def result(address, status, ttl, hostnames=()):
+    return {
+        "address": address,
+        "hostnames": list(hostnames),
+        "ttl": ttl,
+        "status": status,
+        "error": None,
+    }
+
+
+def seen(db, table, ipv4, last_seen):
+    db.bulk_upsert(
+        table,
+        [{"ipv4": ipv4, "ipv4_int": ip_to_int(ipv4), "last_seen": last_seen}],
+        ["ipv4"],
+    )
+
+
+def test_only_expired_addresses_are_queried(db):
+    cache = PtrCache(db)
+    cache.store(
+        [
+            result("10.0.0.1", "resolved", 3600, ["HOST1.AD.CONTOSO.COM"]),
+            result("10.0.0.2", "nxdomain", 900),
+        ],
+        now=NOW,
+    )
+    planner = SweepPlanner(db, cache=cache)
+    addresses, cached = planner.plan(["10.0.0.0/29", "10.0.0.0/30"], now=NOW + 1000)
+    assert addresses == ["10.0.0.2", "10.0.0.3", "10.0.0.4", "10.0.0.5", "10.0.0.6"]
+    assert cached == [{"ipv4": "10.0.0.1", "hostname": "HOST1.AD.CONTOSO.COM"}]
+
+
+def test_live_addresses_are_refreshed_first(db):
+    cache = PtrCache(db)
+    cache.store([result(f"10.0.0.{i}", "nxdomain", 3600) for i in range(1, 7)], now=NOW)
+    seen(db, "source_unifi_network_api", "10.0.0.5", NOW + 100)
+    seen(db, "source_snmp", "10.0.0.3", NOW - 100)
+    seen(db, "source_snmp", "10.0.0.4", NOW + 150)
+    seen(db, "source_dns_ad", "10.0.0.6", NOW + 150)
+
+    planner = SweepPlanner(db, cache=cache)
+    assert planner.get_source_tables() == ["source_snmp", "source_unifi_network_api"]
+    # 10.0.0.4 and 10.0.0.5 were seen alive after their NXDOMAIN was cached.
+    addresses, cached = planner.plan(["10.0.0.0/29"], now=NOW + 200)
+    assert addresses == ["10.0.0.4", "10.0.0.5"]
+    assert cached == []
+
+    addresses, _ = planner.plan(["10.0.0.0/29"], now=NOW + 4000)
+    assert addresses == [
+        "10.0.0.4",
+        "10.0.0.5",
+        "10.0.0.3",
+        "10.0.0.1",
+        "10.0.0.2",
+        "10.0.0.6",
+    ]
+
+
+def test_targeted_sweep_walks_the_rest_in_the_background(db):
+    seen(db, "source_snmp", "10.0.0.9", NOW)
+    seen(db, "source_snmp", "192.168.1.1", NOW)
+    planner = SweepPlanner(db, mode="targeted", background_per_run=5)
+
+    runs = [planner.plan(["10.0.0.0/28"], now=NOW + 10)[0] for _ in range(3)]
+    # The live address leads every run; the other 13 hosts are walked 5 at a time.
+    assert [run[0] for run in runs] == ["10.0.0.9"] * 3
+    assert [[address.split(".")[-1] for address in run[1:]] for run in runs] == [
+        ["1", "2", "3", "4", "5"],
+        ["6", "7", "8", "10", "11"],
+        ["12", "13", "14", "1", "2"],
+    ]
+
+
+def test_invalid_mode(db):
+    with pytest.raises(ValueError):
+        SweepPlanner(db, mode="bogus")
+
+
+def test_background_slice_is_taken_from_the_cursor(db):
+    # Only the slice is walked, so a /8 costs no more than a /24.
+    planner = SweepPlanner(db, mode="targeted", background_per_run=3)
+    planner.create_state_table()
+    planner.set_cursor(ip_to_int("10.255.255.250"))
+    addresses, _ = planner.plan(["10.0.0.0/8", "10.128.0.0/9"], now=NOW)
+    assert addresses == ["10.255.255.251", "10.255.255.252", "10.255.255.253"]
+    assert planner.get_cursor() == ip_to_int("10.255.255.253")
+
+    # The next slice wraps around to the start of the network.
+    addresses, _ = planner.plan(["10.0.0.0/8"], now=NOW)
+    assert addresses == ["10.255.255.254", "10.0.0.1", "10.0.0.2"]
@@ -0,0 +1,37 @@
+from unittest.mock import MagicMock
+import pytest
+from src.modules.sqlite.main import SQLiteManager
+from src.observius_network_inventory.collectors.dns_ad import main
+
+ONI_DB_YAML = "resources/etc_template/databases/oni.yaml"
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"))
+    manager.create_tables_from_yaml(ONI_DB_YAML)
+    yield manager
+    manager.close()
+
+
+@pytest.fixture
+def collector(db, mocker):
+    dns_ad_yaml = MagicMock()
+    dns_ad_yaml.get_section.side_effect = lambda path: {
+        "dns_ad_hosts": [{"ip_address": "10.0.0.53"}]
+    }.get(path)
+    mocker.patch.object(main, "YamlReader", return_value=dns_ad_yaml)
+    return main.DNSCollector(db=db, logger=MagicMock())
+
+
+def test_renamed_ptr_is_updated_in_place(db, collector):
+    collector.store_dns_records(
+        [{"ipv4": "10.0.0.1", "hostname": "OLD.AD.CONTOSO.COM", "last_seen": 100}]
+    )
+    counts = collector.store_dns_records(
+        [{"ipv4": "10.0.0.1", "hostname": "NEW.AD.CONTOSO.COM", "last_seen": 200}]
+    )
+    assert counts == {"inserted": 0, "updated": 1}
+    assert db.execute_sqlite_command(
+        "SELECT ipv4, hostname, last_seen FROM source_dns_ad", ()
+    ) == [("10.0.0.1", "NEW.AD.CONTOSO.COM", 200)]
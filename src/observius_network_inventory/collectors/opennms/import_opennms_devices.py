@@ -12,6 +12,7 @@ from src.modules.opennms.interfaces.interfaces import (
     get_all_snmp_interfaces,
 )
 from src.modules.sqlite.main import SQLiteManager
+from src.modules.networking.normalize import add_int_keys
 from src.modules.common.LoggerSetup import LoggerSetup
 from src.modules.device.Device import Device
 
@@ -72,6 +73,9 @@ class OpenNMSCollector:
         }
 
     def store_data(self, nodes):
+        # Query every node's interfaces first, so the write lock is only held while
+        # the rows are stored.
+        rows = []
         for node in nodes.get("node", []):
             node_id = node.get("id")
             ip_interfaces = onms_get_ipinterfaces_for_id(
@@ -89,7 +93,10 @@ class OpenNMSCollector:
                 device_data = self.create_device_data(node, ip_interface, label)
                 logging.debug(device_data)
                 device = Device(**device_data)
-                data = self.map_device_to_db(device)
+                rows.append(self.map_device_to_db(device))
+
+        with self.db.unit_of_work():
+            for data in rows:
                 self.insert_or_update_data("source_opennms", data)
 
     @staticmethod
@@ -148,7 +155,7 @@ class OpenNMSCollector:
         return bool(re.match(r"^(\d{1,3}\.){3}\d{1,3}$", label))
 
     def insert_or_update_data(self, table_name, data):
-        data = {k: v for k, v in data.items() if v}
+        data = {k: v for k, v in add_int_keys(data).items() if v}
         if "ipv4" in data:
             keys = ", ".join(data.keys())
             placeholders = ", ".join(["?" for _ in data])
@@ -2,6 +2,7 @@ from src.modules.snmp.netmiko_snmpwalk import parse_snmp_output
 from src.modules.snmp.common import get_arp_table
 from src.modules.yaml.YamlReader import YamlReader
 from src.modules.sqlite.main import SQLiteManager
+from src.modules.networking.normalize import add_int_keys
 import time
 import logging
 
@@ -36,35 +37,30 @@ def query_snmp_hosts() -> list:
 
 def snmp_collection(oni_db: SQLiteManager):
     snmp_source_results = query_snmp_hosts()
+    records = []
     for source_result in snmp_source_results:
         for arp_table_dict in source_result:
-            physical_address = arp_table_dict.get("physical_address").upper()
+            physical_address = (arp_table_dict.get("physical_address") or "").upper()
             if physical_address:
-                query = "SELECT COUNT(*) FROM source_snmp WHERE physical_address = ?"
-                result = oni_db.execute_sqlite_command(query, (physical_address,))
-                count = result[0][0]
-
-                if count > 0:
-                    update_query = """
-                        UPDATE source_snmp
-                        SET last_seen = ?
-                        WHERE physical_address = ?
-                    """
-                    oni_db.execute_sqlite_command(
-                        update_query, (current_epoch_time(), physical_address)
-                    )
-                else:
-                    arp_table_dict["first_seen"] = current_epoch_time()
-                    arp_table_dict["last_seen"] = current_epoch_time()
-                    snmp_source_insert_query = oni_db.build_insert_command(
-                        table_name="source_snmp", data=arp_table_dict
-                    )
-                    oni_db.execute_sqlite_command(
-                        snmp_source_insert_query[0], snmp_source_insert_query[1]
-                    )
+                arp_table_dict["physical_address"] = physical_address
+                arp_table_dict["first_seen"] = current_epoch_time()
+                arp_table_dict["last_seen"] = current_epoch_time()
+                records.append(add_int_keys(arp_table_dict))
             else:
                 logging.error("MAC address not found in arp_table_dict")
 
+    # An ARP entry is known by its MAC address, whatever IP it currently has.
+    with oni_db.unit_of_work():
+        counts = oni_db.bulk_update_or_insert(
+            table_name="source_snmp",
+            records=records,
+            key_columns=["physical_address"],
+            update_columns=["last_seen"],
+        )
+    logging.info(
+        f"SNMP collection stored {counts['inserted']} new and {counts['updated']} existing records"
+    )
+
 
 if __name__ == "__main__":
     oni_db = SQLiteManager(database_path="resources/db/oni.db")
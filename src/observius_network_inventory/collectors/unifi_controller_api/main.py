@@ -8,6 +8,7 @@ from src.modules.unifi.unifi_controller_api.main import (
 )
 from src.modules.yaml.YamlReader import YamlReader
 from src.modules.sqlite.main import SQLiteManager
+from src.modules.networking.normalize import add_int_keys
 from src.modules.common.LoggerSetup import LoggerSetup
 
 
@@ -48,85 +49,61 @@ def query_unifi_sites() -> list:
 
 def unifi_collection(oni_db: SQLiteManager):
     unifi_source_results = query_unifi_sites()
+    # Clients are known by their IP address, devices by their MAC address.
+    clients, devices = [], []
     for source_result in unifi_source_results:
         for client in source_result["clients"]:
-            ipv4 = client.get("ipv4")
-            physical_address = client.get("physical_address")
-            HOSTNAME = ""  # hostname data is not reliable, disabled for now"
-            ipv6 = client.get("ipv6")
-            first_seen = client.get("first_seen")
-            last_seen = client.get("last_seen")
-
-            # Check if the client already exists in the database
-            query = "SELECT COUNT(*) FROM source_unifi_controller_api WHERE ipv4 = ?"
-            result = oni_db.execute_sqlite_command(query, (ipv4,))
-            count = result[0][0]
-
-            if count > 0:
-                # Update the last_seen time
-                update_query = """
-                    UPDATE source_unifi_controller_api
-                    SET last_seen = ?
-                    WHERE ipv4 = ?
-                """
-                oni_db.execute_sqlite_command(
-                    update_query, (current_epoch_time(), ipv4)
-                )
+            record = {
+                "ipv4": client.get("ipv4"),
+                "physical_address": client.get("physical_address"),
+                "HOSTNAME": "",  # hostname data is not reliable, disabled for now
+                "ipv6": client.get("ipv6"),
+                "first_seen": client.get("first_seen") or current_epoch_time(),
+                "last_seen": client.get("last_seen") or current_epoch_time(),
+            }
+            if record["ipv4"]:
+                clients.append(add_int_keys(record))
+            elif record["physical_address"]:
+                devices.append(add_int_keys(record))
             else:
-                # Set the first_seen and last_seen times
-                client_dict = {
-                    "ipv4": ipv4,
-                    "physical_address": physical_address,
-                    "HOSTNAME": "",  # hostname data is not reliable, disabled for now
-                    "ipv6": ipv6,
-                    "first_seen": first_seen,
-                    "last_seen": last_seen,
-                }
-                unifi_source_insert_query = oni_db.build_insert_command(
-                    table_name="source_unifi_controller_api", data=client_dict
-                )
-                oni_db.execute_sqlite_command(
-                    unifi_source_insert_query[0], unifi_source_insert_query[1]
-                )
+                logging.error("IP and MAC address not found in client data")
 
         for device in source_result["devices"]:
             physical_address = device.get("mac")
             if physical_address:
                 # Map the device data to the database schema
-                device_dict = {
-                    "ipv4": device.get("ip"),
-                    "HOSTNAME": "",  # hostname data is not reliable, disabled for now
-                    "physical_address": physical_address,
-                    "first_seen": current_epoch_time(),
-                    "last_seen": current_epoch_time(),
-                }
-
-                # Check if the device already exists in the database
-                query = "SELECT COUNT(*) FROM source_unifi_controller_api WHERE physical_address = ?"
-                result = oni_db.execute_sqlite_command(query, (physical_address,))
-                count = result[0][0]
-
-                if count > 0:
-                    # Update the last_seen time
-                    update_query = """
-                        UPDATE source_unifi_controller_api
-                        SET last_seen = ?
-                        WHERE physical_address = ?
-                    """
-                    oni_db.execute_sqlite_command(
-                        update_query, (current_epoch_time(), physical_address)
-                    )
-                else:
-                    # Insert the new device data
-                    unifi_source_insert_query = oni_db.build_insert_command(
-                        table_name="source_unifi_controller_api", data=device_dict
-                    )
-                    oni_db.execute_sqlite_command(
-                        unifi_source_insert_query[0], unifi_source_insert_query[1]
+                devices.append(
+                    add_int_keys(
+                        {
+                            "ipv4": device.get("ip"),
+                            "HOSTNAME": "",  # hostname data is not reliable, disabled for now
+                            "physical_address": physical_address,
+                            "first_seen": current_epoch_time(),
+                            "last_seen": current_epoch_time(),
+                        }
                     )
+                )
             else:
                 logging.error("MAC address not found in device data")
 
+    with oni_db.unit_of_work():
+        counts = oni_db.bulk_update_or_insert(
+            table_name="source_unifi_controller_api",
+            records=clients,
+            key_columns=["ipv4"],
+            update_columns=["last_seen"],
+        )
+        device_counts = oni_db.bulk_update_or_insert(
+            table_name="source_unifi_controller_api",
+            records=devices,
+            key_columns=["physical_address"],
+            update_columns=["last_seen"],
+        )
+    logging.info(
+        f"UniFi collection stored {counts['inserted'] + device_counts['inserted']} new "
+        f"and {counts['updated'] + device_counts['updated']} existing records"
+    )
+
 
 if __name__ == "__main__":
     oni_yaml_file = "resources/etc/oni/oni.yaml"
@@ -0,0 +1,53 @@
+import pytest
+from src.modules.sqlite.main import SQLiteManager
+from src.observius_network_inventory.collectors.unifi_controller_api import main
+
+ONI_DB_YAML = "resources/etc_template/databases/oni.yaml"
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"))
+    manager.create_tables_from_yaml(ONI_DB_YAML)
+    yield manager
+    manager.close()
+
+
+def site(clients, devices):
+    return [{"site": "default", "clients": clients, "devices": devices}]
+
+
+def test_second_run_updates_instead_of_inserting(db, mocker):
+    query = mocker.patch.object(main, "query_unifi_sites")
+    query.return_value = site(
+        clients=[
+            {"ipv4": "10.0.0.10", "physical_address": None, "last_seen": 100},
+            {"ipv4": None, "physical_address": "AA:AA:AA:00:00:01", "last_seen": 100},
+        ],
+        devices=[{"mac": "AA:AA:AA:00:00:02", "ip": "10.0.0.2"}],
+    )
+    main.unifi_collection(oni_db=db)
+
+    # Same client IP, and the device got a new IP address.
+    query.return_value = site(
+        clients=[
+            {"ipv4": "10.0.0.10", "physical_address": None, "last_seen": 200},
+            {"ipv4": None, "physical_address": "AA:AA:AA:00:00:01", "last_seen": 200},
+        ],
+        devices=[{"mac": "AA:AA:AA:00:00:02", "ip": "10.0.0.3"}],
+    )
+    main.unifi_collection(oni_db=db)
+
+    rows = db.execute_sqlite_command(
+        """
+        SELECT ipv4, physical_address, last_seen FROM source_unifi_controller_api
+        ORDER BY physical_address
+        """,
+        (),
+    )
+    assert [row[:2] for row in rows] == [
+        ("10.0.0.10", None),
+        (None, "AA:AA:AA:00:00:01"),
+        ("10.0.0.2", "AA:AA:AA:00:00:02"),
+    ]
+    assert rows[0][2] == 200 and rows[1][2] == 200
@@ -3,6 +3,7 @@ import time
 import requests
 from src.modules.yaml.YamlReader import YamlReader
 from src.modules.sqlite.main import SQLiteManager
+from src.modules.networking.normalize import add_int_keys
 from src.modules.common.LoggerSetup import LoggerSetup
 from src.modules.networking.mac_address import format_physical_address
 from src.modules.unifi.unifi_network_api.UniFiAPI import UniFiAPI
@@ -60,32 +61,34 @@ class UniFiNetworkAPICollector:
             self.logger.error(f"Error retrieving devices: {e}")
 
     def store_data(self, items, item_type):
-        for item in items.get("data", []):
-            physical_address = item.get("macAddress", "").replace("::", ":").upper()
-            data = {
-                "ipv4": item.get("ipAddress", "").upper(),
-                "ipv6": "",
-                # Disabling for now. Unifi Network API is very unreliable for this field.
-                # In addition: the API does not allow updating this field.
-                # "hostname": item.get("name", "").upper(),
-                "hostname": "",
-                "physical_address": physical_address,
-                "interface_name": (
-                    item.get("interfaces", [])[0].upper()
-                    if item.get("interfaces")
-                    else ""
-                ),
-                "guid_hash": "",
-                "description": item.get("model", "").upper(),
-                "device_type": item_type,
-                "vendor": "",
-                "first_seen": current_epoch_time(),
-                "last_seen": current_epoch_time(),
-            }
-            self.insert_or_update_data("source_unifi_network_api", data)
+        # The items are already fetched; store them in one unit of work.
+        with self.db.unit_of_work():
+            for item in items.get("data", []):
+                physical_address = item.get("macAddress", "").replace("::", ":").upper()
+                data = {
+                    "ipv4": item.get("ipAddress", "").upper(),
+                    "ipv6": "",
+                    # Disabling for now. Unifi Network API is very unreliable for this field.
+                    # In addition: the API does not allow updating this field.
+                    # "hostname": item.get("name", "").upper(),
+                    "hostname": "",
+                    "physical_address": physical_address,
+                    "interface_name": (
+                        item.get("interfaces", [])[0].upper()
+                        if item.get("interfaces")
+                        else ""
+                    ),
+                    "guid_hash": "",
+                    "description": item.get("model", "").upper(),
+                    "device_type": item_type,
+                    "vendor": "",
+                    "first_seen": current_epoch_time(),
+                    "last_seen": current_epoch_time(),
+                }
+                self.insert_or_update_data("source_unifi_network_api", data)
 
     def insert_or_update_data(self, table_name, data):
-        data = {k: v for k, v in data.items() if v}
+        data = {k: v for k, v in add_int_keys(data).items() if v}
         if "ipv4" in data:
             keys = ", ".join(data.keys())
             placeholders = ", ".join(["?" for _ in data])
@@ -3,50 +3,125 @@
 import csv
 import sqlite3
 import pandas as pd
+from src.modules.networking.oui import load_oui_index
 from src.modules.sqlite.main import SQLiteManager
-import xml.etree.ElementTree as ET
 
 
 class MacConfigurator:
-    def __init__(self, oni_db: SQLiteManager):
+    UNKNOWN_VENDOR = "Unknown Vendor"
+    # The MAC address the stored vendor was looked up from.
+    VENDOR_PHYSICAL_ADDRESS = "vendor_physical_address"
+
+    def __init__(
+        self,
+        oni_db: SQLiteManager,
+        table: str = "master_inventory",
+        oui_cache_path: str = None,
+    ):
         self.db = oni_db
-        self.mac_inventory_xml = (
-            "src/observius_network_inventory/configurators/mac/resources/vendorMacs.xml"
-        )
-        self.mac_vendors = self.load_mac_vendors()
+        self.oui_cache_path = oui_cache_path
+        self.table = table
+        resources = "src/observius_network_inventory/configurators/mac/resources"
+        self.mac_inventory_xml = f"{resources}/vendorMacs.xml"
+        # Optional IEEE registry exports, used when present next to the XML.
+        self.mac_vendor_sources = [
+            self.mac_inventory_xml,
+            f"{resources}/oui.csv",
+            f"{resources}/mam.csv",
+            f"{resources}/oui36.csv",
+        ]
+        self.oui_index = self.load_mac_vendors()
+        # Makes oui_vendor() available to SQL on the shared connections.
+        self.db.set_oui_index(self.oui_index)
         self.original_devices = self.load_original_devices()
         self.updated_devices = self.update_devices_with_vendor()
         self.update_db_with_vendor()
 
     def load_mac_vendors(self):
-        mac_vendors = {}
-        tree = ET.parse(self.mac_inventory_xml)
-        root = tree.getroot()
-        namespace = {"ns": "http://www.cisco.com/server/spt"}
-        for vendor in root.findall("ns:VendorMapping", namespace):
-            mac_prefix = vendor.get("mac_prefix").strip().upper()
-            vendor_name = vendor.get("vendor_name").strip()
-            mac_vendors[mac_prefix] = vendor_name
-        return mac_vendors
+        # Served from a binary cache (resources/db by default), rebuilt when a source
+        # changes.
+        return load_oui_index(self.mac_vendor_sources, cache_path=self.oui_cache_path)
 
     def lookup_vendor(self, physical_address):
-        mac_prefix = physical_address[:8].upper()
-        return self.mac_vendors.get(mac_prefix, "Unknown Vendor")
+        # Longest-prefix match over MA-S, MA-M and MA-L assignments, any MAC format.
+        return self.oui_index.lookup(physical_address, default=self.UNKNOWN_VENDOR)
 
     def load_original_devices(self):
-        query = "SELECT * FROM master_inventory"
+        # Only rows without a known vendor, or whose MAC changed since they were
+        # enriched, need a lookup.
+        columns = [
+            column[1]
+            for column in self.db.execute_sqlite_command(
+                f"PRAGMA table_info({self.table})", ()
+            )
+        ]
+        self.track_physical_address = self.VENDOR_PHYSICAL_ADDRESS in columns
+        conditions = [
+            "vendor IS NULL",
+            "vendor = ''",
+            f"vendor = '{self.UNKNOWN_VENDOR}'",
+        ]
+        selected = ["id", "physical_address", "vendor"]
+        if self.track_physical_address:
+            conditions.append(f"{self.VENDOR_PHYSICAL_ADDRESS} IS NOT physical_address")
+            selected.append(self.VENDOR_PHYSICAL_ADDRESS)
+        query = f"SELECT {', '.join(selected)} FROM {self.table} WHERE {' OR '.join(conditions)}"
         result = self.db.execute_sqlite_query(query)
-        return pd.DataFrame(result)
+        return pd.DataFrame(result, columns=selected)
 
     def update_devices_with_vendor(self):
-        self.original_devices["vendor"] = self.original_devices[
-            "physical_address"
-        ].apply(self.lookup_vendor)
-        return self.original_devices
+        devices = self.original_devices
+        vendors = self.oui_index.lookup_addresses(
+            devices["physical_address"].tolist(),
+            default=self.UNKNOWN_VENDOR,
+        )
+        changed = self.differs(
+            devices["vendor"], pd.Series(vendors, index=devices.index)
+        )
+        if self.track_physical_address:
+            changed |= self.differs(
+                devices[self.VENDOR_PHYSICAL_ADDRESS], devices["physical_address"]
+            )
+        updated = devices[changed].copy()
+        updated["vendor"] = vendors[changed.to_numpy()]
+        return updated
+
+    @staticmethod
+    def differs(left, right):
+        # NULLs compare equal to each other, unlike NaN.
+        return ~(left.eq(right) | (left.isna() & right.isna()))
 
     def update_db_with_vendor(self):
-        data_list = self.updated_devices.to_dict(orient="records")
-        command, values = self.db.build_batch_insert_command(
-            "master_inventory", data_list, conflict_resolution="replace"
-        )
-        self.db.execute_batch_insert(command, values)
+        """
+        Write the vendor column of the changed rows only, with one UPDATE ... FROM a
+        TEMP table, instead of rewriting every row with INSERT OR REPLACE.
+        """
+        if self.updated_devices.empty:
+            return 0
+        rows = [
+            (int(row_id), vendor, physical_address)
+            for row_id, vendor, physical_address in zip(
+                self.updated_devices["id"],
+                self.updated_devices["vendor"],
+                self.updated_devices["physical_address"],
+            )
+        ]
+        assignments = "vendor = vendor_updates.vendor"
+        if self.track_physical_address:
+            assignments += (
+                f", {self.VENDOR_PHYSICAL_ADDRESS} = vendor_updates.physical_address"
+            )
+        with self.db.transaction() as conn:
+            conn.execute("DROP TABLE IF EXISTS temp.vendor_updates")
+            conn.execute(
+                "CREATE TEMP TABLE vendor_updates (id INTEGER PRIMARY KEY, vendor TEXT, physical_address TEXT)"
+            )
+            conn.executemany("INSERT INTO vendor_updates VALUES (?, ?, ?)", rows)
+            cursor = conn.execute(
+                f"""
+                UPDATE {self.table} SET {assignments}
+                FROM vendor_updates WHERE {self.table}.id = vendor_updates.id
+                """
+            )
+            conn.execute("DROP TABLE temp.vendor_updates")
+        return cursor.rowcount
@@ -0,0 +1,68 @@
+import pytest
+from src.modules.networking.oui import OuiIndex
+from src.modules.sqlite.main import SQLiteManager
+from src.observius_network_inventory.configurators.mac.MacConfigurator import (
+    MacConfigurator,
+)
+
+
+@pytest.fixture
+def db(tmp_path, mocker):
+    mocker.patch.object(
+        MacConfigurator,
+        "load_mac_vendors",
+        return_value=OuiIndex.from_mapping(
+            {"00:00:0C": "Cisco Systems, Inc", "00:1B:C5:0": "MA-M Vendor"}
+        ),
+    )
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"))
+    manager.create_table(
+        "master_inventory",
+        [
+            {"column": "hostname", "data_type": "TEXT"},
+            {"column": "physical_address", "data_type": "TEXT"},
+            {"column": "vendor", "data_type": "TEXT"},
+            {"column": "vendor_physical_address", "data_type": "TEXT"},
+        ],
+        unique_constraints=[],
+    )
+    rows = [
+        ("HOST1", "00:00:0C:12:34:56", None, None),
+        ("HOST2", "001b.c500.2001", None, None),
+        ("HOST3", None, None, None),
+        ("HOST4", "00:00:0C:AA:AA:AA", "Cisco Systems, Inc", "00:00:0C:AA:AA:AA"),
+    ]
+    for row in rows:
+        manager.execute_sqlite_command(
+            "INSERT INTO master_inventory (hostname, physical_address, vendor, vendor_physical_address) VALUES (?, ?, ?, ?)",
+            row,
+        )
+    yield manager
+    manager.close()
+
+
+def vendors(db):
+    return db.execute_sqlite_command(
+        "SELECT vendor, vendor_physical_address FROM master_inventory ORDER BY id", ()
+    )
+
+
+def test_enriches_only_changed_rows(db):
+    configurator = MacConfigurator(oni_db=db)
+    assert list(configurator.updated_devices["id"]) == [1, 2, 3]
+    assert vendors(db) == [
+        ("Cisco Systems, Inc", "00:00:0C:12:34:56"),
+        ("MA-M Vendor", "001b.c500.2001"),
+        ("Unknown Vendor", None),
+        ("Cisco Systems, Inc", "00:00:0C:AA:AA:AA"),
+    ]
+
+    assert MacConfigurator(oni_db=db).updated_devices.empty
+
+    db.execute_sqlite_command(
+        "UPDATE master_inventory SET physical_address = '00-1B-C5-00-30-01' WHERE id = 4",
+        (),
+    )
+    configurator = MacConfigurator(oni_db=db)
+    assert list(configurator.updated_devices["id"]) == [4]
+    assert vendors(db)[3] == ("MA-M Vendor", "00-1B-C5-00-30-01")
@@ -9,6 +9,7 @@ from src.modules.device.Device import (
 )
 from src.modules.netbox.NetBoxAPI import NetBoxAPI
 import pandas as pd
+from itertools import islice
 
 
 def find_blank_ipv4_rows(dataframe: pd.DataFrame) -> pd.DataFrame:
@@ -88,13 +89,16 @@ def main():
     netbox_api = NetBoxAPI(api_token=api_token, base_url=base_url)
 
     # Netbox Integration
-    oni_devices_df = oni_db.execute_sqlite_query("select * from master_inventory")
-    oni_device_objects = convert_df_to_devices(oni_devices_df)
+    oni_device_objects = (
+        device
+        for oni_devices_df in oni_db.iter_query_frames("select * from master_inventory")
+        for device in convert_df_to_devices(oni_devices_df)
+    )
 
     # Send devices into Netbox.
     # Assigning 'Unknown' for the Device Type and Device Role
 
-    for device in oni_device_objects[:5]:
+    for device in islice(oni_device_objects, 5):
         netbox_device_dataframe = device.device_to_dataframe()
 
         # Update the 'device_type' column to 'Unknown' if it is None or empty
@@ -1,19 +1,525 @@
 import sqlite3
+import time
+import pandas as pd
+from src.modules.common.json import json_to_file
+from src.modules.sqlite.main import SQLiteManager
 from src.modules.yaml.YamlReader import YamlReader
 import logging
-import sqlite3
-import logging
+
+
+class UnionFind:
+    """Disjoint-set forest with path halving and union by size."""
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, item):
+        self.parent.setdefault(item, item)
+        self.size.setdefault(item, 1)
+        while self.parent[item] != item:
+            self.parent[item] = self.parent[self.parent[item]]
+            item = self.parent[item]
+        return item
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+    def groups(self):
+        components = {}
+        for item in self.parent:
+            components.setdefault(self.find(item), []).append(item)
+        return list(components.values())
 
 
 class InventoryCleaner:
-    def __init__(self, db_path):
-        self.conn = sqlite3.connect(db_path)
+    RESOLVERS = ["union_find", "vectorized", "sql", "pairwise"]
+    STAGING_TABLES = [
+        "cleaner_keys",
+        "cleaner_member_keys",
+        "cleaner_members",
+        "cleaner_merged",
+    ]
+    MERGE_STRATEGIES = ["latest", "earliest", "min", "max"]
+    # Source rows merged into another inventory row, which builds must not insert again.
+    MERGES_TABLE = "inventory_merges"
+
+    def __init__(
+        self,
+        db_path=None,
+        table="master_inventory",
+        db=None,
+        resolver="union_find",
+        match_columns=None,
+        merge_rules=None,
+        run=True,
+    ):
+        # Sharing the SQLiteManager connection lets the cleaner work on a TEMP shadow table.
+        self.owns_db = db is None
+        self.db = db or SQLiteManager(database_path=db_path)
+        self.conn = self.db.get_connection()
+        self.table = table
         self.cursor = self.conn.cursor()
         self.purge_criteria = ["ipv4", "physical_address", "hostname"]
-        self.clean_inventory(filters=["ipv4"])
-        self.clean_inventory(filters=["physical_address"])
-        self.purge_empty_rows()
-        self.close_connection()
+        self.match_columns = match_columns or ["ipv4", "physical_address"]
+        self.merge_rules = {"first_seen": "min", **(merge_rules or {})}
+        if resolver not in self.RESOLVERS:
+            raise ValueError(f"resolver must be one of {self.RESOLVERS}.")
+        self.resolver = resolver
+        self.report = None
+
+        if run:
+            self.clean()
+            self.close_connection()
+
+    def clean(self):
+        """
+        Merge duplicate rows and purge rows missing any of the purge criteria.
+
+        Returns:
+            dict: A report of what was changed, with per-phase timings.
+        """
+        total_rows = self.count_rows()
+        timings = {}
+        component_sizes = None
+        if self.resolver == "pairwise":
+            started = time.perf_counter()
+            self.clean_inventory(filters=["ipv4"])
+            self.clean_inventory(filters=["physical_address"])
+            timings["merge"] = time.perf_counter() - started
+            rows_removed = total_rows - self.count_rows()
+        elif self.resolver == "sql":
+            timings.update(self.stage_duplicates(self.match_columns))
+            component_sizes = self.staged_component_sizes()
+            started = time.perf_counter()
+            rows_removed = self.apply_staged_merges()
+            timings["merge"] += time.perf_counter() - started
+        else:
+            merge_plan = self.plan_merges(
+                self.match_columns, vectorized=self.resolver == "vectorized"
+            )
+            timings.update(merge_plan["timings"])
+            component_sizes = self.component_sizes(merge_plan["components"])
+            started = time.perf_counter()
+            rows_removed = self.apply_merges(merge_plan)
+            timings["merge"] += time.perf_counter() - started
+
+        started = time.perf_counter()
+        rows_purged = self.purge_empty_rows()
+        timings["purge"] = time.perf_counter() - started
+
+        self.report = self.build_report(
+            total_rows,
+            component_sizes,
+            rows_removed,
+            rows_purged,
+            timings,
+            dry_run=False,
+        )
+        return self.report
+
+    def plan(self):
+        """
+        Compute the merge set and purge set without writing anything.
+
+        The plan uses union-find identities, or the TEMP staging tables with the sql
+        resolver; with the vectorized and sql resolvers the merged values follow the
+        merge rules.
+
+        Returns:
+            dict: A report of merged component counts, rows to purge and per-phase timings.
+        """
+        total_rows = self.count_rows()
+        if self.resolver == "sql":
+            timings = self.stage_duplicates(self.match_columns)
+            component_sizes = self.staged_component_sizes()
+            rows_removed = sum(
+                (int(size) - 1) * count for size, count in component_sizes.items()
+            )
+            started = time.perf_counter()
+            rows_to_purge = self.count_staged_rows_to_purge()
+            timings["purge"] = time.perf_counter() - started
+            self.drop_staging_tables()
+        else:
+            merge_plan = self.plan_merges(
+                self.match_columns, vectorized=self.resolver == "vectorized"
+            )
+            timings = dict(merge_plan["timings"])
+            component_sizes = self.component_sizes(merge_plan["components"])
+            rows_removed = len(merge_plan["deletes"])
+            started = time.perf_counter()
+            rows_to_purge = self.count_rows_to_purge(merge_plan)
+            timings["purge"] = time.perf_counter() - started
+
+        self.report = self.build_report(
+            total_rows,
+            component_sizes,
+            rows_removed,
+            rows_to_purge,
+            timings,
+            dry_run=True,
+        )
+        return self.report
+
+    @staticmethod
+    def component_sizes(components):
+        component_sizes = {}
+        for component in components:
+            size = str(len(component))
+            component_sizes[size] = component_sizes.get(size, 0) + 1
+        return component_sizes
+
+    def build_report(
+        self, total_rows, component_sizes, rows_removed, rows_purged, timings, dry_run
+    ):
+        return {
+            "table": self.table,
+            "resolver": self.resolver,
+            "dry_run": dry_run,
+            "rows": total_rows,
+            "duplicate_groups": (
+                sum(component_sizes.values()) if component_sizes is not None else None
+            ),
+            "component_sizes": component_sizes,
+            "rows_removed_by_merge": rows_removed,
+            "rows_to_purge" if dry_run else "rows_purged": rows_purged,
+            "timings": {phase: round(seconds, 6) for phase, seconds in timings.items()},
+        }
+
+    def export_report(self, file_path):
+        """
+        Write the last plan() or clean() report to a JSON file.
+        """
+        json_to_file(self.report, file_path)
+
+    def count_rows(self):
+        self.cursor.execute(f"SELECT COUNT(*) FROM {self.table}")
+        return self.cursor.fetchone()[0]
+
+    def count_rows_to_purge(self, merge_plan):
+        """
+        Count the rows purge_empty_rows would delete once the merge plan is applied.
+        """
+        self.cursor.execute(
+            f"SELECT id FROM {self.table} WHERE {self.purge_conditions()}"
+        )
+        merged_ids = {
+            row_id for component in merge_plan["components"] for row_id in component
+        }
+        rows_to_purge = sum(
+            1 for (row_id,) in self.cursor.fetchall() if row_id not in merged_ids
+        )
+
+        purge_positions = [
+            merge_plan["columns"].index(column)
+            for column in self.purge_criteria
+            if column in merge_plan["columns"]
+        ]
+        for update in merge_plan["updates"]:
+            if any(update[position] in (None, "") for position in purge_positions):
+                rows_to_purge += 1
+        return rows_to_purge
+
+    def find_components(self, match_columns, rows=None):
+        """
+        Group rows that share a non-empty value in any of the match columns.
+
+        Only the id and match columns are loaded, in a single scan. Rows are connected
+        transitively, so A-B sharing an ipv4 and B-C sharing a physical_address end up
+        in one component.
+
+        Args:
+            match_columns (list): The columns that identify a device.
+            rows (iterable): Optional (id, *match_columns) tuples already in memory.
+
+        Returns:
+            list: Lists of row ids, one per component with more than one row.
+        """
+        if rows is None:
+            self.cursor.execute(
+                f"SELECT id, {', '.join(match_columns)} FROM {self.table}"
+            )
+            rows = self.cursor.fetchall()
+        union_find = UnionFind()
+        first_seen_with = {}
+        for row in rows:
+            row_id = row[0]
+            union_find.find(row_id)
+            for column, value in zip(match_columns, row[1:]):
+                if value in (None, ""):
+                    continue
+                key = (column, value)
+                if key in first_seen_with:
+                    union_find.union(first_seen_with[key], row_id)
+                else:
+                    first_seen_with[key] = row_id
+        return [sorted(group) for group in union_find.groups() if len(group) > 1]
+
+    @staticmethod
+    def merge_rows(rows, columns):
+        """
+        Merge duplicate rows into one, using the same rules as merge_and_delete.
+
+        For each column the value from the row with the latest 'last_seen' wins unless it
+        is empty, in which case the next latest non-empty value is used. 'first_seen' is
+        the earliest value of the group.
+
+        Args:
+            rows (list): Row dictionaries keyed by column name, including 'id'.
+            columns (list): The columns to merge.
+
+        Returns:
+            dict: The merged column values.
+        """
+        ordered = sorted(
+            rows, key=lambda row: (row.get("last_seen") or 0, row["id"]), reverse=True
+        )
+        merged = {}
+        for column in columns:
+            merged[column] = next(
+                (row[column] for row in ordered if row[column] not in (None, "")),
+                ordered[0][column],
+            )
+        if "first_seen" in columns:
+            first_seen = [row["first_seen"] for row in rows if row["first_seen"]]
+            merged["first_seen"] = min(first_seen) if first_seen else None
+        return merged
+
+    def plan_merges(self, match_columns, vectorized=False):
+        """
+        Work out every merge without writing anything.
+
+        Each component keeps its lowest id, which receives the merged values; the other
+        rows of the component are to be deleted.
+
+        Args:
+            match_columns (list): The columns that identify a device.
+            vectorized (bool): Merge with pandas group-by and the merge rules instead of
+                merging row by row in Python.
+
+        Returns:
+            dict: The 'components', the merged 'columns', the 'updates' (merged values
+                followed by the id to update), the 'deletes' (id tuples) and the
+                'timings' of the duplicate discovery and merge phases.
+        """
+        merge_plan = {
+            "components": [],
+            "columns": [],
+            "updates": [],
+            "deletes": [],
+            "timings": {},
+        }
+
+        started = time.perf_counter()
+        if vectorized:
+            frame = pd.read_sql_query(f"SELECT * FROM {self.table}", self.conn)
+            components = self.find_components(
+                match_columns,
+                rows=frame[["id"] + match_columns].itertuples(index=False, name=None),
+            )
+        else:
+            components = self.find_components(match_columns)
+        merge_plan["timings"]["duplicate_discovery"] = time.perf_counter() - started
+        merge_plan["components"] = components
+        if not components:
+            merge_plan["timings"]["merge"] = 0.0
+            return merge_plan
+
+        started = time.perf_counter()
+        columns = self.get_merge_columns()
+        if vectorized:
+            updates = self.merge_components_vectorized(frame, components, columns)
+        else:
+            updates = self.merge_components(components, columns)
+
+        merge_plan["columns"] = columns
+        merge_plan["updates"] = updates
+        merge_plan["deletes"] = [
+            (row_id,) for component in components for row_id in component[1:]
+        ]
+        merge_plan["timings"]["merge"] = time.perf_counter() - started
+        return merge_plan
+
+    def get_merge_columns(self):
+        self.cursor.execute(f"PRAGMA table_info({self.table})")
+        return [
+            info[1]
+            for info in self.cursor.fetchall()
+            if info[1] not in ("id", "source", "source_id")
+        ]
+
+    def merge_components(self, components, columns):
+        """
+        Merge each component row by row with merge_rows.
+
+        Returns:
+            list: The merged column values followed by the id of the row to update.
+        """
+        ids = [row_id for component in components for row_id in component]
+        rows = {}
+        # Stay well below SQLite's bound parameter limit.
+        for start in range(0, len(ids), 500):
+            chunk = ids[start : start + 500]
+            self.cursor.execute(
+                f"SELECT id, {', '.join(columns)} FROM {self.table} WHERE id IN ({', '.join('?' for _ in chunk)})",
+                chunk,
+            )
+            for row in self.cursor.fetchall():
+                rows[row[0]] = dict(zip(["id"] + columns, row))
+
+        updates = []
+        for component in components:
+            merged = self.merge_rows([rows[row_id] for row_id in component], columns)
+            updates.append(
+                tuple(merged[column] for column in columns) + (component[0],)
+            )
+        return updates
+
+    def merge_components_vectorized(self, frame, components, columns):
+        """
+        Merge all components at once with merge_groups.
+
+        Returns:
+            list: The merged column values followed by the id of the row to update.
+        """
+        group_of = {
+            row_id: component[0] for component in components for row_id in component
+        }
+        duplicates = frame[frame["id"].isin(group_of.keys())].copy()
+        duplicates["group_id"] = duplicates["id"].map(group_of)
+        duplicates[columns] = duplicates[columns].replace("", None)
+
+        merged = self.merge_groups(duplicates, columns).astype(object)
+        merged = merged.where(merged.notna(), None)
+        return [
+            tuple(self.to_sql_value(value) for value in values)
+            + (self.to_sql_value(group_id),)
+            for group_id, values in zip(merged.index, merged.itertuples(index=False))
+        ]
+
+    @classmethod
+    def create_merges_table(cls, conn):
+        """
+        Create the table recording which source rows were merged into which inventory row.
+
+        Every member of a merge is recorded, the surviving row included, with the id of
+        the row it was merged into and the last_seen it had when it was merged, so
+        InventoryManager can tell when a member's source row changed since.
+
+        Args:
+            conn: The SQLite connection.
+        """
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {cls.MERGES_TABLE} (
+                inventory TEXT,
+                source TEXT,
+                source_id INTEGER,
+                merged_into INTEGER,
+                last_seen INTEGER,
+                PRIMARY KEY (inventory, source, source_id)
+            )
+            """
+        )
+
+    def get_source_seen_column(self):
+        """
+        Return the column recorded as a member's last_seen, or None if the table does not
+        keep the source row of its rows.
+        """
+        self.cursor.execute(f"PRAGMA table_info({self.table})")
+        columns = {info[1] for info in self.cursor.fetchall()}
+        if not {"source", "source_id"} <= columns:
+            return None
+        return "last_seen" if "last_seen" in columns else "NULL"
+
+    def record_merges(self, merges):
+        """
+        Record the rows about to be merged as members of their survivor.
+
+        Must run before the survivor is updated, so each member is recorded with its own
+        last_seen. Rows merged earlier into a row that is now deleted move on to its
+        survivor, and keep the last_seen they were recorded with.
+
+        Args:
+            merges (list): (id, survivor id) tuples of the rows to delete.
+        """
+        last_seen = self.get_source_seen_column()
+        if last_seen is None:
+            return
+        self.create_merges_table(self.conn)
+        self.cursor.executemany(
+            f"""
+            UPDATE {self.MERGES_TABLE} SET merged_into = ?
+            WHERE inventory = ? AND merged_into = ?
+            """,
+            [(survivor_id, self.table, row_id) for row_id, survivor_id in merges],
+        )
+        members = {row_id: survivor_id for row_id, survivor_id in merges}
+        members.update({survivor_id: survivor_id for survivor_id in members.values()})
+        self.cursor.executemany(
+            f"""
+            INSERT OR IGNORE INTO {self.MERGES_TABLE}
+                (inventory, source, source_id, merged_into, last_seen)
+            SELECT ?, source, source_id, ?, {last_seen} FROM {self.table}
+            WHERE id = ? AND source_id IS NOT NULL
+            """,
+            [
+                (self.table, survivor_id, row_id)
+                for row_id, survivor_id in members.items()
+            ],
+        )
+
+    def apply_merges(self, merge_plan):
+        """
+        Write a merge plan in one transaction.
+
+        Returns:
+            int: The number of rows removed.
+        """
+        if not merge_plan["components"]:
+            return 0
+
+        assignments = ", ".join(f"{column} = ?" for column in merge_plan["columns"])
+        try:
+            with self.db.transaction():
+                self.record_merges(
+                    [
+                        (row_id, component[0])
+                        for component in merge_plan["components"]
+                        for row_id in component[1:]
+                    ]
+                )
+                self.cursor.executemany(
+                    f"UPDATE {self.table} SET {assignments} WHERE id = ?",
+                    merge_plan["updates"],
+                )
+                self.cursor.executemany(
+                    f"DELETE FROM {self.table} WHERE id = ?", merge_plan["deletes"]
+                )
+        except sqlite3.Error as e:
+            logging.error(f"Failed to merge duplicate rows: {str(e)}")
+            raise
+
+        logging.info(
+            f"Merged {len(merge_plan['components'])} duplicate groups, removed {len(merge_plan['deletes'])} rows"
+        )
+        return len(merge_plan["deletes"])
+
+    def resolve_duplicates(self, match_columns):
+        """
+        Merge every group of duplicate rows in a single pass and a single transaction.
+
+        Returns:
+            int: The number of rows removed.
+        """
+        return self.apply_merges(self.plan_merges(match_columns))
 
     def clean_inventory(self, filters=None):
         while True:
@@ -30,8 +536,8 @@ class InventoryCleaner:
             f"""
             SELECT t1.id, t1.ipv4, t1.ipv6, t1.hostname, t1.physical_address, t1.interface_name, t1.guid_hash, t1.description, t1.device_type, t1.vendor, t1.first_seen, t1.last_seen,
                    t2.id, t2.ipv4, t2.ipv6, t2.hostname, t2.physical_address, t2.interface_name, t2.guid_hash, t2.description, t2.device_type, t2.vendor, t2.first_seen, t2.last_seen
-            FROM master_inventory t1
-            JOIN master_inventory t2 ON {join_condition} AND t1.id < t2.id
+            FROM {self.table} t1
+            JOIN {self.table} t2 ON {join_condition} AND t1.id < t2.id
             LIMIT 1
             """
         )
@@ -52,30 +558,372 @@ class InventoryCleaner:
 
         merged_data[9] = min(n_data[9], m_data[9])  # Use the earliest 'first_seen' date
 
-        # Update the database with the merged data
+        with self.db.transaction():
+            self.record_merges([(m_id, n_id)])
+
+            # Update the database with the merged data
+            self.cursor.execute(
+                f"""
+                UPDATE {self.table}
+                SET ipv4 = ?, ipv6 = ?, hostname = ?, physical_address = ?, interface_name = ?, guid_hash = ?, description = ?, device_type = ?, vendor = ?, first_seen = ?, last_seen = ?
+                WHERE id = ?
+                """,
+                (*merged_data, n_id),
+            )
+
+            # Delete the second row
+            self.cursor.execute(f"DELETE FROM {self.table} WHERE id = ?", (m_id,))
+
+    def merge_groups(self, frame, columns):
+        """
+        Merge rows per 'group_id' column by column, following the configured merge rules.
+
+        Empty strings must already be replaced by nulls. A rule is one of:
+          - "latest" (default): first non-null value ordered by last_seen descending
+          - "earliest": first non-null value ordered by last_seen ascending
+          - "min" / "max": the smallest / largest non-null value
+          - {"prefer_sources": [...]}: first non-null value from the earliest listed
+            source, falling back to "latest" for unlisted sources
+
+        Args:
+            frame (DataFrame): The rows to merge, with 'id', 'source', 'last_seen' and 'group_id'.
+            columns (list): The columns to merge.
+
+        Returns:
+            DataFrame: One merged row per group_id.
+        """
+        rule_columns = {}
+        for column in columns:
+            rule = self.merge_rules.get(column, "latest")
+            if isinstance(rule, dict):
+                key = ("prefer_sources", tuple(rule.get("prefer_sources", [])))
+            elif rule in self.MERGE_STRATEGIES:
+                key = (rule, ())
+            else:
+                raise ValueError(f"Unknown merge rule for {column}: {rule}")
+            rule_columns.setdefault(key, []).append(column)
+
+        merged = pd.DataFrame(
+            index=pd.Index(frame["group_id"].unique(), name="group_id")
+        )
+        for (strategy, sources), rule_cols in rule_columns.items():
+            if strategy in ("min", "max"):
+                grouped = frame.groupby("group_id")[rule_cols]
+                merged[rule_cols] = getattr(grouped, strategy)()
+                continue
+
+            ordered = frame.assign(_source_rank=0)
+            if strategy == "prefer_sources":
+                rank = {source: index for index, source in enumerate(sources)}
+                ordered["_source_rank"] = (
+                    ordered["source"].map(rank).fillna(len(rank)).astype(int)
+                )
+            ordered = ordered.sort_values(
+                ["_source_rank", "last_seen", "id"],
+                ascending=[True, strategy == "earliest", strategy == "earliest"],
+                na_position="last",
+            )
+            merged[rule_cols] = ordered.groupby("group_id")[rule_cols].first()
+        return merged[columns]
+
+    def resolve_duplicates_vectorized(self, match_columns):
+        """
+        Merge every group of duplicate rows with pandas group-by operations.
+
+        Identity is resolved with the same union-find as resolve_duplicates, then each
+        column is merged for all groups at once according to the merge rules, and the
+        result is written back in one transaction.
+
+        Returns:
+            int: The number of rows removed.
+        """
+        return self.apply_merges(self.plan_merges(match_columns, vectorized=True))
+
+    def stage_duplicates(self, match_columns):
+        """
+        Materialize the duplicate groups and their merged rows in indexed TEMP tables.
+
+        Nothing is loaded into Python. Keys shared by more than one row are found with
+        GROUP BY ... HAVING COUNT(*) > 1, and group ids (the lowest row id of each
+        component) are propagated between keys and rows with set-based UPDATEs until
+        they settle, which connects rows transitively like the union-find resolver.
+        Staging runs in one transaction, so the groups come from a single snapshot.
+
+        Args:
+            match_columns (list): The columns that identify a device.
+
+        Returns:
+            dict: The timings of the duplicate discovery and merge phases.
+        """
+        timings = {}
+        with self.db.transaction():
+            started = time.perf_counter()
+            self.drop_staging_tables()
+            self.cursor.execute(
+                """
+                CREATE TEMP TABLE cleaner_keys (
+                    key_column TEXT, key_value, group_id INTEGER, round INTEGER DEFAULT 0,
+                    PRIMARY KEY (key_column, key_value)
+                )
+                """
+            )
+            self.cursor.execute(
+                "CREATE TEMP TABLE cleaner_member_keys (id INTEGER, key_column TEXT, key_value)"
+            )
+            for column in match_columns:
+                self.cursor.execute(
+                    f"""
+                    INSERT INTO cleaner_keys (key_column, key_value, group_id)
+                    SELECT '{column}', {column}, MIN(id) FROM {self.table}
+                    WHERE {column} IS NOT NULL AND {column} != ''
+                    GROUP BY {column} HAVING COUNT(*) > 1
+                    """
+                )
+                self.cursor.execute(
+                    f"""
+                    INSERT INTO cleaner_member_keys (id, key_column, key_value)
+                    SELECT t.id, k.key_column, k.key_value
+                    FROM cleaner_keys k JOIN {self.table} t ON t.{column} = k.key_value
+                    WHERE k.key_column = '{column}'
+                    """
+                )
+            self.cursor.execute(
+                "CREATE INDEX temp.idx_cleaner_member_keys_key ON cleaner_member_keys (key_column, key_value)"
+            )
+            self.cursor.execute(
+                "CREATE INDEX temp.idx_cleaner_member_keys_id ON cleaner_member_keys (id)"
+            )
+            self.cursor.execute(
+                """
+                CREATE TEMP TABLE cleaner_members (
+                    id INTEGER PRIMARY KEY, group_id INTEGER, round INTEGER DEFAULT 0
+                )
+                """
+            )
+            self.cursor.execute(
+                """
+                INSERT INTO cleaner_members (id, group_id)
+                SELECT mk.id, MIN(k.group_id)
+                FROM cleaner_member_keys mk JOIN cleaner_keys k USING (key_column, key_value)
+                GROUP BY mk.id
+                """
+            )
+            self.cursor.execute(
+                "CREATE INDEX temp.idx_cleaner_keys_round ON cleaner_keys (round)"
+            )
+            self.cursor.execute(
+                "CREATE INDEX temp.idx_cleaner_members_round ON cleaner_members (round)"
+            )
+            # Only keys and rows whose group id dropped in the previous round can lower
+            # another group id, so each round works on that frontier alone.
+            propagation_round = 0
+            while True:
+                propagation_round += 1
+                self.cursor.execute(
+                    """
+                    UPDATE cleaner_keys SET group_id = g.group_id, round = :round
+                    FROM (
+                        SELECT mk.key_column, mk.key_value, MIN(m.group_id) AS group_id
+                        FROM cleaner_members m JOIN cleaner_member_keys mk USING (id)
+                        WHERE m.round = :round - 1
+                        GROUP BY mk.key_column, mk.key_value
+                    ) AS g
+                    WHERE g.key_column = cleaner_keys.key_column
+                      AND g.key_value = cleaner_keys.key_value
+                      AND g.group_id < cleaner_keys.group_id
+                    """,
+                    {"round": propagation_round},
+                )
+                self.cursor.execute(
+                    """
+                    UPDATE cleaner_members SET group_id = g.group_id, round = :round
+                    FROM (
+                        SELECT mk.id, MIN(k.group_id) AS group_id
+                        FROM cleaner_keys k JOIN cleaner_member_keys mk USING (key_column, key_value)
+                        WHERE k.round = :round
+                        GROUP BY mk.id
+                    ) AS g
+                    WHERE g.id = cleaner_members.id AND g.group_id < cleaner_members.group_id
+                    """,
+                    {"round": propagation_round},
+                )
+                if self.cursor.rowcount == 0:
+                    break
+            self.cursor.execute(
+                "CREATE INDEX temp.idx_cleaner_members_group ON cleaner_members (group_id)"
+            )
+            timings["duplicate_discovery"] = time.perf_counter() - started
+
+            started = time.perf_counter()
+            columns = self.get_merge_columns()
+            self.cursor.execute(
+                f"""
+                CREATE TEMP TABLE cleaner_merged AS
+                SELECT DISTINCT m.group_id, {", ".join(f"{self.merge_window(column)} AS {column}" for column in columns)}
+                FROM cleaner_members m JOIN {self.table} t ON t.id = m.id
+                """
+            )
+            self.cursor.execute(
+                "CREATE UNIQUE INDEX temp.idx_cleaner_merged_group ON cleaner_merged (group_id)"
+            )
+        timings["merge"] = time.perf_counter() - started
+        return timings
+
+    def merge_window(self, column):
+        """
+        Build the window expression that merges one column, following the merge rules.
+        """
+        rule = self.merge_rules.get(column, "latest")
+        if isinstance(rule, dict):
+            sources = rule.get("prefer_sources", [])
+            ranks = " ".join(
+                f"WHEN '{source.replace(chr(39), chr(39) * 2)}' THEN {index}"
+                for index, source in enumerate(sources)
+            )
+            order = (
+                f"CASE t.source {ranks} ELSE {len(sources)} END, " if sources else ""
+            ) + "t.last_seen DESC, t.id DESC"
+        elif rule in ("latest", "earliest"):
+            order = (
+                "t.last_seen DESC, t.id DESC"
+                if rule == "latest"
+                else "t.last_seen IS NULL, t.last_seen, t.id"
+            )
+        elif rule in ("min", "max"):
+            return (
+                f"{rule.upper()}(NULLIF(t.{column}, '')) OVER (PARTITION BY m.group_id)"
+            )
+        else:
+            raise ValueError(f"Unknown merge rule for {column}: {rule}")
+        return (
+            f"FIRST_VALUE(t.{column}) OVER (PARTITION BY m.group_id "
+            f"ORDER BY (t.{column} IS NULL OR t.{column} = ''), {order})"
+        )
+
+    def staged_component_sizes(self):
         self.cursor.execute(
             """
-            UPDATE master_inventory
-            SET ipv4 = ?, ipv6 = ?, hostname = ?, physical_address = ?, interface_name = ?, guid_hash = ?, description = ?, device_type = ?, vendor = ?, first_seen = ?, last_seen = ?, source = 'synthetic'
-            WHERE id = ?
+            SELECT size, COUNT(*) FROM (
+                SELECT COUNT(*) AS size FROM cleaner_members GROUP BY group_id
+            ) GROUP BY size
+            """
+        )
+        return {str(size): count for size, count in self.cursor.fetchall()}
+
+    def count_staged_rows_to_purge(self):
+        """
+        Count the rows purge_empty_rows would delete once the staged merges are applied.
+        """
+        conditions = self.purge_conditions()
+        self.cursor.execute(
+            f"""
+            SELECT
+                (SELECT COUNT(*) FROM {self.table}
+                 WHERE ({conditions}) AND id NOT IN (SELECT id FROM cleaner_members)),
+                (SELECT COUNT(*) FROM cleaner_merged WHERE {conditions})
+            """
+        )
+        return sum(self.cursor.fetchone())
+
+    def apply_staged_merges(self):
+        """
+        Write the staged merges with one set-based UPDATE and one DELETE.
+
+        Returns:
+            int: The number of rows removed.
+        """
+        columns = self.get_merge_columns()
+        assignments = ", ".join(
+            f"{column} = cleaner_merged.{column}" for column in columns
+        )
+        try:
+            with self.db.transaction():
+                self.record_staged_merges()
+                self.cursor.execute(
+                    f"""
+                    UPDATE {self.table} SET {assignments}
+                    FROM cleaner_merged WHERE {self.table}.id = cleaner_merged.group_id
+                    """
+                )
+                groups = self.cursor.rowcount
+                self.cursor.execute(
+                    f"""
+                    DELETE FROM {self.table} WHERE id IN (
+                        SELECT id FROM cleaner_members WHERE id != group_id
+                    )
+                    """
+                )
+                rows_removed = self.cursor.rowcount
+        except sqlite3.Error as e:
+            logging.error(f"Failed to merge duplicate rows: {str(e)}")
+            raise
+        finally:
+            self.drop_staging_tables()
+
+        logging.info(f"Merged {groups} duplicate groups, removed {rows_removed} rows")
+        return rows_removed
+
+    def record_staged_merges(self):
+        """
+        Record the staged merges the way record_merges does, with set-based statements.
+        """
+        last_seen = self.get_source_seen_column()
+        if last_seen is None:
+            return
+        self.create_merges_table(self.conn)
+        self.cursor.execute(
+            f"""
+            UPDATE {self.MERGES_TABLE} SET merged_into = m.group_id
+            FROM cleaner_members m
+            WHERE {self.MERGES_TABLE}.inventory = ?
+              AND {self.MERGES_TABLE}.merged_into = m.id AND m.id != m.group_id
             """,
-            (*merged_data, n_id),
+            (self.table,),
+        )
+        self.cursor.execute(
+            f"""
+            INSERT OR IGNORE INTO {self.MERGES_TABLE}
+                (inventory, source, source_id, merged_into, last_seen)
+            SELECT ?, t.source, t.source_id, m.group_id, t.{last_seen}
+            FROM cleaner_members m JOIN {self.table} t ON t.id = m.id
+            WHERE t.source_id IS NOT NULL AND m.group_id IN (
+                SELECT group_id FROM cleaner_members WHERE id != group_id
+            )
+            """,
+            (self.table,),
         )
-        self.conn.commit()
 
-        # Delete the second row
-        self.cursor.execute("DELETE FROM master_inventory WHERE id = ?", (m_id,))
-        self.conn.commit()
+    def drop_staging_tables(self):
+        for table in self.STAGING_TABLES:
+            self.cursor.execute(f"DROP TABLE IF EXISTS temp.{table}")
 
-    def purge_empty_rows(self):
-        conditions = " OR ".join(
+    @staticmethod
+    def to_sql_value(value):
+        """
+        Convert pandas/NumPy scalars to values sqlite3 can bind.
+        """
+        if hasattr(value, "item"):
+            value = value.item()
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
+
+    def purge_conditions(self):
+        return " OR ".join(
             [f"{col} IS NULL OR {col} = ''" for col in self.purge_criteria]
         )
-        self.cursor.execute(f"DELETE FROM master_inventory WHERE {conditions}")
-        self.conn.commit()
+
+    def purge_empty_rows(self):
+        with self.db.transaction():
+            self.cursor.execute(
+                f"DELETE FROM {self.table} WHERE {self.purge_conditions()}"
+            )
+        return self.cursor.rowcount
 
     def close_connection(self):
-        self.conn.close()
+        # A shared SQLiteManager belongs to the caller.
+        if self.owns_db:
+            self.db.close()
 
 
 if __name__ == "__main__":
@@ -1,7 +1,11 @@
-import sqlite3
+import re
+import time
 from src.modules.sqlite.main import SQLiteManager
 from src.modules.common.LoggerSetup import LoggerSetup
 from src.modules.yaml.YamlReader import YamlReader
+from src.observius_network_inventory.inventory.InventoryCleaner import (
+    InventoryCleaner,
+)
 
 
 class InventoryManager:
@@ -9,17 +13,66 @@ class InventoryManager:
     A class to manage and build the inventory from multiple database tables.
     """
 
-    def __init__(self, db: SQLiteManager, logger: LoggerSetup, config_path: str):
+    BUILD_MODES = ["sql", "incremental", "python"]
+    SHADOW_STAGING = ["main", "temp"]
+    MASTER_TABLE = "master_inventory"
+    SHADOW_TABLE = "master_inventory_next"
+    WATERMARK_TABLE = "inventory_watermarks"
+    MERGES_TABLE = InventoryCleaner.MERGES_TABLE
+    RELEASED_TABLE = "inventory_released"
+    # Integer key column -> (SQL function, text column it is derived from)
+    INT_KEYS = {
+        "mac_int": ("mac_to_int", "physical_address"),
+        "ipv4_int": ("ip_to_int", "ipv4"),
+    }
+
+    def __init__(
+        self,
+        db: SQLiteManager,
+        logger: LoggerSetup,
+        config_path: str,
+        build_mode: str = None,
+        shadow: bool = None,
+        carry_forward: bool = None,
+    ):
         """
         Initialize the InventoryManager with the database manager, logger, and configuration path.
 
         :param db: An instance of SQLiteManager to manage database operations.
         :param logger: An instance of LoggerSetup for logging.
         :param config_path: Path to the YAML configuration file.
+        :param build_mode: "sql" to rebuild master_inventory inside SQLite with a single
+            INSERT ... SELECT, "incremental" to upsert only source rows changed since the
+            previous build, or "python" to gather rows in Python. Defaults to
+            'database.inventory.build_mode' from the YAML, or "sql".
+        :param shadow: Build into master_inventory_next and publish it with publish_inventory()
+            instead of writing master_inventory in place. Defaults to
+            'database.inventory.shadow.enabled' from the YAML.
+        :param carry_forward: With the "sql" build mode, upsert the source rows into the
+            existing master_inventory rows and retire the rows whose source row is gone,
+            instead of emptying the table and rebuilding it. Defaults to
+            'database.inventory.carry_forward' from the YAML, or False.
         """
         self.db = db
         self.logger = logger
         self.config = YamlReader(config_path).get_value("database")
+        self.inventory_config = self.config.get("inventory") or {}
+        self.build_mode = build_mode or self.inventory_config.get("build_mode", "sql")
+        if self.build_mode not in self.BUILD_MODES:
+            raise ValueError(f"build_mode must be one of {self.BUILD_MODES}.")
+
+        shadow_config = self.inventory_config.get("shadow") or {}
+        self.shadow = shadow_config.get("enabled", False) if shadow is None else shadow
+        self.shadow_staging = shadow_config.get("staging", "main")
+        if self.shadow_staging not in self.SHADOW_STAGING:
+            raise ValueError(f"shadow staging must be one of {self.SHADOW_STAGING}.")
+        self.carry_forward = (
+            self.inventory_config.get("carry_forward", False)
+            if carry_forward is None
+            else carry_forward
+        )
+        self.target_table = self.MASTER_TABLE
+        self.pending_watermarks = []
 
     def gather_data(self):
         """
@@ -51,23 +104,572 @@ class InventoryManager:
         :return: A list of dictionaries containing the table data.
         """
         query = f"SELECT *, '{table_name}' as source FROM {table_name}"
-        conn = sqlite3.connect(self.db.database_path)
-        cursor = conn.cursor()
+        cursor = self.db.get_connection().cursor()
         cursor.execute(query)
         columns = [description[0] for description in cursor.description]
         rows = cursor.fetchall()
-        conn.close()
 
         # Convert rows to list of dictionaries
         data = [dict(zip(columns, row)) for row in rows]
         return data
 
+    def get_table_columns(self, table_name):
+        """
+        Get the columns of a table as they exist in the database, excluding the 'id' column.
+
+        :param table_name: The name of the table.
+        :return: A list of column names.
+        """
+        cursor = self.db.get_connection().cursor()
+        cursor.execute(f"PRAGMA table_info({table_name})")
+        return [info[1] for info in cursor.fetchall() if info[1] != "id"]
+
+    def get_source_tables(self):
+        """
+        Get the tables master_inventory is built from: every YAML table except master_inventory.
+
+        :return: A list of table names.
+        """
+        return [
+            table
+            for table in self.get_table_names_from_yaml()
+            if table not in (self.MASTER_TABLE, self.SHADOW_TABLE)
+        ]
+
+    def build_source_select(self, table_name, master_columns):
+        """
+        Build a SELECT over a source table that yields rows shaped like master_inventory.
+
+        The rows are tagged with the table name as 'source' and the source row id as
+        'source_id', and NULL is emitted for columns the source table does not have.
+
+        :param table_name: The name of the source table.
+        :param master_columns: The master_inventory columns, in insert order.
+        :return: The SELECT statement.
+        """
+        table_columns = {
+            column.lower() for column in self.get_table_columns(table_name)
+        }
+        expressions = []
+        for column in master_columns:
+            if column == "source":
+                expressions.append(f"'{table_name}' AS source")
+            elif column == "source_id":
+                expressions.append("id AS source_id")
+            elif column.lower() in table_columns:
+                expressions.append(column)
+            else:
+                expressions.append(f"NULL AS {column}")
+        return f"SELECT {', '.join(expressions)} FROM {table_name}"
+
+    def build_upsert_clause(self, master_columns):
+        """
+        Build the ON CONFLICT clause that updates a master_inventory row from its source row.
+
+        Existing non-NULL values are kept where the source row has none, so enrichment
+        such as the vendor column survives a rebuild.
+
+        :param master_columns: The master_inventory columns.
+        :return: The ON CONFLICT clause.
+        """
+        assignments = ", ".join(
+            f"{column} = COALESCE(excluded.{column}, {column})"
+            for column in master_columns
+            if column not in ("source", "source_id")
+        )
+        return f"ON CONFLICT (source, source_id) DO UPDATE SET {assignments}"
+
+    def build_unmerged_condition(self, table_name):
+        """
+        Build the condition that leaves out the source rows of the rows InventoryCleaner
+        merged, the surviving row's own included, so a merged row keeps its merged values.
+
+        :param table_name: The name of the source table.
+        :return: The SQL condition.
+        """
+        return (
+            f"NOT EXISTS (SELECT 1 FROM {self.MERGES_TABLE} merges "
+            f"WHERE merges.inventory = '{self.target_table}' "
+            f"AND merges.source = '{table_name}' AND merges.source_id = {table_name}.id)"
+        )
+
+    def build_inventory_query(self, tables=None, upsert=False):
+        """
+        Build one INSERT INTO master_inventory ... SELECT ... UNION ALL ... statement over the source tables.
+
+        :param tables: The source tables. Defaults to get_source_tables().
+        :param upsert: Update rows already present for the same (source, source_id)
+            instead of inserting duplicates, and skip the source rows of merged rows.
+        :return: The SQL statement, or None if there are no source tables.
+        """
+        if tables is None:
+            tables = self.get_source_tables()
+        if not tables:
+            return None
+
+        master_columns = self.get_table_columns(self.MASTER_TABLE)
+        selects = " UNION ALL ".join(
+            self.build_source_select(table, master_columns)
+            + (f" WHERE {self.build_unmerged_condition(table)}" if upsert else "")
+            for table in tables
+        )
+        query = f"INSERT INTO {self.target_table} ({', '.join(master_columns)}) "
+        if upsert:
+            # The WHERE clause resolves the parsing ambiguity between a SELECT and ON CONFLICT.
+            query += f"SELECT * FROM ({selects}) WHERE true "
+            query += self.build_upsert_clause(master_columns)
+        else:
+            query += selects
+        return query
+
+    def build_inventory_sql(self):
+        """
+        Build the master inventory entirely inside SQLite, without passing rows through Python.
+
+        With carry_forward the existing rows are kept: rows from the same source row are
+        updated in place, rows whose source row is gone are retired and merged rows are
+        left alone unless one of their members changed, see split_merges(). Otherwise the
+        table is emptied and rebuilt.
+        """
+        query = self.build_inventory_query(upsert=self.carry_forward)
+
+        with self.db.transaction() as conn:
+            InventoryCleaner.create_merges_table(conn)
+            if self.carry_forward:
+                self.split_merges(conn)
+                retired = self.retire_unlisted_sources(conn)
+                for table in self.get_source_tables():
+                    retired += self.retire_rows(conn, table)
+                if retired:
+                    self.logger.info(f"Retired {retired} rows from {self.target_table}")
+            else:
+                conn.execute(f"DELETE FROM {self.target_table}")
+                self.clear_merges(conn)
+            if query:
+                cursor = conn.execute(query)
+                self.logger.info(
+                    f"Inserted {cursor.rowcount} rows into {self.target_table}"
+                )
+
+    def retire_rows(self, conn, table):
+        """
+        Delete the target rows built from a source table whose source row no longer exists.
+
+        :param conn: The connection of the build transaction.
+        :param table: The source table.
+        :return: The number of rows deleted.
+        """
+        cursor = conn.execute(
+            f"""
+            DELETE FROM {self.target_table}
+            WHERE source = ? AND source_id IS NOT NULL
+              AND source_id NOT IN (SELECT id FROM {table})
+            """,
+            (table,),
+        )
+        return cursor.rowcount
+
+    def retire_unlisted_sources(self, conn):
+        """
+        Delete the target rows whose source is not one of the source tables, such as rows
+        of a source table no longer listed or the 'synthetic' rows older versions of
+        InventoryCleaner left for merged duplicates.
+
+        :param conn: The connection of the build transaction.
+        :return: The number of rows deleted.
+        """
+        tables = self.get_source_tables()
+        placeholders = ", ".join("?" for _ in tables)
+        cursor = conn.execute(
+            f"""
+            DELETE FROM {self.target_table}
+            WHERE source IS NULL OR source NOT IN ({placeholders})
+            """,
+            tables,
+        )
+        return cursor.rowcount
+
+    def split_merges(self, conn):
+        """
+        Split up the merged rows whose members changed since InventoryCleaner merged them.
+
+        A merged row is split up when it no longer exists, or when the source row of one
+        of its members is gone or has another last_seen than the member was merged with.
+        The merged row is deleted, its merges are forgotten and its members are listed in
+        the TEMP table inventory_released, so the build inserts them as rows of their own
+        again and the next cleaning merges them from their current values, as it would
+        after a full rebuild.
+
+        :param conn: The connection of the build transaction.
+        :return: The number of merged rows split up.
+        """
+        tables = self.get_source_tables()
+        conn.execute("DROP TABLE IF EXISTS temp.inventory_split")
+        conn.execute(
+            "CREATE TEMP TABLE inventory_split (merged_into INTEGER PRIMARY KEY)"
+        )
+        for table in tables:
+            changed = "source_row.id IS NULL"
+            if "last_seen" in self.get_table_columns(table):
+                changed += " OR source_row.last_seen IS NOT merges.last_seen"
+            conn.execute(
+                f"""
+                INSERT OR IGNORE INTO inventory_split (merged_into)
+                SELECT merges.merged_into
+                FROM {self.MERGES_TABLE} merges
+                LEFT JOIN {table} source_row ON source_row.id = merges.source_id
+                WHERE merges.inventory = ? AND merges.source = ? AND ({changed})
+                """,
+                (self.target_table, table),
+            )
+        placeholders = ", ".join("?" for _ in tables)
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO inventory_split (merged_into)
+            SELECT merged_into FROM {self.MERGES_TABLE}
+            WHERE inventory = ? AND (
+                source NOT IN ({placeholders})
+                OR merged_into NOT IN (SELECT id FROM {self.target_table})
+            )
+            """,
+            [self.target_table, *tables],
+        )
+
+        conn.execute(f"DROP TABLE IF EXISTS temp.{self.RELEASED_TABLE}")
+        conn.execute(
+            f"""
+            CREATE TEMP TABLE {self.RELEASED_TABLE} (
+                source TEXT, source_id INTEGER, PRIMARY KEY (source, source_id)
+            )
+            """
+        )
+        conn.execute(
+            f"""
+            INSERT INTO {self.RELEASED_TABLE} (source, source_id)
+            SELECT source, source_id FROM {self.MERGES_TABLE}
+            WHERE inventory = ? AND merged_into IN (SELECT merged_into FROM inventory_split)
+            """,
+            (self.target_table,),
+        )
+        conn.execute(
+            f"""
+            DELETE FROM {self.MERGES_TABLE}
+            WHERE inventory = ? AND merged_into IN (SELECT merged_into FROM inventory_split)
+            """,
+            (self.target_table,),
+        )
+        cursor = conn.execute(
+            f"""
+            DELETE FROM {self.target_table}
+            WHERE id IN (SELECT merged_into FROM inventory_split)
+            """
+        )
+        conn.execute("DROP TABLE temp.inventory_split")
+        if cursor.rowcount:
+            self.logger.info(
+                f"Split up {cursor.rowcount} merged rows of {self.target_table}"
+            )
+        return cursor.rowcount
+
+    def clear_merges(self, conn):
+        """
+        Forget every merge into the target table, once it has been emptied.
+
+        :param conn: The connection of the build transaction.
+        """
+        conn.execute(
+            f"DELETE FROM {self.MERGES_TABLE} WHERE inventory = ?",
+            (self.target_table,),
+        )
+
+    def get_watermarks(self):
+        """
+        Get the per-source high-water marks recorded by the previous incremental build.
+
+        :return: A dictionary mapping source table to a (last_seen, max_id) tuple.
+        """
+        conn = self.db.get_connection()
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS {self.WATERMARK_TABLE} (
+                source TEXT PRIMARY KEY,
+                last_seen INTEGER,
+                max_id INTEGER,
+                updated_at INTEGER
+            )
+            """
+        )
+        cursor = conn.execute(
+            f"SELECT source, last_seen, max_id FROM {self.WATERMARK_TABLE}"
+        )
+        return {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+
+    def save_watermarks(self, conn):
+        """
+        Store the watermarks collected by the last incremental build.
+
+        :param conn: The connection of the transaction the build is committed in.
+        """
+        for source, last_seen, max_id in self.pending_watermarks:
+            conn.execute(
+                f"""
+                INSERT INTO {self.WATERMARK_TABLE} (source, last_seen, max_id, updated_at)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (source) DO UPDATE SET
+                    last_seen = excluded.last_seen,
+                    max_id = excluded.max_id,
+                    updated_at = excluded.updated_at
+                """,
+                (source, last_seen, max_id, int(time.time())),
+            )
+        self.pending_watermarks = []
+
+    def build_inventory_incremental(self):
+        """
+        Update master_inventory with only the source rows that changed since the previous build.
+
+        A source row has changed when its id is above the recorded max_id (new row) or its
+        last_seen is above the recorded last_seen watermark. Changed rows are upserted on
+        (source, source_id) and master rows whose source row no longer exists are retired.
+        The source rows of merged rows are skipped, unless split_merges() split the row
+        up, in which case all of its members are inserted again.
+        """
+        watermarks = self.get_watermarks()
+        master_columns = self.get_table_columns(self.MASTER_TABLE)
+        upsert_clause = self.build_upsert_clause(master_columns)
+
+        self.pending_watermarks = []
+        with self.db.transaction() as conn:
+            InventoryCleaner.create_merges_table(conn)
+            self.split_merges(conn)
+            for table in self.get_source_tables():
+                table_columns = self.get_table_columns(table)
+                last_seen, max_id = watermarks.get(table, (None, None))
+
+                conditions = ["id > ?"]
+                params = [max_id or 0]
+                if "last_seen" in table_columns:
+                    conditions.append("last_seen > ?")
+                    params.append(last_seen or 0)
+                conditions.append(
+                    f"id IN (SELECT source_id FROM {self.RELEASED_TABLE} WHERE source = ?)"
+                )
+                params.append(table)
+
+                select = self.build_source_select(table, master_columns)
+                cursor = conn.execute(
+                    f"""
+                    INSERT INTO {self.target_table} ({', '.join(master_columns)})
+                    {select} WHERE ({' OR '.join(conditions)})
+                      AND {self.build_unmerged_condition(table)}
+                    {upsert_clause}
+                    """,
+                    params,
+                )
+                upserted = cursor.rowcount
+
+                retired = self.retire_rows(conn, table)
+
+                watermark_last_seen = (
+                    "MAX(last_seen)" if "last_seen" in table_columns else "NULL"
+                )
+                new_last_seen, new_max_id = conn.execute(
+                    f"SELECT {watermark_last_seen}, MAX(id) FROM {table}"
+                ).fetchone()
+                self.pending_watermarks.append((table, new_last_seen, new_max_id))
+                if upserted or retired:
+                    self.logger.info(
+                        f"{table}: upserted {upserted} and retired {retired} rows in {self.target_table}"
+                    )
+
+            # A shadow build only advances the watermarks once it is published.
+            if self.target_table == self.MASTER_TABLE:
+                self.save_watermarks(conn)
+
+    def get_master_indexes(self):
+        """
+        Get the index definitions declared for master_inventory in the YAML.
+
+        :return: A list of index definitions.
+        """
+        for table in self.config["tables"]:
+            if table["name"] == self.MASTER_TABLE:
+                return table["schema"].get("indexes", [])
+        return []
+
+    def prepare_shadow(self, seed=False):
+        """
+        Create an empty master_inventory_next with the same schema and indexes as master_inventory.
+
+        With 'staging: temp' the shadow is a TEMP table held in memory on the manager's
+        connection, so the heavy build, clean and enrich work does not touch the main
+        database file until the result is published.
+
+        :param seed: Copy the current master_inventory rows into the shadow table.
+        """
+        conn = self.db.get_connection()
+        table_sql = conn.execute(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?",
+            (self.MASTER_TABLE,),
+        ).fetchone()[0]
+        temp = "TEMP " if self.shadow_staging == "temp" else ""
+        shadow_sql = re.sub(
+            rf"^CREATE TABLE\s+\"?{self.MASTER_TABLE}\"?",
+            f"CREATE {temp}TABLE {self.SHADOW_TABLE}",
+            table_sql,
+        )
+
+        if temp:
+            conn.execute("PRAGMA temp_store = MEMORY")
+        with self.db.transaction() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {self.SHADOW_TABLE}")
+            conn.execute(shadow_sql)
+            InventoryCleaner.create_merges_table(conn)
+            conn.execute(
+                f"DELETE FROM {self.MERGES_TABLE} WHERE inventory = ?",
+                (self.SHADOW_TABLE,),
+            )
+            if seed:
+                conn.execute(
+                    f"INSERT INTO {self.SHADOW_TABLE} SELECT * FROM {self.MASTER_TABLE}"
+                )
+                conn.execute(
+                    f"""
+                    INSERT INTO {self.MERGES_TABLE}
+                        (inventory, source, source_id, merged_into, last_seen)
+                    SELECT ?, source, source_id, merged_into, last_seen
+                    FROM {self.MERGES_TABLE}
+                    WHERE inventory = ?
+                    """,
+                    (self.SHADOW_TABLE, self.MASTER_TABLE),
+                )
+        self.db.sync_indexes(
+            self.SHADOW_TABLE, self.get_master_indexes(), self.get_shadow_index_prefix()
+        )
+        self.target_table = self.SHADOW_TABLE
+
+    def get_shadow_index_prefix(self):
+        """
+        Get the prefix of the master_inventory_next index names.
+
+        The shadow's indexes are built before the swap and keep their names once it is
+        renamed, so master_inventory alternates between idx_master_inventory_* and
+        idx_master_inventory_next_* indexes, and the shadow takes the names it is not using.
+
+        :return: The index name prefix.
+        """
+        shadow_prefix = f"idx_{self.SHADOW_TABLE}_"
+        if any(
+            name.startswith(shadow_prefix)
+            for name in self.db.get_indexes(self.MASTER_TABLE)
+        ):
+            return f"idx_{self.MASTER_TABLE}_"
+        return shadow_prefix
+
+    def publish_inventory(self):
+        """
+        Publish master_inventory_next as master_inventory with an atomic rename swap.
+
+        Readers keep seeing the previous master_inventory until the swap commits. The
+        shadow's indexes are in place before the swap, which only renames the tables.
+        Does nothing when the inventory was built in place.
+        """
+        if self.target_table != self.SHADOW_TABLE:
+            return
+
+        if self.shadow_staging == "temp":
+            # TEMP tables cannot be renamed into the main schema, so copy them over and
+            # index the copy once it is loaded.
+            with self.db.transaction() as conn:
+                table_sql = conn.execute(
+                    "SELECT sql FROM sqlite_temp_master WHERE type = 'table' AND name = ?",
+                    (self.SHADOW_TABLE,),
+                ).fetchone()[0]
+                conn.execute(f"ALTER TABLE temp.{self.SHADOW_TABLE} RENAME TO staged")
+                conn.execute(re.sub(r"^CREATE TEMP TABLE", "CREATE TABLE", table_sql))
+                conn.execute(
+                    f"INSERT INTO main.{self.SHADOW_TABLE} SELECT * FROM temp.staged"
+                )
+                conn.execute("DROP TABLE temp.staged")
+            self.db.sync_indexes(
+                self.SHADOW_TABLE,
+                self.get_master_indexes(),
+                self.get_shadow_index_prefix(),
+            )
+
+        # Left behind if a previous publish stopped before dropping it.
+        with self.db.transaction() as conn:
+            conn.execute(f"DROP TABLE IF EXISTS {self.MASTER_TABLE}_old")
+        with self.db.transaction() as conn:
+            conn.execute(
+                f"ALTER TABLE {self.MASTER_TABLE} RENAME TO {self.MASTER_TABLE}_old"
+            )
+            conn.execute(
+                f"ALTER TABLE {self.SHADOW_TABLE} RENAME TO {self.MASTER_TABLE}"
+            )
+            conn.execute(
+                f"DELETE FROM {self.MERGES_TABLE} WHERE inventory = ?",
+                (self.MASTER_TABLE,),
+            )
+            conn.execute(
+                f"UPDATE {self.MERGES_TABLE} SET inventory = ? WHERE inventory = ?",
+                (self.MASTER_TABLE, self.SHADOW_TABLE),
+            )
+            self.save_watermarks(conn)
+        with self.db.transaction() as conn:
+            conn.execute(f"DROP TABLE {self.MASTER_TABLE}_old")
+
+        self.target_table = self.MASTER_TABLE
+        self.logger.info(f"Published {self.SHADOW_TABLE} as {self.MASTER_TABLE}")
+
     def build_inventory(self):
         """
         Build the master inventory by gathering data from all specified tables and saving it to the master_inventory table.
+
+        With shadow builds enabled the result is written to master_inventory_next; the
+        cleaning and enrichment stages should then run against target_table before
+        publish_inventory() swaps it in.
         """
-        all_data = self.gather_data()
-        self.save_to_master_inventory(all_data)
+        if self.shadow:
+            self.prepare_shadow(
+                seed=self.build_mode == "incremental"
+                or (self.build_mode == "sql" and self.carry_forward)
+            )
+
+        with self.db.unit_of_work():
+            for table_name in self.get_source_tables():
+                self.backfill_int_keys(table_name)
+            if self.build_mode == "sql":
+                self.build_inventory_sql()
+            elif self.build_mode == "incremental":
+                self.build_inventory_incremental()
+            else:
+                all_data = self.gather_data()
+                self.save_to_master_inventory(all_data)
+            self.backfill_int_keys(self.target_table)
+
+    def backfill_int_keys(self, table_name):
+        """
+        Populate missing mac_int / ipv4_int values with the mac_to_int() and ip_to_int()
+        SQL functions, for rows written before the columns existed or by older collectors.
+
+        :param table_name: The name of the table.
+        :return: The number of rows updated.
+        """
+        columns = self.get_table_columns(table_name)
+        assignments, conditions = [], []
+        for key, (function, column) in self.INT_KEYS.items():
+            if key in columns and column in columns:
+                assignments.append(f"{key} = {function}({column})")
+                conditions.append(
+                    f"({key} IS NULL AND {column} IS NOT NULL AND {column} != '')"
+                )
+        if not assignments:
+            return 0
+        cursor = self.db.get_connection().execute(
+            f"UPDATE {table_name} SET {', '.join(assignments)} WHERE {' OR '.join(conditions)}"
+        )
+        return cursor.rowcount
 
     def save_to_master_inventory(self, all_data):
         """
@@ -75,21 +677,22 @@ class InventoryManager:
 
         :param all_data: A list of dictionaries containing all the gathered data.
         """
-        conn = sqlite3.connect(self.db.database_path)
-        cursor = conn.cursor()
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
 
-        # Get the columns of the master_inventory table, excluding the 'id' column
-        cursor.execute("PRAGMA table_info(master_inventory)")
-        columns_info = cursor.fetchall()
-        columns = [info[1] for info in columns_info if info[1] != "id"]
+            # Get the columns of the master_inventory table, excluding the 'id' column
+            cursor.execute(f"PRAGMA table_info({self.target_table})")
+            columns_info = cursor.fetchall()
+            columns = [info[1] for info in columns_info if info[1] != "id"]
 
-        cursor.execute("DELETE FROM master_inventory")
+            cursor.execute(f"DELETE FROM {self.target_table}")
+            InventoryCleaner.create_merges_table(conn)
+            self.clear_merges(conn)
 
-        # Insert data into master_inventory using named columns
-        for device in all_data:
+            # Insert data into master_inventory using named columns
             placeholders = ", ".join([f":{col}" for col in columns])
-            query = f"INSERT INTO master_inventory ({', '.join(columns)}) VALUES ({placeholders})"
-            cursor.execute(query, {col: device.get(col) for col in columns})
-
-        conn.commit()
-        conn.close()
+            query = f"INSERT INTO {self.target_table} ({', '.join(columns)}) VALUES ({placeholders})"
+            cursor.executemany(
+                query,
+                ({col: device.get(col) for col in columns} for device in all_data),
+            )
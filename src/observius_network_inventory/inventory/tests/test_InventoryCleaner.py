@@ -0,0 +1,170 @@
+import json
+import pytest
+from src.modules.sqlite.main import SQLiteManager
+from src.observius_network_inventory.inventory.InventoryCleaner import (
+    InventoryCleaner,
+    UnionFind,
+)
+
+columns = [
+    "source",
+    "ipv4",
+    "ipv6",
+    "hostname",
+    "physical_address",
+    "interface_name",
+    "guid_hash",
+    "description",
+    "device_type",
+    "vendor",
+    "first_seen",
+    "last_seen",
+]
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"))
+    manager.create_table(
+        "master_inventory",
+        [
+            {
+                "column": column,
+                "data_type": "INTEGER" if column.endswith("_seen") else "TEXT",
+            }
+            for column in columns
+        ],
+        unique_constraints=[],
+    )
+    rows = [
+        # 1, 2 and 3 are one device: 1-2 share an ipv4, 2-3 share a MAC.
+        ("source_dns_ad", "10.0.0.1", None, "HOST1", "", 100, 100),
+        ("source_snmp", "10.0.0.1", None, "", "AA:AA", 50, 300),
+        ("source_unifi", "10.0.0.9", "VENDOR", "", "AA:AA", 200, 200),
+        # 4 has no duplicate.
+        ("source_snmp", "10.0.0.2", None, "HOST2", "BB:BB", 10, 10),
+    ]
+    for source, ipv4, vendor, hostname, mac, first_seen, last_seen in rows:
+        manager.execute_sqlite_command(
+            "INSERT INTO master_inventory (source, ipv4, vendor, hostname, physical_address, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (source, ipv4, vendor, hostname, mac, first_seen, last_seen),
+        )
+    yield manager
+    manager.close()
+
+
+def inventory(db):
+    return db.execute_sqlite_command(
+        "SELECT id, source, ipv4, hostname, physical_address, vendor, first_seen, last_seen FROM master_inventory ORDER BY id",
+        (),
+    )
+
+
+def test_union_find_groups():
+    union_find = UnionFind()
+    union_find.union(1, 2)
+    union_find.union(3, 2)
+    union_find.find(4)
+    assert sorted(sorted(group) for group in union_find.groups()) == [[1, 2, 3], [4]]
+
+
+def test_union_find_resolver_merges_transitive_duplicates(db):
+    InventoryCleaner(db=db)
+    assert inventory(db) == [
+        (1, "source_dns_ad", "10.0.0.1", "HOST1", "AA:AA", "VENDOR", 50, 300),
+        (4, "source_snmp", "10.0.0.2", "HOST2", "BB:BB", None, 10, 10),
+    ]
+
+
+def test_invalid_resolver(db):
+    with pytest.raises(ValueError):
+        InventoryCleaner(db=db, resolver="bogus")
+
+
+@pytest.mark.parametrize("resolver", ["vectorized", "sql"])
+def test_resolver_matches_union_find(db, resolver):
+    InventoryCleaner(db=db, resolver=resolver)
+    assert inventory(db) == [
+        (1, "source_dns_ad", "10.0.0.1", "HOST1", "AA:AA", "VENDOR", 50, 300),
+        (4, "source_snmp", "10.0.0.2", "HOST2", "BB:BB", None, 10, 10),
+    ]
+
+
+@pytest.mark.parametrize("resolver", ["vectorized", "sql"])
+def test_resolver_prefer_sources(db, resolver):
+    db.execute_sqlite_command(
+        "UPDATE master_inventory SET hostname = 'SNMPHOST' WHERE id = 2", ()
+    )
+    InventoryCleaner(
+        db=db,
+        resolver=resolver,
+        merge_rules={"hostname": {"prefer_sources": ["source_dns_ad"]}},
+    )
+    assert inventory(db)[0][3] == "HOST1"
+
+
+@pytest.mark.parametrize("resolver", ["union_find", "sql"])
+def test_plan_reports_without_writing(db, tmp_path, resolver):
+    db.execute_sqlite_command(
+        "INSERT INTO master_inventory (source, ipv4, hostname, physical_address) VALUES ('source_snmp', '10.0.0.3', '', 'CC:CC')",
+        (),
+    )
+    before = inventory(db)
+    cleaner = InventoryCleaner(db=db, resolver=resolver, run=False)
+    report = cleaner.plan()
+    assert inventory(db) == before
+    assert report["dry_run"] is True
+    assert report["rows"] == 5
+    assert report["duplicate_groups"] == 1
+    assert report["component_sizes"] == {"3": 1}
+    assert report["rows_removed_by_merge"] == 2
+    assert report["rows_to_purge"] == 1
+    assert set(report["timings"]) == {"duplicate_discovery", "merge", "purge"}
+
+    report_path = tmp_path / "report.json"
+    cleaner.export_report(str(report_path))
+    assert json.loads(report_path.read_text())["rows_to_purge"] == 1
+
+    report = cleaner.clean()
+    assert report["rows_purged"] == 1
+    assert len(inventory(db)) == 2
+
+
+@pytest.mark.parametrize("resolver", InventoryCleaner.RESOLVERS)
+def test_merges_keep_the_survivor_source_row(db, resolver):
+    db.execute_sqlite_command(
+        "ALTER TABLE master_inventory ADD COLUMN source_id INTEGER", ()
+    )
+    db.execute_sqlite_command(
+        "INSERT INTO master_inventory (source, ipv4, hostname, physical_address, first_seen, last_seen) VALUES ('source_dns_ad', '10.0.0.2', 'HOST2', '', 20, 20)",
+        (),
+    )
+    # Source ids repeat across sources; both survivors have source_id 1.
+    for row_id, source_id in [(1, 1), (2, 2), (3, 1), (4, 1), (5, 2)]:
+        db.execute_sqlite_command(
+            "UPDATE master_inventory SET source_id = ? WHERE id = ?",
+            (source_id, row_id),
+        )
+    db.execute_sqlite_command(
+        "CREATE UNIQUE INDEX idx_master_inventory_source_row ON master_inventory (source, source_id)",
+        (),
+    )
+    InventoryCleaner(db=db, resolver=resolver)
+
+    assert [row[:2] for row in inventory(db)] == [
+        (1, "source_dns_ad"),
+        (4, "source_snmp"),
+    ]
+    assert sorted(
+        db.execute_sqlite_command(
+            f"SELECT inventory, source, source_id, merged_into, last_seen FROM {InventoryCleaner.MERGES_TABLE}",
+            (),
+        )
+    ) == [
+        # Every member is recorded with the last_seen it had before the merge.
+        ("master_inventory", "source_dns_ad", 1, 1, 100),
+        ("master_inventory", "source_dns_ad", 2, 4, 20),
+        ("master_inventory", "source_snmp", 1, 4, 10),
+        ("master_inventory", "source_snmp", 2, 1, 300),
+        ("master_inventory", "source_unifi", 1, 1, 200),
+    ]
@@ -0,0 +1,338 @@
+import pytest
+from unittest.mock import MagicMock
+from src.modules.sqlite.main import SQLiteManager
+from src.observius_network_inventory.inventory.InventoryCleaner import (
+    InventoryCleaner,
+)
+from src.observius_network_inventory.inventory.InventoryManager import (
+    InventoryManager,
+)
+
+schema_yaml = """
+database:
+  schemas:
+    source_schema: &source_schema
+      columns:
+        - name: ipv4
+          type: TEXT
+        - name: hostname
+          type: TEXT
+        - name: physical_address
+          type: TEXT
+        - name: first_seen
+          type: INTEGER
+        - name: last_seen
+          type: INTEGER
+      unique_constraints:
+        - columns: ["physical_address", "ipv4"]
+  tables:
+    - name: master_inventory
+      schema:
+        columns:
+          - name: source
+            type: TEXT
+          - name: ipv4
+            type: TEXT
+          - name: hostname
+            type: TEXT
+          - name: physical_address
+            type: TEXT
+          - name: vendor
+            type: TEXT
+          - name: first_seen
+            type: INTEGER
+          - name: last_seen
+            type: INTEGER
+          - name: source_id
+            type: INTEGER
+        indexes:
+          - name: source_row
+            columns: ["source", "source_id"]
+            unique: true
+    - name: source_snmp
+      schema: *source_schema
+    - name: source_dns_ad
+      schema:
+        columns:
+          - name: ipv4
+            type: TEXT
+          - name: hostname
+            type: TEXT
+          - name: first_seen
+            type: INTEGER
+          - name: last_seen
+            type: INTEGER
+        unique_constraints:
+          - columns: ["ipv4", "hostname"]
+"""
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    file_path = tmp_path / "oni.yaml"
+    file_path.write_text(schema_yaml)
+    return str(file_path)
+
+
+@pytest.fixture
+def db(tmp_path, config_path):
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"))
+    manager.create_tables_from_yaml(config_path)
+    manager.bulk_upsert(
+        "source_snmp",
+        [
+            {"ipv4": "10.0.0.1", "physical_address": "AA:AA", "last_seen": 2},
+            {"ipv4": "10.0.0.2", "physical_address": "BB:BB", "last_seen": 2},
+        ],
+        ["physical_address", "ipv4"],
+    )
+    manager.bulk_upsert(
+        "source_dns_ad",
+        [{"ipv4": "10.0.0.1", "hostname": "HOST1", "last_seen": 3}],
+        ["ipv4", "hostname"],
+    )
+    yield manager
+    manager.close()
+
+
+def master_rows(db):
+    return sorted(
+        db.execute_sqlite_command(
+            "SELECT source, ipv4, hostname, physical_address, vendor, last_seen FROM master_inventory",
+            (),
+        ),
+        key=str,
+    )
+
+
+def test_build_inventory_query_emits_null_for_missing_columns(db, config_path):
+    manager = InventoryManager(db=db, logger=MagicMock(), config_path=config_path)
+    query = manager.build_inventory_query()
+    assert "'source_dns_ad' AS source" in query
+    assert "NULL AS physical_address" in query
+    assert query.count("UNION ALL") == 1
+
+
+def test_build_inventory_sql_matches_python(db, config_path):
+    InventoryManager(
+        db=db, logger=MagicMock(), config_path=config_path, build_mode="python"
+    ).build_inventory()
+    python_rows = [row for row in master_rows(db) if row[0] != "master_inventory"]
+
+    db.execute_sqlite_command("DELETE FROM master_inventory", ())
+    manager = InventoryManager(
+        db=db, logger=MagicMock(), config_path=config_path, build_mode="sql"
+    )
+    manager.build_inventory()
+    assert master_rows(db) == python_rows
+    assert len(python_rows) == 3
+
+    # Rebuilding updates rows from the same source row instead of duplicating them.
+    manager.build_inventory()
+    assert master_rows(db) == python_rows
+
+
+@pytest.mark.parametrize("carry_forward", [False, True])
+def test_build_inventory_sql_carry_forward(db, config_path, carry_forward):
+    manager = InventoryManager(
+        db=db,
+        logger=MagicMock(),
+        config_path=config_path,
+        build_mode="sql",
+        carry_forward=carry_forward,
+    )
+    manager.build_inventory()
+    db.execute_sqlite_command(
+        "UPDATE master_inventory SET vendor = 'ACME' WHERE physical_address = 'AA:AA'",
+        (),
+    )
+    db.execute_sqlite_command(
+        "INSERT INTO master_inventory (source, ipv4, physical_address) VALUES ('synthetic', '10.0.0.9', 'FF:FF')",
+        (),
+    )
+    db.execute_sqlite_command(
+        "DELETE FROM source_snmp WHERE physical_address = 'BB:BB'", ()
+    )
+    manager.build_inventory()
+
+    rows = master_rows(db)
+    vendor = "ACME" if carry_forward else None
+    assert rows == sorted(
+        [
+            ("source_dns_ad", "10.0.0.1", "HOST1", None, None, 3),
+            ("source_snmp", "10.0.0.1", None, "AA:AA", vendor, 2),
+        ],
+        key=str,
+    )
+
+
+def test_build_inventory_incremental(db, config_path):
+    manager = InventoryManager(
+        db=db, logger=MagicMock(), config_path=config_path, build_mode="incremental"
+    )
+    manager.build_inventory()
+    assert len(master_rows(db)) == 3
+    db.execute_sqlite_command(
+        "UPDATE master_inventory SET vendor = 'ACME' WHERE physical_address = 'AA:AA'",
+        (),
+    )
+
+    db.bulk_upsert(
+        "source_snmp",
+        [
+            {"ipv4": "10.0.0.1", "physical_address": "AA:AA", "last_seen": 9},
+            {"ipv4": "10.0.0.3", "physical_address": "CC:CC", "last_seen": 9},
+        ],
+        ["physical_address", "ipv4"],
+    )
+    db.execute_sqlite_command(
+        "DELETE FROM source_snmp WHERE physical_address = 'BB:BB'", ()
+    )
+    manager.build_inventory()
+
+    rows = master_rows(db)
+    assert ("source_snmp", "10.0.0.1", None, "AA:AA", "ACME", 9) in rows
+    assert ("source_snmp", "10.0.0.3", None, "CC:CC", None, 9) in rows
+    assert not [row for row in rows if row[3] == "BB:BB"]
+    assert len(rows) == 3
+
+
+def inventory_values(db):
+    return sorted(
+        db.execute_sqlite_command(
+            "SELECT source, ipv4, hostname, physical_address, first_seen, last_seen FROM master_inventory",
+            (),
+        ),
+        key=str,
+    )
+
+
+def rebuilt_values(db, tmp_path, config_path):
+    """Build a copy of db from scratch and clean it, as a full rebuild would."""
+    copy = SQLiteManager(database_path=str(tmp_path / "rebuild.db"))
+    db.get_connection().backup(copy.get_connection())
+    InventoryManager(
+        db=copy, logger=MagicMock(), config_path=config_path, build_mode="sql"
+    ).build_inventory()
+    InventoryCleaner(db=copy, match_columns=["ipv4"])
+    values = inventory_values(copy)
+    copy.close()
+    return values
+
+
+@pytest.mark.parametrize(
+    "build_mode, carry_forward", [("sql", True), ("incremental", None)]
+)
+def test_build_inventory_skips_merged_source_rows(
+    db, config_path, build_mode, carry_forward
+):
+    manager = InventoryManager(
+        db=db,
+        logger=MagicMock(),
+        config_path=config_path,
+        build_mode=build_mode,
+        carry_forward=carry_forward,
+    )
+    manager.build_inventory()
+    InventoryCleaner(db=db, match_columns=["ipv4"])
+    db.execute_sqlite_command(
+        "UPDATE master_inventory SET vendor = 'ACME' WHERE ipv4 = '10.0.0.1'", ()
+    )
+    manager.build_inventory()
+
+    rows = [row for row in master_rows(db) if row[1] == "10.0.0.1"]
+    assert rows == [("source_snmp", "10.0.0.1", "HOST1", "AA:AA", "ACME", 3)]
+
+
+@pytest.mark.parametrize(
+    "build_mode, carry_forward", [("sql", True), ("incremental", None)]
+)
+def test_build_inventory_matches_a_rebuild_after_merges(
+    db, tmp_path, config_path, build_mode, carry_forward
+):
+    manager = InventoryManager(
+        db=db,
+        logger=MagicMock(),
+        config_path=config_path,
+        build_mode=build_mode,
+        carry_forward=carry_forward,
+    )
+    manager.build_inventory()
+    InventoryCleaner(db=db, match_columns=["ipv4"])
+
+    refreshes = [
+        "UPDATE source_snmp SET first_seen = 1, last_seen = 100 WHERE physical_address = 'AA:AA'",
+        "UPDATE source_dns_ad SET hostname = 'HOST9', first_seen = 5, last_seen = 6",
+        "UPDATE source_snmp SET ipv4 = '10.0.0.9', last_seen = 30 WHERE physical_address = 'AA:AA'",
+        "DELETE FROM source_dns_ad",
+    ]
+    for refresh in refreshes:
+        db.execute_sqlite_command(refresh, ())
+        manager.build_inventory()
+        InventoryCleaner(db=db, match_columns=["ipv4"])
+        assert inventory_values(db) == rebuilt_values(db, tmp_path, config_path)
+
+
+def test_invalid_build_mode(db, config_path):
+    with pytest.raises(ValueError):
+        InventoryManager(
+            db=db, logger=MagicMock(), config_path=config_path, build_mode="bogus"
+        )
+
+
+@pytest.mark.parametrize("staging", ["main", "temp"])
+def test_shadow_build_publish(db, config_path, staging, mocker):
+    manager = InventoryManager(
+        db=db, logger=MagicMock(), config_path=config_path, shadow=True
+    )
+    manager.shadow_staging = staging
+    sync_indexes = mocker.spy(db, "sync_indexes")
+    manager.build_inventory()
+    assert manager.target_table == "master_inventory_next"
+    assert master_rows(db) == []
+
+    manager.publish_inventory()
+    assert manager.target_table == "master_inventory"
+    assert len(master_rows(db)) == 3
+    assert "master_inventory_next" not in db.get_table_names()
+    # The shadow was indexed before the swap and its index names came along.
+    assert {call.args[0] for call in sync_indexes.call_args_list} == {
+        "master_inventory_next"
+    }
+    assert sorted(db.get_indexes("master_inventory")) == [
+        "idx_master_inventory_next_source_row"
+    ]
+
+    # The next shadow takes the names the published table is not using.
+    manager.build_inventory()
+    manager.publish_inventory()
+    assert len(master_rows(db)) == 3
+    assert sorted(db.get_indexes("master_inventory")) == [
+        "idx_master_inventory_source_row"
+    ]
+
+
+@pytest.mark.parametrize("build_mode", ["sql", "incremental", "python"])
+def test_build_inventory_backfills_int_keys(db, config_path, build_mode):
+    for table in ["source_snmp", "master_inventory"]:
+        for column in ["mac_int", "ipv4_int"]:
+            db.execute_sqlite_command(
+                f"ALTER TABLE {table} ADD COLUMN {column} INTEGER", ()
+            )
+    db.execute_sqlite_command(
+        "UPDATE source_snmp SET physical_address = 'aa-aa-aa-00-00-01' WHERE ipv4 = '10.0.0.1'",
+        (),
+    )
+    InventoryManager(
+        db=db, logger=MagicMock(), config_path=config_path, build_mode=build_mode
+    ).build_inventory()
+
+    rows = db.execute_sqlite_command(
+        "SELECT source, ipv4_int, mac_int FROM master_inventory WHERE source != 'master_inventory' ORDER BY ipv4, source",
+        (),
+    )
+    assert rows == [
+        ("source_dns_ad", 0x0A000001, None),
+        ("source_snmp", 0x0A000001, 0xAAAAAA000001),
+        ("source_snmp", 0x0A000002, None),
+    ]
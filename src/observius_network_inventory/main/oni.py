@@ -10,17 +10,23 @@ from src.observius_network_inventory.inventory.InventoryManager import Inventory
 from src.observius_network_inventory.collector_manager.CollectorManager import (
     CollectorManager,
 )
+from src.observius_network_inventory.scheduler.Scheduler import Scheduler
+import argparse
+import signal
 
+ONI_YAML_FILE = "resources/etc/oni/oni.yaml"
+ONI_DB_YAML_FILE = "resources/etc/databases/oni.yaml"
 
-def main():
+
+def initialize():
     """
-    Observius Network Inventory (ONI) Main Process
+    Load the configuration, set up logging and create the ONI database.
+
+    :return: The oni.yaml reader, the database YAML reader, the logger and the database.
     """
     # Configuration File Initialization
-    oni_yaml_file = "resources/etc/oni/oni.yaml"
-    oni_db_yaml_file = "resources/etc/databases/oni.yaml"
-    oni_yaml = YamlReader(yaml_file=oni_yaml_file)
-    oni_db_yaml = YamlReader(yaml_file=oni_db_yaml_file)
+    oni_yaml = YamlReader(yaml_file=ONI_YAML_FILE)
+    oni_db_yaml = YamlReader(yaml_file=ONI_DB_YAML_FILE)
 
     # Variable Initialization
     program_name = oni_yaml.get_value("oni.settings.program_name")
@@ -33,39 +39,108 @@ def main():
         name=program_name, log_file=logging_path, level=logging_level
     ).get_logger()
     logger.info("Starting Observius Network Inventory (ONI)")
-    logger.info(f'Configuration File: "{oni_yaml_file}" loaded successfully.')
-    logger.info(f'Configuration File: "{oni_db_yaml_file}" loaded successfully.')
+    logger.info(f'Configuration File: "{ONI_YAML_FILE}" loaded successfully.')
+    logger.info(f'Configuration File: "{ONI_DB_YAML_FILE}" loaded successfully.')
 
     # Database Initialization
     logger.info("Initializing ONI Database")
     oni_db = SQLiteManager(
-        database_path=oni_db_yaml.get_value("database.settings.file")
+        database_path=oni_db_yaml.get_value("database.settings.file"),
+        settings=oni_db_yaml.get_section("database.settings"),
     )
     create_dir(path_minus_file(oni_db_yaml.get_value("database.settings.file")))
     oni_db.create_database()
-    oni_db.create_tables_from_yaml(yaml_path="resources/etc/databases/oni.yaml")
+    oni_db.create_tables_from_yaml(yaml_path=ONI_DB_YAML_FILE)
     logger.info("ONI Database Initialized")
+    return oni_yaml, oni_db_yaml, logger, oni_db
 
-    # Kick off collectors
-    logger.info("Starting Collector Collectors")
-    CollectorManager(db=oni_db, logger=logger).run_collectors()
 
+def process_inventory(oni_db, oni_db_yaml, logger):
+    """
+    Build, clean and enrich the master inventory from the source tables.
+    """
     # Build Interface Inventory
     # InventoryManager(
-    #     db=oni_db, logger=logger, config_path=oni_db_yaml_file
+    #     db=oni_db, logger=logger, config_path=ONI_DB_YAML_FILE
     # ).build_inventory
 
     # Build Master Inventory
-    InventoryManager(
-        db=oni_db, logger=logger, config_path=oni_db_yaml_file
-    ).build_inventory()
+    inventory_manager = InventoryManager(
+        db=oni_db, logger=logger, config_path=ONI_DB_YAML_FILE
+    )
+    inventory_manager.build_inventory()
 
     # Clean Master Inventory
-    InventoryCleaner(db_path=oni_db_yaml.get_value("database.settings.file"))
+    cleaner_config = oni_db_yaml.get_section("database.inventory.cleaner") or {}
+    inventory_cleaner = InventoryCleaner(
+        db=oni_db,
+        table=inventory_manager.target_table,
+        resolver=cleaner_config.get("resolver", "union_find"),
+        match_columns=cleaner_config.get("match_columns"),
+        merge_rules=cleaner_config.get("merge_rules"),
+        run=False,
+    )
+    if cleaner_config.get("dry_run"):
+        cleaner_report = inventory_cleaner.plan()
+    else:
+        cleaner_report = inventory_cleaner.clean()
+    logger.info(f"Inventory cleaner report: {cleaner_report}")
+    if cleaner_config.get("report_file"):
+        inventory_cleaner.export_report(cleaner_config["report_file"])
 
     # Enrich MAC Addresses
-    MacConfigurator(oni_db=oni_db)
+    MacConfigurator(oni_db=oni_db, table=inventory_manager.target_table)
+
+    # Publish Master Inventory (no-op unless shadow builds are enabled)
+    inventory_manager.publish_inventory()
+
+
+def main():
+    """
+    Observius Network Inventory (ONI) Main Process
+    """
+    oni_yaml, oni_db_yaml, logger, oni_db = initialize()
+
+    # Kick off collectors
+    logger.info("Starting Collector Collectors")
+    CollectorManager(db=oni_db, logger=logger).run_collectors()
+
+    process_inventory(oni_db, oni_db_yaml, logger)
+
+    oni_db.close()
+
+
+def daemon():
+    """
+    Observius Network Inventory (ONI) Scheduler
+
+    Runs each collector on its own interval from 'oni.schedules' and rebuilds the
+    inventory only when a source table changed, until SIGTERM or SIGINT.
+    """
+    oni_yaml, oni_db_yaml, logger, oni_db = initialize()
+    scheduler = Scheduler(
+        collector_manager=CollectorManager(db=oni_db, logger=logger),
+        db=oni_db,
+        logger=logger,
+        process_inventory=lambda: process_inventory(oni_db, oni_db_yaml, logger),
+        schedules=oni_yaml.get_section("oni.schedules"),
+    )
+    for signal_number in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signal_number, lambda *_: scheduler.stop())
+    try:
+        scheduler.run()
+    finally:
+        oni_db.close()
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Observius Network Inventory (ONI)")
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Keep running and schedule each collector from 'oni.schedules' instead of a single pass.",
+    )
+    if parser.parse_args().daemon:
+        daemon()
+    else:
+        main()
@@ -9,6 +9,7 @@ from src.modules.device.Device import (
     purge_empty_values_from_dataframe,
 )
 import os
+from itertools import islice
 
 
 def main():
@@ -58,17 +59,17 @@ def main():
     # oni_interfaces = oni_db.execute_sqlite_query(query="SELECT * FROM interfaces", params=None)
 
     # Gather Devices
-    oni_devices_df = oni_db.execute_sqlite_query(
-        query="SELECT * FROM master_inventory", params=None
-    )
-    print(oni_devices_df)
+    # Rows are streamed from master_inventory instead of being loaded into one DataFrame.
+    device_query = "SELECT * FROM master_inventory"
 
     ###########
     # Loading #
     ###########
 
     # Load Unique IP Addresses
-    for index, device in oni_devices_df.iterrows():
+    for device in oni_db.iter_query(
+        "SELECT ipv4, hostname FROM master_inventory", named=True
+    ):
         if device.ipv4:
             ipv4_data = {
                 "address": device.ipv4,
@@ -78,9 +79,13 @@ def main():
             netbox_api.ipam_manager.create_ipv4(data=ipv4_data)
 
     # Load Devices
-    device_objects = convert_df_to_devices(dataframe=oni_devices_df)
+    device_objects = (
+        device_object
+        for oni_devices_df in oni_db.iter_query_frames(query=device_query)
+        for device_object in convert_df_to_devices(dataframe=oni_devices_df)
+    )
 
-    for device_object in device_objects[3:4]:
+    for device_object in islice(device_objects, 3, 4):
 
         # Create the device
         netbox_device_df = device_object.device_to_netbox_dataframe()
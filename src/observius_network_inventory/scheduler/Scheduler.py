@@ -0,0 +1,201 @@
+import queue
+import random
+import threading
+import time
+from src.modules.sqlite.main import SQLiteManager
+from src.modules.common.LoggerSetup import LoggerSetup
+from src.observius_network_inventory.collector_manager.CollectorManager import (
+    CollectorManager,
+)
+
+
+class CollectorWorker:
+    """A long-lived daemon thread that runs the runs of one collector, so its database
+    connection stays open between runs."""
+
+    def __init__(self, name: str, db: SQLiteManager):
+        """Start the worker thread.
+        :param name: The name of the collector.
+        :param db: The SQLiteManager the collector writes through.
+        """
+        self.db = db
+        self.runs = queue.Queue()
+        self.thread = threading.Thread(
+            target=self.work, name=f"collector-{name}", daemon=True
+        )
+        self.thread.start()
+
+    def submit(self, run):
+        """Queue a CollectorRun created with keep_connection=True."""
+        self.runs.put(run)
+
+    def stop(self):
+        """Let the thread exit once its current run is done."""
+        self.runs.put(None)
+
+    def work(self):
+        while True:
+            run = self.runs.get()
+            if run is None:
+                break
+            run.run()
+        self.db.release_connection()
+
+
+class Scheduler:
+    """Run each collector on its own interval and rebuild the inventory when a run changed rows."""
+
+    DEFAULT_INTERVAL = 3600
+    DEFAULT_TICK = 5
+    DEFAULT_DEBOUNCE = 30
+
+    def __init__(
+        self,
+        collector_manager: CollectorManager,
+        db: SQLiteManager,
+        logger: LoggerSetup,
+        process_inventory,
+        schedules: dict = None,
+    ):
+        """Prepare the scheduler.
+        :param collector_manager: The CollectorManager the collectors are run through. It
+            is kept for the life of the scheduler, so constructed collectors stay warm.
+        :param db: The SQLiteManager the collectors write through.
+        :param logger: An instance of LoggerSetup for logging.
+        :param process_inventory: A callable that builds, cleans and enriches the inventory.
+        :param schedules: The 'oni.schedules' section of oni.yaml: default 'interval' and
+            'jitter' (seconds), per-collector overrides under 'collectors', 'tick' and
+            'debounce'.
+        """
+        self.collector_manager = collector_manager
+        self.db = db
+        self.logger = logger
+        self.process_inventory = process_inventory
+        self.schedules = schedules or {}
+        self.tick_interval = self.schedules.get("tick", self.DEFAULT_TICK)
+        self.debounce = self.schedules.get("debounce", self.DEFAULT_DEBOUNCE)
+        self.slots = threading.BoundedSemaphore(collector_manager.max_workers)
+        self.stop_event = threading.Event()
+        self.next_runs = {}
+        self.running = {}
+        self.reported = set()
+        self.workers = {}
+        # When a run first wrote to the database since the last build.
+        self.changed_at = None
+
+    def get_schedule(self, collector_name):
+        """Get the interval and jitter of a collector in seconds.
+        :param collector_name: The name of the collector.
+        :return: An (interval, jitter) tuple.
+        """
+        schedule = (self.schedules.get("collectors") or {}).get(collector_name) or {}
+        interval = schedule.get(
+            "interval", self.schedules.get("interval", self.DEFAULT_INTERVAL)
+        )
+        jitter = schedule.get("jitter", self.schedules.get("jitter", 0))
+        return interval, jitter
+
+    def schedule_next(self, collector_name, now):
+        """Schedule the next run of a collector one interval (plus jitter) after now."""
+        interval, jitter = self.get_schedule(collector_name)
+        self.next_runs[collector_name] = now + interval + random.uniform(0, jitter)
+
+    def run(self):
+        """Run until stop() is called."""
+        now = time.monotonic()
+        for collector_name in self.collector_manager.enabled_collectors():
+            # Spread the first runs over the jitter window instead of starting all at once.
+            _, jitter = self.get_schedule(collector_name)
+            self.next_runs[collector_name] = now + random.uniform(0, jitter)
+        self.logger.info(
+            f"Scheduler started for collectors: {', '.join(self.next_runs) or 'none'}"
+        )
+        while not self.stop_event.is_set():
+            self.tick()
+            self.stop_event.wait(self.tick_interval)
+        for run in self.running.values():
+            run.cancel()
+        for worker in self.workers.values():
+            worker.stop()
+        self.logger.info("Scheduler stopped")
+
+    def stop(self):
+        self.stop_event.set()
+
+    def tick(self, now=None):
+        """Collect finished runs, rebuild the inventory if a run changed rows and start
+        the collectors that are due.
+
+        Once a build is due, no new collector is started until it has run, and it only
+        runs when the running collectors are done (or timed out, which rolls back their
+        writes), so the build and the collectors do not wait on each other's write lock.
+        :param now: The current time.monotonic() value.
+        """
+        now = time.monotonic() if now is None else now
+        self.collect_finished(now)
+        build_due = (
+            self.changed_at is not None and now - self.changed_at >= self.debounce
+        )
+        if build_due and all(run.finished() for run in self.running.values()):
+            self.build_inventory()
+            build_due = False
+
+        for collector_name, due in self.next_runs.items():
+            if now < due or build_due:
+                continue
+            self.schedule_next(collector_name, now)
+            if collector_name in self.running:
+                self.logger.warning(
+                    f"Collector {collector_name} is still running, skipping this run"
+                )
+                continue
+            self.start_run(collector_name)
+
+    def start_run(self, collector_name):
+        """Run a collector on its worker thread, starting the worker on first use."""
+        run = self.collector_manager.create_run(
+            collector_name, self.slots, keep_connection=True
+        )
+        if collector_name not in self.workers:
+            self.workers[collector_name] = CollectorWorker(collector_name, self.db)
+        self.workers[collector_name].submit(run)
+        self.running[collector_name] = run
+
+    def collect_finished(self, now):
+        """Log the runs that finished since the last tick and schedule a build for the
+        ones that changed rows.
+        """
+        for collector_name, run in list(self.running.items()):
+            if not run.finished():
+                continue
+            if run not in self.reported:
+                self.collector_manager.log_result(run.result)
+                self.reported.add(run)
+                if run.result["status"] == "ok" and run.result["rows"]:
+                    self.mark_changed(now)
+            # A timed-out run keeps its slot in self.running until its thread exits, so
+            # the collector is not started twice.
+            if run.done.is_set():
+                del self.running[collector_name]
+                self.reported.discard(run)
+
+    def mark_changed(self, now):
+        """Schedule an inventory build once the debounce delay has passed.
+
+        A run's row count is the number of rows its connection inserted, updated or
+        deleted (sqlite3's total_changes), so rows updated in place count as well as
+        new ones; a refreshed last_seen is carried into master_inventory too.
+        """
+        if self.changed_at is None:
+            self.changed_at = now
+            self.logger.info("Source tables changed, inventory build scheduled")
+
+    def build_inventory(self):
+        """Build, clean and enrich the inventory from the current source tables."""
+        self.changed_at = None
+        try:
+            self.process_inventory()
+        except Exception as e:
+            self.logger.error(f"Error processing inventory: {e}")
+            # Try again once the debounce delay has passed.
+            self.changed_at = time.monotonic()
@@ -0,0 +1,129 @@
+import threading
+from unittest.mock import MagicMock
+import pytest
+from src.modules.sqlite.main import SQLiteManager
+from src.observius_network_inventory.collector_manager.CollectorRun import (
+    CollectorRun,
+)
+from src.observius_network_inventory.scheduler.Scheduler import Scheduler
+
+
+@pytest.fixture
+def db(tmp_path):
+    manager = SQLiteManager(database_path=str(tmp_path / "oni.db"))
+    manager.create_table(
+        "source_test",
+        [
+            {"column": "ipv4", "data_type": "TEXT"},
+            {"column": "last_seen", "data_type": "INTEGER"},
+        ],
+        unique_constraints=[{"columns": ["ipv4"]}],
+    )
+    yield manager
+    manager.close()
+
+
+def make_scheduler(db, collectors):
+    collector_manager = MagicMock()
+    collector_manager.max_workers = 2
+    collector_manager.enabled_collectors.return_value = list(collectors)
+    collector_manager.create_run.side_effect = lambda name, slots, **kwargs: (
+        CollectorRun(name, collectors[name], db, slots=slots, **kwargs)
+    )
+    scheduler = Scheduler(
+        collector_manager=collector_manager,
+        db=db,
+        logger=MagicMock(),
+        process_inventory=MagicMock(),
+        schedules={"interval": 100, "debounce": 0, "collectors": {"slow": {}}},
+    )
+    scheduler.next_runs = {name: 0 for name in collectors}
+    return scheduler
+
+
+def finish(scheduler, now):
+    for run in list(scheduler.running.values()):
+        run.done.wait(2)
+    scheduler.tick(now)
+
+
+def test_skips_run_while_previous_is_running(db):
+    release = threading.Event()
+    scheduler = make_scheduler(db, {"slow": lambda: release.wait(2)})
+    scheduler.tick(0)
+    assert "slow" in scheduler.running
+    assert scheduler.next_runs["slow"] == 100
+
+    scheduler.tick(150)
+    assert scheduler.collector_manager.create_run.call_count == 1
+    scheduler.logger.warning.assert_called_once()
+
+    release.set()
+    finish(scheduler, 160)
+    assert scheduler.running == {}
+    scheduler.tick(250)
+    assert scheduler.collector_manager.create_run.call_count == 2
+
+
+def test_builds_only_when_a_run_changed_rows(db):
+    records = []
+
+    def collect():
+        if records:
+            db.bulk_upsert("source_test", records, ["ipv4"])
+
+    scheduler = make_scheduler(db, {"collector": collect})
+    process_inventory = scheduler.process_inventory
+
+    # Nothing collected, nothing written.
+    scheduler.tick(0)
+    finish(scheduler, 1)
+    assert process_inventory.call_count == 0
+
+    records.append({"ipv4": "10.0.0.1", "last_seen": 1})
+    scheduler.tick(200)
+    finish(scheduler, 201)
+    assert process_inventory.call_count == 1
+
+    # An existing row updated in place keeps its rowid and still counts.
+    records[0]["last_seen"] = 2
+    scheduler.tick(400)
+    finish(scheduler, 401)
+    assert process_inventory.call_count == 2
+
+
+def test_collector_connection_stays_open_between_runs(db):
+    connections = []
+    scheduler = make_scheduler(
+        db, {"collector": lambda: connections.append(db.get_connection())}
+    )
+    scheduler.tick(0)
+    finish(scheduler, 1)
+    scheduler.tick(200)
+    finish(scheduler, 201)
+    assert len(connections) == 2 and connections[0] is connections[1]
+
+
+def test_build_waits_for_running_collectors(db):
+    release = threading.Event()
+
+    def slow():
+        release.wait(2)
+
+    def collect():
+        db.bulk_upsert("source_test", [{"ipv4": "10.0.0.1", "last_seen": 1}], ["ipv4"])
+
+    scheduler = make_scheduler(db, {"collector": collect, "slow": slow})
+    scheduler.tick(0)
+    scheduler.running["collector"].done.wait(2)
+    scheduler.tick(1)
+    assert scheduler.changed_at == 1
+    assert scheduler.process_inventory.call_count == 0
+
+    # A due collector is held back until the pending build has run.
+    scheduler.tick(150)
+    assert "collector" not in scheduler.running
+    release.set()
+    finish(scheduler, 151)
+    assert scheduler.process_inventory.call_count == 1
+    assert "collector" in scheduler.running